@@ -1,4 +1,5 @@
 # -*- mode: python ; coding: utf-8 -*-
+import glob
 from PyInstaller.utils.hooks import collect_all
 
 datas = []
@@ -8,6 +9,9 @@ tmp_ret = collect_all('deepface')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 tmp_ret = collect_all('windows_toasts')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
+# ONNX models for the OpenCV DNN backend, if they've been downloaded (see models/README.md)
+for model in glob.glob('models/*.onnx'):
+    datas.append((model, 'models'))
 
 
 a = Analysis(
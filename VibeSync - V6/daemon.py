@@ -0,0 +1,63 @@
+"""Run VibeSync detection without the GUI or the tray.
+
+    python daemon.py [--toasts]
+
+Nothing from Qt is imported. Notifications are only logged unless --toasts
+is given. SIGTERM or Ctrl+C stops the daemon; SIGHUP (Ctrl+Break on
+Windows) reloads settings.json.
+"""
+import argparse
+import multiprocessing
+import signal
+import threading
+
+stop_requested = threading.Event()
+reload_requested = threading.Event()
+
+
+def _on_stop(signum, frame):
+    stop_requested.set()
+
+
+def _on_reload(signum, frame):
+    reload_requested.set()
+
+
+def install_signal_handlers():
+    signal.signal(signal.SIGTERM, _on_stop)
+    signal.signal(signal.SIGINT, _on_stop)
+    reload_signal = getattr(signal, "SIGHUP", None) or getattr(signal, "SIGBREAK", None)
+    if reload_signal is not None:
+        signal.signal(reload_signal, _on_reload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--toasts", action="store_true", help="Show desktop notifications as well as logging them")
+    args = parser.parse_args()
+
+    from services.notification import set_notifier, log_notification
+    if not args.toasts:
+        set_notifier(log_notification)
+
+    from services.detection_loop_scheduler import EmotionScheduler
+    scheduler = EmotionScheduler()
+    install_signal_handlers()
+    scheduler.start_emotion_scheduler()
+    print("[Daemon] VibeSync detection running headless.")
+
+    # Handlers only set flags; the work happens here, off the signal context.
+    # The timeout keeps the loop responsive where waits aren't interruptible.
+    while not stop_requested.wait(1):
+        if reload_requested.is_set():
+            reload_requested.clear()
+            scheduler.reload()
+
+    print("[Daemon] Stopping.")
+    scheduler.stop(wait=True)
+
+
+if __name__ == "__main__":
+    # Needed for the inference worker process in a frozen build
+    multiprocessing.freeze_support()
+    main()
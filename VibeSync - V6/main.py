@@ -1,5 +1,10 @@
-
-from app import run_app
+import multiprocessing
 
 if __name__ == "__main__":
+    # Needed for the inference worker process in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
+    # Imported here so the spawned worker, which re-imports this file as
+    # __mp_main__, doesn't load PyQt5 and the whole UI
+    from app import run_app
+
     run_app()
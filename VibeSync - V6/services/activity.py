@@ -1,9 +1,20 @@
-from pynput import keyboard, mouse
 from threading import Thread
 from time import time, sleep
-import win32gui
 import logging
 
+# Both need a desktop session; without one (e.g. the headless daemon on a
+# server) activity reads as zero and the window as "Unknown"
+try:
+    from pynput import keyboard, mouse
+    listener_error = None
+except Exception as e:
+    keyboard = mouse = None
+    listener_error = e
+try:
+    import win32gui
+except ImportError:
+    win32gui = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 
@@ -31,6 +42,8 @@ def on_mouse_move(x, y):
 
 # --- Foreground Window ---
 def get_foreground_window():
+    if win32gui is None:
+        return "Unknown"
     try:
         window = win32gui.GetForegroundWindow()
         title = win32gui.GetWindowText(window)
@@ -61,6 +74,9 @@ def get_activity_snapshot():
 
 # --- Background Listeners ---
 def start_listeners():
+    if keyboard is None or mouse is None:
+        logging.warning(f"[Activity] Input listeners unavailable: {listener_error}")
+        return
     Thread(target=lambda: keyboard.Listener(on_press=on_key_press).run(), daemon=True).start()
     Thread(target=lambda: mouse.Listener(on_move=on_mouse_move).run(), daemon=True).start()
 
@@ -0,0 +1,89 @@
+from collections import deque
+from services.app_settings import get_setting
+
+# A change in typing or mouse speed by this factor counts as a sharp change;
+# speeds below the floor are treated as the floor so noise near zero doesn't count
+ACTIVITY_CHANGE_FACTOR = 3.0
+ACTIVITY_FLOOR = {"typing_speed": 0.5, "mouse_speed": 50.0}
+# Below this many keys/sec and pixels/sec the user counts as idle
+IDLE_TYPING = 0.05
+IDLE_MOUSE = 5.0
+
+
+class AdaptiveInterval:
+    """Picks the next detection interval from what the last cycles saw.
+
+    The interval grows by `growth` while the user is idle, away, or has shown
+    the same confident emotion for `stable_cycles` cycles in a row. A new
+    emotion or a sharp jump in activity drops it straight to the floor so the
+    transition is followed closely. Anything in between drifts back toward
+    the base interval. The result always stays within [min, max].
+    """
+
+    def __init__(self, base_seconds=None, min_seconds=None, max_seconds=None,
+                 stable_cycles=None, min_confidence=None, growth=1.5):
+        self.min_seconds = float(min_seconds or get_setting("adaptive_min_seconds", 30))
+        self.max_seconds = float(max_seconds or get_setting("adaptive_max_seconds", 30 * 60))
+        if self.max_seconds < self.min_seconds:
+            self.max_seconds = self.min_seconds
+        base = float(base_seconds or get_setting("adaptive_base_seconds", 4 * 60))
+        self.base_seconds = self._clamp(base)
+        self.stable_cycles = int(stable_cycles or get_setting("adaptive_stable_cycles", 3))
+        self.min_confidence = float(min_confidence or get_setting("adaptive_min_confidence", 60))
+        self.growth = growth
+        self.interval = self.base_seconds
+        self.history = deque(maxlen=max(self.stable_cycles, 1))
+        self.last_activity = None
+        self.last_reason = "start"
+
+    def _clamp(self, seconds):
+        return min(max(seconds, self.min_seconds), self.max_seconds)
+
+    def observe(self, emotion, confidence=None, activity=None):
+        """Record a completed cycle and return the next interval in seconds."""
+        previous = self.history[-1][0] if self.history else None
+        self.history.append((emotion, confidence))
+
+        if previous is not None and emotion != previous:
+            return self._set(self.min_seconds, f"emotion changed ({previous} -> {emotion})")
+        if self._activity_jumped(activity):
+            return self._set(self.min_seconds, "activity changed sharply")
+        if self._is_idle(activity):
+            return self._set(self.interval * self.growth, "idle")
+        if self._is_stable():
+            return self._set(self.interval * self.growth, f"stable {emotion}")
+        return self._set(self.interval + (self.base_seconds - self.interval) / 2, "settling")
+
+    def observe_absence(self, reason="away"):
+        """A cycle that found nobody (no face, in a call): back off."""
+        self.last_activity = None
+        return self._set(self.interval * self.growth, reason)
+
+    def _set(self, seconds, reason):
+        self.interval = self._clamp(seconds)
+        self.last_reason = reason
+        return self.interval
+
+    def _is_stable(self):
+        if len(self.history) < self.history.maxlen:
+            return False
+        emotions = {emotion for emotion, _ in self.history}
+        # A confidence of None means the result was reused from an identical frame
+        confident = all(c is None or c >= self.min_confidence for _, c in self.history)
+        return len(emotions) == 1 and confident
+
+    def _is_idle(self, activity):
+        if not activity:
+            return False
+        return activity.get("typing_speed", 0) <= IDLE_TYPING and activity.get("mouse_speed", 0) <= IDLE_MOUSE
+
+    def _activity_jumped(self, activity):
+        previous, self.last_activity = self.last_activity, activity
+        if not activity or not previous:
+            return False
+        for key, floor in ACTIVITY_FLOOR.items():
+            before = max(previous.get(key, 0), floor)
+            after = max(activity.get(key, 0), floor)
+            if max(before, after) / min(before, after) >= ACTIVITY_CHANGE_FACTOR:
+                return True
+        return False
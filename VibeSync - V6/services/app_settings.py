@@ -0,0 +1,18 @@
+import json
+
+SETTINGS_FILE = "settings.json"
+
+
+def load_settings():
+    try:
+        with open(SETTINGS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[Settings] Could not read {SETTINGS_FILE}: {e}")
+        return {}
+
+
+def get_setting(key, default=None):
+    """Read a single key from settings.json, falling back to `default`."""
+    value = load_settings().get(key)
+    return default if value is None else value
@@ -0,0 +1,227 @@
+import glob
+import os
+from abc import ABC, abstractmethod
+import threading
+import time
+import cv2
+from services.camera_probe import get_camera_probe
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class CameraUnavailable(RuntimeError):
+    """Raised when the frame source cannot be opened (device busy or missing)."""
+
+
+# --- Frame sources ---
+class FrameSource(ABC):
+    """Something the camera service can open, read frames from and close again."""
+
+    # Device node another process could be holding, if the source has one
+    device_path = None
+
+    def open(self):
+        return True
+
+    @abstractmethod
+    def read(self):
+        """Return (ok, frame) like cv2.VideoCapture.read()."""
+
+    def close(self):
+        pass
+
+
+class WebcamSource(FrameSource):
+    def __init__(self, index=0):
+        self.index = index
+        self.cap = None
+
+    @property
+    def device_path(self):
+        if isinstance(self.index, int):
+            return f"/dev/video{self.index}"
+        return None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.index)
+        return self.cap.isOpened()
+
+    def read(self):
+        if self.cap is None:
+            return False, None
+        return self.cap.read()
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class VideoFileSource(WebcamSource):
+    """Plays back a recorded video, looping at the end so it never runs dry."""
+
+    def __init__(self, path, loop=True):
+        super().__init__(path)
+        self.loop = loop
+        # Frame to resume from, so playback moves on between cycles like a live camera
+        self.position = 0
+
+    def open(self):
+        if self.cap is None and super().open() and self.position:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.position)
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        ret, frame = super().read()
+        if not ret and self.loop and self.cap is not None:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def close(self):
+        if self.cap is not None:
+            self.position = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+        super().close()
+
+
+class ImageDirectorySource(FrameSource):
+    """Serves the images of a directory in name order, one per read."""
+
+    def __init__(self, directory, loop=True):
+        self.directory = directory
+        self.loop = loop
+        self.paths = []
+        self.position = 0
+
+    def open(self):
+        if not self.paths:
+            self.paths = sorted(
+                path for path in glob.glob(os.path.join(self.directory, "*"))
+                if path.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        return bool(self.paths)
+
+    def read(self):
+        if self.position >= len(self.paths):
+            if not self.loop or not self.paths:
+                return False, None
+            self.position = 0
+        frame = cv2.imread(self.paths[self.position])
+        self.position += 1
+        return frame is not None, frame
+
+
+def source_from_setting(value):
+    """Build a frame source from the `camera_source` setting.
+
+    An integer (or digit string) is a webcam index, a directory is an image
+    sequence and any other path is treated as a video file.
+    """
+    if value is None or value == "":
+        return WebcamSource(0)
+    if isinstance(value, int) or str(value).isdigit():
+        return WebcamSource(int(value))
+    if os.path.isdir(value):
+        return ImageDirectorySource(value)
+    return VideoFileSource(value)
+
+
+# --- Lease ---
+class CameraLease:
+    """Exclusive use of the frame source until `release()` is called.
+
+    Frames captured through the lease stay available on `frames` after the
+    device has been released, so every stage of a cycle sees the same image.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.frames = []
+        self.released = False
+
+    @property
+    def frame(self):
+        return self.frames[-1] if self.frames else None
+
+    def capture(self, count=1, interval=0.0):
+        if self.released:
+            raise RuntimeError("Camera lease already released.")
+        captured = []
+        for i in range(count):
+            if i and interval:
+                time.sleep(interval)
+            ret, frame = self.service.source.read()
+            if not ret or frame is None:
+                break
+            captured.append(frame)
+        self.frames.extend(captured)
+        return captured
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.service._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+# --- Service ---
+class CameraService:
+    """Opens the frame source once per cycle and hands out the captured frames.
+
+    Only one lease can be active at a time; the device is closed again as soon
+    as the lease is released so the camera is free between cycles. Where a
+    probe is available the device is only opened if no other process holds it.
+    """
+
+    def __init__(self, source=None, probe=None):
+        self.source = source or WebcamSource(0)
+        self.lock = threading.Lock()
+        self.probe = probe if probe is not None else get_camera_probe()
+
+    def set_source(self, source):
+        with self.lock:
+            self.source.close()
+            self.source = source
+
+    def check_in_use(self):
+        """Raise CameraUnavailable if another process has the device open."""
+        device = self.source.device_path
+        if self.probe is None or device is None:
+            return
+        holders = self.probe.device_holders(device)
+        if holders:
+            names = ", ".join(sorted(set(holders.values())))
+            raise CameraUnavailable(f"Camera in use by {names}")
+
+    def acquire(self):
+        self.lock.acquire()
+        try:
+            self.check_in_use()
+            opened = self.source.open()
+        except Exception:
+            self._release()
+            raise
+        if not opened:
+            self._release()
+            raise CameraUnavailable("Camera cannot be opened")
+        return CameraLease(self)
+
+    def _release(self):
+        try:
+            self.source.close()
+        finally:
+            self.lock.release()
+
+    def grab(self, count=1, interval=0.0):
+        """Open, capture `count` frames and release. Returns [] if unavailable."""
+        try:
+            with self.acquire() as lease:
+                return lease.capture(count, interval)
+        except CameraUnavailable as e:
+            print(f"[Camera] {e}")
+            return []
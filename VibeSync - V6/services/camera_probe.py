@@ -0,0 +1,92 @@
+import os
+import sys
+import threading
+import time
+
+VIDEO_DEVICE_PREFIX = "/dev/video"
+# How long a probe result is trusted before /proc is looked at again
+CACHE_SECONDS = 2.0
+
+
+class CameraProbe:
+    """Finds which processes hold a /dev/video* device open, without opening it.
+
+    Walks /proc/<pid>/fd and reads the descriptor links. Every link is read
+    on each refresh: fd numbers are reused (a socket closed on fd 5 makes
+    the next open, maybe of the camera, land on fd 5 again), so a target
+    remembered by fd number can't be trusted. Results are cached for
+    `cache_seconds` instead. `proc_root` can point at a fake tree for
+    testing.
+    """
+
+    def __init__(self, proc_root="/proc", cache_seconds=CACHE_SECONDS, ignore_pids=None):
+        self.proc_root = proc_root
+        self.cache_seconds = cache_seconds
+        self.ignore_pids = set(ignore_pids) if ignore_pids is not None else {os.getpid()}
+        self.lock = threading.Lock()
+        self.holders = {}   # device -> {pid: process name}
+        self.checked_at = None
+        self.last_scan_ms = 0.0
+
+    def available(self):
+        if self.proc_root == "/proc" and not sys.platform.startswith("linux"):
+            return False
+        return os.path.isdir(self.proc_root)
+
+    def device_holders(self, device):
+        """Return {pid: name} of other processes that have `device` open."""
+        with self.lock:
+            now = time.monotonic()
+            if self.checked_at is None or now - self.checked_at >= self.cache_seconds:
+                started = time.perf_counter()
+                self._refresh()
+                self.last_scan_ms = (time.perf_counter() - started) * 1000
+                self.checked_at = now
+            return dict(self.holders.get(os.path.realpath(device), {}))
+
+    def is_busy(self, device):
+        return bool(self.device_holders(device))
+
+    def _pids(self):
+        try:
+            entries = os.listdir(self.proc_root)
+        except OSError:
+            return set()
+        return {int(entry) for entry in entries if entry.isdigit()} - self.ignore_pids
+
+    def _refresh(self):
+        holders = {}
+        for pid in self._pids():
+            fd_dir = os.path.join(self.proc_root, str(pid), "fd")
+            try:
+                fd_numbers = os.listdir(fd_dir)
+            except OSError:
+                continue  # gone, or not ours to look at
+            for fd in fd_numbers:
+                try:
+                    target = os.readlink(os.path.join(fd_dir, fd))
+                except OSError:
+                    continue
+                if target.startswith(VIDEO_DEVICE_PREFIX):
+                    holders.setdefault(os.path.realpath(target), {})[pid] = self._process_name(pid)
+        self.holders = holders
+
+    def _process_name(self, pid):
+        try:
+            with open(os.path.join(self.proc_root, str(pid), "comm")) as f:
+                return f.read().strip()
+        except OSError:
+            return str(pid)
+
+
+_probe = None
+_probe_lock = threading.Lock()
+
+
+def get_camera_probe():
+    """The shared probe, or None where /proc isn't available (Windows, macOS)."""
+    global _probe
+    with _probe_lock:
+        if _probe is None:
+            _probe = CameraProbe()
+        return _probe if _probe.available() else None
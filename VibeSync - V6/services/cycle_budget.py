@@ -0,0 +1,144 @@
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, wait
+from services.metrics import get_metrics
+
+# Default per-stage limits in seconds; settings can override any of them
+STAGE_TIMEOUTS = {
+    "process_scan": 3,
+    "capture": 8,
+    "busy_check": 3,
+    "face_gate": 3,
+    "inference": 30,
+    "activity": 2,
+    "quote": 12,
+    "notify": 3,
+    "log": 5,
+}
+
+# How often a waiting stage checks whether the cycle was cancelled
+POLL_SECONDS = 0.25
+
+
+class StageTimeout(Exception):
+    def __init__(self, stage, limit):
+        super().__init__(f"Stage '{stage}' exceeded {limit:.1f}s")
+        self.stage = stage
+
+
+class StageFailed(Exception):
+    """A stage raised; the original exception is the cause."""
+
+    def __init__(self, stage, error):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class CycleCancelled(Exception):
+    """The scheduler was stopped while a cycle was in progress."""
+
+
+class SkipCycle(Exception):
+    """Raised by a stage to end the cycle early, optionally telling the user why."""
+
+    def __init__(self, message=None, reason=None):
+        self.reason = reason or message or "cycle skipped"
+        super().__init__(self.reason)
+        self.message = message
+
+
+class CycleBudget:
+    """Deadline for one detection cycle, split into per-stage timeouts.
+
+    Each stage runs on the shared executor and is waited on for at most
+    min(stage limit, time left in the cycle). A stage that overruns is
+    abandoned - Python threads can't be killed, so it finishes in the
+    background - and the caller decides how to degrade.
+    """
+
+    def __init__(self, total_seconds, executor, stage_timeouts=None, cancelled=None, counters=None):
+        self.started = time.monotonic()
+        self.deadline = self.started + total_seconds
+        self.executor = executor
+        self.stage_timeouts = dict(STAGE_TIMEOUTS, **(stage_timeouts or {}))
+        self.cancelled = cancelled or (lambda: False)
+        self.counters = counters if counters is not None else Counter()
+        self.metrics = get_metrics()
+        self.sinks = []
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+    def start(self, stage, fn, *args, **kwargs):
+        """Submit a stage and return a handle to pass to wait_any()."""
+        if self.cancelled():
+            raise CycleCancelled()
+        limit = min(self.stage_timeouts.get(stage, self.remaining()), self.remaining())
+        if limit <= 0:
+            self.counters[f"{stage}_timeouts"] += 1
+            raise StageTimeout(stage, 0)
+        future = self.executor.submit(self._timed, stage, fn, *args, **kwargs)
+        return future, time.monotonic() + limit, limit
+
+    def wait_any(self, handles):
+        """Wait for the first of {stage: handle} to finish; return (stage, result).
+
+        Re-raises SkipCycle, raises StageFailed for any other exception from
+        a stage, StageTimeout for the first stage past its limit, or
+        CycleCancelled once the scheduler is stopped.
+        """
+        futures = {handle[0]: stage for stage, handle in handles.items()}
+        while True:
+            now = time.monotonic()
+            next_give_up = min(handle[1] for handle in handles.values())
+            done, _ = wait(futures, timeout=max(min(POLL_SECONDS, next_give_up - now), 0), return_when=FIRST_COMPLETED)
+            if done:
+                future = done.pop()
+                error = future.exception()
+                if error is None:
+                    return futures[future], future.result()
+                if isinstance(error, (SkipCycle, CycleCancelled, StageTimeout)):
+                    raise error
+                raise StageFailed(futures[future], error) from error
+            if self.cancelled():
+                raise CycleCancelled()
+            now = time.monotonic()
+            for stage, (_, give_up_at, limit) in handles.items():
+                if now >= give_up_at:
+                    self.counters[f"{stage}_timeouts"] += 1
+                    raise StageTimeout(stage, limit)
+
+    def run(self, stage, fn, *args, **kwargs):
+        return self.wait_any({stage: self.start(stage, fn, *args, **kwargs)})[1]
+
+    def fire_and_forget(self, stage, fn, *args, **kwargs):
+        """Run a sink stage (logging, writes) without holding up the cycle.
+
+        The sink may start after the cycle has ended, so it is tied to the
+        cycle's trace now rather than whatever trace is current then.
+        """
+        future = self.executor.submit(self._timed, stage, fn, *args, _trace=self.metrics.trace, **kwargs)
+
+        def _report(done):
+            if done.exception() is not None:
+                print(f"[VibeSync Error] {stage}: {done.exception()}")
+
+        future.add_done_callback(_report)
+        self.sinks.append(future)
+        return future
+
+    def _timed(self, stage, fn, *args, _trace=None, **kwargs):
+        # Runs on the worker thread, so the time is the stage's own, not the wait for it
+        try:
+            with self.metrics.span(stage, _trace):
+                return fn(*args, **kwargs)
+        except SkipCycle:
+            self.counters[f"{stage}_skips"] += 1
+            raise
+        except Exception:
+            self.counters[f"{stage}_errors"] += 1
+            raise
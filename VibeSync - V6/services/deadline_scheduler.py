@@ -0,0 +1,284 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+
+FIXED_RATE = "fixed_rate"
+FIXED_DELAY = "fixed_delay"
+# The loop never sleeps longer than this, so a suspend is noticed soon after wake
+WATCH_SECONDS = 15.0
+# Wall and monotonic time disagreeing by more than this is a suspend or clock jump
+CLOCK_JUMP_SECONDS = 5.0
+
+
+def _wall_seconds():
+    # UTC, so a DST change isn't mistaken for a suspend
+    return time.time()
+
+
+def _utc_offset():
+    """Local time's offset from UTC in seconds; it changes with DST and time zone changes."""
+    return datetime.now().astimezone().utcoffset().total_seconds()
+
+
+class ScheduledJob:
+    """A repeating callback owned by a DeadlineScheduler.
+
+    `interval` is in seconds and may be a callable, so a job picks up schedule
+    changes on its next reschedule. `wall_clock` jobs compute their interval
+    from the calendar, so they are re-planned when the wall clock jumps.
+    Fixed-delay jobs are re-armed when the callback returns; with
+    `rearm=False` the owner calls reschedule() once the work it handed off
+    has really finished. Timing stats are kept per tick.
+    """
+
+    def __init__(self, callback, interval, mode=FIXED_RATE, on_scheduled=None, wall_clock=False, rearm=True):
+        self.callback = callback
+        self.interval = interval
+        self.mode = mode
+        self.on_scheduled = on_scheduled
+        self.wall_clock = wall_clock
+        self.rearm = rearm
+        self.deadline = None
+        self.cancelled = False
+        self.ticks = 0
+        self.missed = 0
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+        self.last_jitter = 0.0
+
+    def interval_seconds(self):
+        return float(self.interval() if callable(self.interval) else self.interval)
+
+    @property
+    def next_fire_time(self):
+        """Wall-clock time of the next deadline, for display."""
+        if self.deadline is None or self.cancelled:
+            return None
+        return datetime.now() + timedelta(seconds=self.deadline - time.monotonic())
+
+    def stats(self):
+        return {
+            "ticks": self.ticks,
+            "missed": self.missed,
+            "last_lateness_ms": round(self.last_lateness * 1000, 1),
+            "mean_lateness_ms": round(self.total_lateness * 1000 / max(self.ticks, 1), 1),
+            "max_lateness_ms": round(self.max_lateness * 1000, 1),
+            "last_jitter_ms": round(self.last_jitter * 1000, 1),
+        }
+
+
+class DeadlineScheduler:
+    """Runs every job from one long-lived thread off a heap of monotonic deadlines.
+
+    Fixed-rate jobs fire at start + n * interval no matter how long each run
+    takes, so the schedule doesn't drift; fixed-delay jobs wait `interval`
+    after the previous run finishes.
+
+    Monotonic time stops while the machine sleeps (on Linux) and the wall
+    clock can be changed under us, so the loop compares the two each time it
+    wakes. After a suspend or forward jump every overdue tick collapses into
+    one catch-up run, `settle_seconds` after the jump was noticed. A change of
+    local time alone (DST, a new time zone) only re-plans calendar jobs.
+    """
+
+    def __init__(self, name="VibeSyncScheduler", settle_seconds=0.0):
+        self.name = name
+        self.settle_seconds = settle_seconds
+        self.heap = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+        # Bumped on each (re)start; a loop from an earlier start exits when it sees a newer one
+        self.generation = 0
+        self.last_monotonic = time.monotonic()
+        self.last_wall = _wall_seconds()
+        self.last_offset = _utc_offset()
+        self.overslept = 0.0
+        self.suspends = 0
+        self.backward_jumps = 0
+
+    def schedule(self, callback, interval, mode=FIXED_RATE, first_delay=None, on_scheduled=None, wall_clock=False,
+                 rearm=True):
+        job = ScheduledJob(callback, interval, mode, on_scheduled, wall_clock, rearm)
+        delay = job.interval_seconds() if first_delay is None else first_delay
+        with self.condition:
+            self._push(job, time.monotonic() + delay)
+            self._ensure_thread()
+        self._announce(job)
+        return job
+
+    def reschedule(self, job, delay):
+        """Move the job's next deadline to `delay` seconds from now."""
+        with self.condition:
+            if job.cancelled or self.stopped:
+                return
+            self._push(job, time.monotonic() + delay)
+        self._announce(job)
+
+    def cancel(self, job):
+        with self.condition:
+            job.cancelled = True
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            for _, _, job in self.heap:
+                job.cancelled = True
+            self.heap.clear()
+            # The thread exits once any in-flight callback returns
+            self.condition.notify()
+
+    def _ensure_thread(self):
+        # After stop() the old loop may still be in a callback; it's retired, not reused
+        if self.stopped or self.thread is None or not self.thread.is_alive():
+            self.stopped = False
+            self.generation += 1
+            self.thread = threading.Thread(target=self._run, args=(self.generation,), name=self.name, daemon=True)
+            self.thread.start()
+
+    def _push(self, job, deadline):
+        job.deadline = deadline
+        heapq.heappush(self.heap, (deadline, next(self.counter), job))
+        self.condition.notify()
+
+    def _announce(self, job):
+        # Called without the lock held; listeners may be slow
+        if job.on_scheduled and not job.cancelled:
+            try:
+                job.on_scheduled(job)
+            except Exception as e:
+                print(f"[Scheduler Error] on_scheduled failed: {e}")
+
+    def _live_jobs(self):
+        jobs = {}
+        for deadline, _, job in self.heap:
+            if not job.cancelled and deadline == job.deadline:
+                jobs[id(job)] = job
+        return list(jobs.values())
+
+    def _check_clock(self):
+        """Re-plan jobs if wall time moved differently from monotonic time since the last look."""
+        now, wall, offset = time.monotonic(), _wall_seconds(), _utc_offset()
+        previous_now, previous_wall, previous_offset = self.last_monotonic, self.last_wall, self.last_offset
+        self.last_monotonic, self.last_wall, self.last_offset = now, wall, offset
+        # Where monotonic time keeps counting through sleep (Windows) the clocks
+        # agree, but the wait ran far past what was asked for
+        gap = (wall - previous_wall) - (now - previous_now)
+        if gap > -CLOCK_JUMP_SECONDS:
+            gap = max(gap, self.overslept)
+        self.overslept = 0.0
+        changed = []
+        if abs(gap) < CLOCK_JUMP_SECONDS:
+            pass
+        elif gap > 0:
+            self.suspends += 1
+            print(f"[Scheduler] Wall clock ran {gap:.0f}s ahead (suspend or clock change); "
+                  f"collapsing missed ticks into one catch-up run.")
+            for job in self._live_jobs():
+                # When the job would have fired had monotonic time kept running
+                due_wall = previous_wall + (job.deadline - previous_now)
+                remaining = due_wall - wall
+                if remaining <= self.settle_seconds:
+                    interval = max(job.interval_seconds(), 1e-6)
+                    job.missed += max(int(-remaining // interval), 0)
+                    remaining = self.settle_seconds
+                self._push(job, now + remaining)
+                changed.append(job)
+        else:
+            self.backward_jumps += 1
+            print(f"[Scheduler] Wall clock moved back {-gap:.0f}s; re-planning calendar jobs.")
+            for job in self._live_jobs():
+                if job.wall_clock:
+                    self._push(job, now + job.interval_seconds())
+                    changed.append(job)
+            return changed
+
+        if offset != previous_offset:
+            print(f"[Scheduler] Local time moved {(offset - previous_offset) / 60:+.0f} min (DST or time zone "
+                  f"change); re-planning calendar jobs.")
+            for job in self._live_jobs():
+                # A catch-up run set up above stays where it is
+                if job.wall_clock and job.deadline - now > self.settle_seconds:
+                    self._push(job, now + job.interval_seconds())
+                    if job not in changed:
+                        changed.append(job)
+        return changed
+
+    def _announce_later(self, jobs):
+        # _next_due holds the lock; listeners run on their own thread
+        if jobs:
+            threading.Thread(target=lambda: [self._announce(job) for job in jobs], daemon=True).start()
+
+    def _next_due(self, generation):
+        """Block until a job is due; return it, or None once stopped or superseded."""
+        with self.condition:
+            while not self.stopped and generation == self.generation:
+                self._announce_later(self._check_clock())
+                # Drop cancelled jobs and entries superseded by a reschedule
+                while self.heap and (self.heap[0][2].cancelled or self.heap[0][0] != self.heap[0][2].deadline):
+                    heapq.heappop(self.heap)
+                if not self.heap:
+                    self._wait(WATCH_SECONDS)
+                    continue
+                deadline, _, job = self.heap[0]
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._wait(min(remaining, WATCH_SECONDS))
+                    continue
+                heapq.heappop(self.heap)
+                if job.mode == FIXED_RATE:
+                    self._reschedule_fixed_rate(job, deadline)
+                return job, deadline
+            return None
+
+    def _wait(self, timeout):
+        wake_by = time.monotonic() + timeout
+        self.condition.wait(timeout)
+        self.overslept = max(time.monotonic() - wake_by, 0.0)
+
+    def _reschedule_fixed_rate(self, job, deadline):
+        interval = job.interval_seconds()
+        next_deadline = deadline + interval
+        now = time.monotonic()
+        if next_deadline <= now:
+            # We are more than a whole interval behind; drop the ticks we can't make
+            skipped = int((now - next_deadline) // interval) + 1
+            job.missed += skipped
+            next_deadline += skipped * interval
+            print(f"[Scheduler] Skipped {skipped} overdue tick(s).")
+        self._push(job, next_deadline)
+
+    def _record(self, job, deadline, started):
+        lateness = started - deadline
+        job.last_jitter = lateness - job.last_lateness
+        job.last_lateness = lateness
+        job.max_lateness = max(job.max_lateness, lateness)
+        job.total_lateness += lateness
+        job.ticks += 1
+        print(f"[Scheduler] Tick #{job.ticks} late by {lateness * 1000:.1f} ms "
+              f"(jitter {job.last_jitter * 1000:+.1f} ms)")
+
+    def _run(self, generation):
+        while True:
+            due = self._next_due(generation)
+            if due is None:
+                return
+            job, deadline = due
+            self._record(job, deadline, time.monotonic())
+            try:
+                job.callback()
+            except Exception as e:
+                print(f"[Scheduler Error] {e}")
+            if job.mode == FIXED_DELAY:
+                if not job.rearm:
+                    # job.deadline is still the one that just fired; reschedule() announces the next
+                    continue
+                with self.condition:
+                    if not job.cancelled and not self.stopped:
+                        self._push(job, time.monotonic() + job.interval_seconds())
+            self._announce(job)
@@ -1,29 +1,63 @@
 import json
 import os
 import threading
-from datetime import datetime, timedelta
-from services.emotion import detect_emotion
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from services import emotion as emotion_service
+from services.emotion import detect_emotion_burst
+from services.inference_worker import get_inference_worker
 from services.activity import get_activity_snapshot
 from services.groqapi import fetch_motivational_quote
 from services.notification import show_notification
-from services.quotes import fallback_quote
-import psutil
-import cv2
-from PyQt5.QtCore import QObject, pyqtSignal
-from windows_toasts import Toast, WindowsToaster
-
-class EmotionScheduler(QObject):
-    scheduler_ready = pyqtSignal()
-    LOG_FILE = "data/log.json"
+from services.quotes import fallback_quote, fallback_quote_with_source
+from services.face_detector import detect_faces
+from services.camera import CameraService, CameraUnavailable, source_from_setting
+from services.app_settings import get_setting
+from services.deadline_scheduler import DeadlineScheduler, FIXED_RATE, FIXED_DELAY
+from services.cycle_budget import CycleBudget, CycleCancelled, StageTimeout
+from services.pipeline import Pipeline, SkipCycle
+from services.process_watcher import get_process_watcher
+from services.adaptive_interval import AdaptiveInterval
+from services.schedule_model import schedule_from_settings
+from services.event_log import get_event_log
+from services.history_store import get_history_writer
+from services.metrics import get_metrics, start_metrics_server, stop_metrics_server
+
+# The last stop()'s flushes and worker shutdown. Module-level because what it
+# shuts down (worker, event log, history writer) is shared by every instance,
+# and the dashboard builds a new scheduler on each start.
+_last_teardown = None
+_teardown_lock = threading.Lock()
+
+
+class EmotionScheduler:
+    # Plain object with no Qt dependency, so the headless daemon can run it too
 
     def __init__(self):
-        super().__init__()
         self.start_time = None
         self.thread = None
         self.running = False
-        self.timer = None
+        # After a suspend, give the camera and the system a moment before the catch-up cycle
+        self.clock = DeadlineScheduler(settle_seconds=float(get_setting("resume_settle_seconds", 20)))
+        self.job = None
+        # Cycles run one at a time off the scheduler thread; their stages run
+        # on a small shared pool so a hung stage can be abandoned
+        self.cycle_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="VibeSyncCycle")
+        self.stage_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="VibeSyncStage")
+        self.state_lock = threading.Lock()
+        self.cycle_running = False
+        self.pending_cycle = False
+        # Stage timings, traces and the skip/error/overrun counters
+        self.metrics = get_metrics()
+        self.cycle_stats = self.metrics.counters
         self.lock = threading.Lock()
-        self.camera_lock = threading.Lock()
+        # Inference runs in a separate process; this is the client for it
+        self.model_manager = get_inference_worker()
+        self.camera = CameraService(source_from_setting(get_setting("camera_source")))
+        self.process_watcher = get_process_watcher()
+        self.event_log = get_event_log()
+        self.history_writer = get_history_writer()
+        self.adaptive = None
         self.next_trigger_time = None
         os.makedirs("data", exist_ok=True)
 
@@ -52,6 +86,10 @@ class EmotionScheduler(QObject):
             return 120
         elif schedule == "every 3 hours":
             return 180
+        elif schedule == "adaptive":
+            if self.adaptive is None:
+                self.adaptive = AdaptiveInterval()
+            return self.adaptive.interval / 60
         else:
             return 60
 
@@ -61,18 +99,123 @@ class EmotionScheduler(QObject):
             return
         self.start_time = datetime.now()
         self.running = True
-        self.schedule_next_detection()
+        teardown = _last_teardown
+        if teardown is not None and teardown.is_alive():
+            # The last stop is still shutting the worker down; start once it's done, off this thread
+            threading.Thread(target=self._start_after, args=(teardown,), daemon=True).start()
+        else:
+            self._start()
 
-    def schedule_next_detection(self):
-        interval = self.load_schedule()
-        self.next_trigger_time = datetime.now() + timedelta(minutes=interval)
+    def _start_after(self, teardown):
+        teardown.join()
+        if self.running:
+            self._start()
+
+    def _start(self):
+        # The last stop shut the worker down; it only comes back when asked to explicitly
+        self.model_manager.start()
+        # Build the model in the background so the first cycle doesn't pay for it
+        self.model_manager.warm_up_async()
+        start_metrics_server()
+        self.schedule_job()
+
+    def schedule_job(self):
+        # Fresh bounds from settings on every start
+        self.adaptive = None
+        # fixed_rate keeps detections on a fixed grid; fixed_delay waits a full
+        # interval after each cycle finishes. Calendar schedules compute each
+        # fire time from the clock, so they are always counted from the end
+        # of the last cycle. on_tick only hands the cycle to the executor, so
+        # fixed-delay jobs are re-armed by run_pending_cycles when it's done.
+        mode = get_setting("schedule_mode", FIXED_RATE)
+        calendar = not schedule_from_settings(get_setting).is_plain_interval
+        if calendar:
+            mode = FIXED_DELAY
+        self.job = self.clock.schedule(
+            self.on_tick,
+            self.seconds_until_next,
+            mode=mode,
+            on_scheduled=self.on_next_detection_scheduled,
+            wall_clock=calendar,
+            rearm=False,
+        )
+
+    def seconds_until_next(self, interval_seconds=None):
+        """Delay until the next detection, honouring cron, work hours and quiet periods."""
+        if interval_seconds is None:
+            interval_seconds = self.load_schedule() * 60
+        schedule = schedule_from_settings(get_setting)
+        if schedule.is_plain_interval:
+            return interval_seconds
         now = datetime.now()
-        wait_time = (self.next_trigger_time - now).total_seconds()
+        return max((schedule.next_fire(now, interval_seconds) - now).total_seconds(), 0.0)
 
+    def on_next_detection_scheduled(self, job):
+        self.next_trigger_time = job.next_fire_time
+        if self.next_trigger_time is None:
+            return
+        wait_time = (self.next_trigger_time - datetime.now()).total_seconds()
         print(f"Next detection at: {self.next_trigger_time.strftime('%H:%M:%S')} (in {wait_time/60:.1f} mins)")
+        # Runs on the scheduler thread, and the request can wait behind an inference holding the worker
+        threading.Thread(target=self.model_manager.plan_for, args=(self.next_trigger_time,),
+                         name="VibeSyncPlan", daemon=True).start()
+
+    def on_tick(self):
+        """Scheduler callback: start a cycle, or apply the overrun policy if one is still running.
+
+        overrun_policy "skip" drops the tick, "coalesce" folds every missed tick
+        into one cycle right after the current one and restarts the schedule
+        from there, "queue_one" queues a single follow-up cycle and keeps the
+        schedule as it was.
+        """
+        with self.state_lock:
+            if self.cycle_running:
+                policy = get_setting("overrun_policy", "skip")
+                self.cycle_stats["overruns"] += 1
+                if policy == "skip":
+                    self.cycle_stats["skipped"] += 1
+                elif self.pending_cycle:
+                    self.cycle_stats["coalesced" if policy == "coalesce" else "dropped"] += 1
+                else:
+                    self.pending_cycle = True
+                    self.cycle_stats["coalesced" if policy == "coalesce" else "queued"] += 1
+                print(f"[Debug] Previous cycle still running ({policy}). Overruns: {dict(self.cycle_stats)}")
+                return
+            self.cycle_running = True
+        self.cycle_executor.submit(self.run_pending_cycles, self.job)
 
-        self.timer = threading.Timer(wait_time, self.run_detection_cycle)
-        self.timer.start()
+    def run_pending_cycles(self, job=None):
+        try:
+            self._run_pending_cycles()
+        finally:
+            # Counted from the end of the cycle; a job replaced by reload() meanwhile is left alone
+            if job is not None and job is self.job and job.mode == FIXED_DELAY:
+                self.clock.reschedule(job, job.interval_seconds())
+
+    def _run_pending_cycles(self):
+        while True:
+            self.run_detection_cycle()
+            with self.state_lock:
+                if not (self.pending_cycle and self.running):
+                    self.pending_cycle = False
+                    self.cycle_running = False
+                    return
+                self.pending_cycle = False
+            if get_setting("overrun_policy", "skip") == "coalesce" and self.job:
+                # Start the schedule over from the catch-up cycle
+                self.clock.reschedule(self.job, self.job.interval_seconds())
+
+    def new_cycle_budget(self):
+        # The base interval, not the wait until the next fire (which can span a night)
+        interval = self.load_schedule() * 60
+        total = float(get_setting("cycle_budget_seconds", interval))
+        return CycleBudget(
+            min(total, interval),
+            self.stage_executor,
+            stage_timeouts=get_setting("stage_timeouts", {}),
+            cancelled=lambda: not self.running,
+            counters=self.cycle_stats,
+        )
 
     def run_detection_cycle(self):
         with self.lock:
@@ -81,55 +224,123 @@ class EmotionScheduler(QObject):
                 return
     
             print(f"Emotion detection triggered at {datetime.now().strftime('%H:%M:%S')}")
+            budget = self.new_cycle_budget()
+            trace = self.metrics.begin_cycle()
+            try:
+                results = self.build_cycle_pipeline(budget).run()
+                self.start_time = datetime.now()
+                self.cycle_stats["cycles_completed"] += 1
+                self.adapt_interval(results.get("user_state"))
+            except SkipCycle as e:
+                self.cycle_stats["cycles_skipped"] += 1
+                budget.fire_and_forget("log", self.log_skip, e.reason)
+                self.adapt_interval(None)
+                if e.message:
+                    budget.fire_and_forget("notify", show_notification, "VibeSync Motivation", e.message)
+            except CycleCancelled:
+                self.cycle_stats["cancelled"] += 1
+                print("[Debug] Scheduler stopped. Abandoning detection cycle.")
+            except StageTimeout as e:
+                print(f"[Debug] {e}. Skipping the rest of this cycle.")
+            except Exception as e:
+                self.cycle_stats["errors"] += 1
+                print(f"[VibeSync Error] {e}")
+            # Sinks aren't waited for; the trace file is written once they land
+            self.metrics.end_cycle(trace, pending=budget.sinks)
+            cycle = self.metrics.summary()["cycle"]
+            print(f"[Debug] Cycle took {budget.elapsed():.1f}s (p50 {cycle['p50_ms']:.0f} ms, "
+                  f"p95 {cycle['p95_ms']:.0f} ms). Stats: {dict(self.cycle_stats)}")
+
+    def adapt_interval(self, user_state):
+        """In adaptive mode, pick the next interval from this cycle and reschedule."""
+        if self.adaptive is None or self.job is None or not self.running:
+            return
+        if str(get_setting("monitoring_schedule", "")).lower().strip() != "adaptive":
+            return
+        if user_state is None:
+            interval = self.adaptive.observe_absence()
+        else:
+            interval = self.adaptive.observe(
+                user_state["emotion"], emotion_service.last_confidence, user_state.get("activity"))
+        print(f"[Debug] Adaptive interval: {interval:.0f}s ({self.adaptive.last_reason})")
+        # Counted from the end of this cycle, so a shorter interval takes effect now
+        self.clock.reschedule(self.job, self.seconds_until_next(interval))
+
+    def build_cycle_pipeline(self, budget):
+        """Stages of one cycle and what each waits for.
+
+        The process scan, camera capture and activity snapshot start together;
+        logging is a sink the cycle doesn't wait on.
+        """
+        pipeline = Pipeline(budget)
+        pipeline.stage("process_scan", self.find_video_call_app)
+        # One camera open per cycle; every check below works on these frames
+        pipeline.stage("capture", self.capture_frames)
+        pipeline.stage("activity", get_activity_snapshot)
+        pipeline.stage("busy_check", self.check_not_busy, needs=("capture", "process_scan"))
+        pipeline.stage("face_gate", self.check_face, needs=("capture",), after=("busy_check",))
+        pipeline.stage("inference", self.infer_emotion, needs=("capture", "face_gate"))
+        pipeline.stage("user_state", self.build_user_state, needs=("inference", "activity"))
+        # The quote stage yields (quote, source) so rollups can count where quotes came from
+        pipeline.stage("quote", self.fetch_quote, needs=("user_state",), fallback=self.quote_fallback)
+        pipeline.stage("notify", self.notify_user, needs=("quote",), fallback=lambda error, quote: None)
+        pipeline.stage("log", self.log_result, needs=("user_state", "quote"), sink=True)
+        return pipeline
+
+    def check_not_busy(self, frames, video_app):
+        if self.is_user_in_video_conference(frames, video_app):
+            raise SkipCycle("Video call detected. Skipping detection...", reason="video call")
+
+    def notify_user(self, quote):
+        show_notification("VibeSync Motivation", quote[0])
+
+    def check_face(self, frames):
+        faces = self.find_faces(frames)
+        if not any(faces):
+            raise SkipCycle("Face not found, Are you on a break?", reason="no face")
+        return faces
+
+    def capture_frames(self):
+        """Lease the camera, grab a short burst and free the device again."""
+        count = max(int(get_setting("burst_frames", 3)), 1)
+        window = float(get_setting("burst_window_seconds", 1.0))
+        interval = window / (count - 1) if count > 1 else 0.0
+        try:
+            with self.metrics.span("camera_open"):
+                lease = self.camera.acquire()
+            with lease:
+                return lease.capture(count, interval)
+        except CameraUnavailable as e:
+            print(f"[Debug] {e}")
+        except Exception as e:
+            print(f"[Error] Camera capture failed: {str(e)}")
+        return []
 
-            # Check conditions first
-            if self.is_user_in_video_conference():
-                message = "Video call detected. Skipping detection..."
-                show_notification("VibeSync Motivation", message)
-                self.schedule_next_detection()
-                return
-            elif not self.is_face_found():
-                message = "Face not found, Are you on a break?"
-                show_notification("VibeSync Motivation", message)
-                self.schedule_next_detection()
-                return
-            
-            self.perform_emotion_detection()
-            self.start_time = datetime.now()
-            self.schedule_next_detection()
-
-
-    def is_user_in_video_conference(self):
-        video_apps = ["zoom", "teams", "skype", "meet", "webex", "discord"]
-        using_video_call = False
-
+    def find_video_call_app(self):
         try:
-            for proc in psutil.process_iter(['name']):
-                try:
-                    pname = proc.info['name'].lower()
-                    if any(app in pname for app in video_apps):
-                        print(f"[Debug] Video conferencing app running: {pname}")
-                        using_video_call = True
-                        break
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-
-            # Additional check for camera status regardless of process detection
-            with self.camera_lock:
-                cap = cv2.VideoCapture(0)
-                if not cap.isOpened():
-                    print("[Debug] Camera cannot be opened")
-                    return True
-                
-                ret, _ = cap.read()
-                cap.release()
-
-                if not ret:
-                    print("[Debug] Camera busy")
-                    return True
-                else:
-                    print("[Debug] Camera available")
-                    return using_video_call  # Only return True if we detected both app and busy camera
+            video_app = self.process_watcher.find_video_app()
+        except Exception as e:
+            print(f"[Error] Process scan failed: {str(e)}")
+            return None
+        stats = self.process_watcher.stats()
+        print(f"[Debug] Process check: {stats['inspected']} new of {stats['processes']} "
+              f"in {stats['last_check_ms']} ms")
+        if video_app:
+            print(f"[Debug] Video conferencing app running: {video_app}")
+        return video_app
+
+    def is_user_in_video_conference(self, frames, video_app=None):
+        try:
+            using_video_call = bool(video_app)
+
+            # Additional check for camera status regardless of process detection:
+            # no frame from this cycle's lease means the device is held elsewhere
+            if not frames:
+                print("[Debug] Camera busy")
+                return True
+            else:
+                print("[Debug] Camera available")
+                return using_video_call  # Only return True if we detected both app and busy camera
 
         except Exception as e:
             print(f"[Error] Camera check failed: {str(e)}")
@@ -164,80 +375,131 @@ class EmotionScheduler(QObject):
     #             return False
     #     return False
 
-    def is_face_found(self):
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-        
-        cap = cv2.VideoCapture(0)
-        try:
-            ret, frame = cap.read()
-        finally:
-            cap.release()
-
-        if not ret:
+    def find_faces(self, frames):
+        """Face gate: returns the Haar boxes per frame so emotion analysis can reuse them."""
+        if not frames:
             print("[Debug] Couldn't access webcam.")
-            return False
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)
+            return []
 
-        face_found = len(faces) > 0
-        print(f"[Debug] Face detection: {'Found' if face_found else 'Not Found'}")
-        return face_found
+        faces = [detect_faces(frame) for frame in frames]
+        found = sum(1 for boxes in faces if boxes)
+        print(f"[Debug] Face detection: {'Found' if found else 'Not Found'} ({found}/{len(frames)} frames)")
+        return faces
 
     def log_entry(self, entry):
-        try:
-            if os.path.exists(self.LOG_FILE):
-                with open(self.LOG_FILE, 'r') as f:
-                    data = json.load(f)
-            else:
-                data = []
-        except:
-            data = []
+        # One appended line per cycle; data/log.json is no longer written
+        self.event_log.append(entry)
+        # Queued for the history database and its rollups; the writer thread does the insert
+        self.history_writer.submit(entry)
 
-        data.append(entry)
-        with open(self.LOG_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+    def infer_emotion(self, frames, faces):
+        print("[VibeSync] Running snapshot analysis...")
+        self.model_manager.check_health()
 
-    def perform_emotion_detection(self):
-        print("[VibeSync] Background monitoring started...")
+        aggregation = get_setting("burst_aggregation", "weighted")
         try:
-            print("[VibeSync] Running snapshot analysis...")
-
-            emotion = detect_emotion()
-            activity = get_activity_snapshot()
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            # Prepare payload for Groq
-            user_state = {
-                "timestamp": timestamp,
-                "emotion": emotion,
-                "activity": activity
-            }
-
-            quote = fetch_motivational_quote(user_state)
-            if not quote:
-                quote = fallback_quote(emotion)
-
-            show_notification("VibeSync Motivation", quote)
-
-            self.log_entry({
-                "timestamp": timestamp,
-                "emotion": emotion,
-                "activity": activity,
-                "quote": quote
-            })
-
+            emotion = detect_emotion_burst(frames, faces, aggregation)
         except Exception as e:
-            print(f"[VibeSync Error] {e}")
-
-    def stop(self):
+            # No result is better than a logged, quoted and counted guess
+            print(f"[VibeSync] Emotion model failed ({e}). Skipping this cycle.")
+            raise SkipCycle(reason="inference failed") from e
+        if emotion is None:
+            print("[VibeSync] Frames too poor to analyse. Skipping this cycle.")
+            raise SkipCycle(reason="poor frames")
+        return emotion
+
+    def build_user_state(self, emotion, activity):
+        # Prepare payload for Groq
+        return {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "emotion": emotion,
+            "activity": activity
+        }
+
+    def log_result(self, user_state, quote):
+        quote, quote_source = quote
+        entry = {
+            "event": "detection",
+            "timestamp": user_state["timestamp"],
+            "emotion": user_state["emotion"],
+            "activity": user_state["activity"],
+            "quote": quote,
+            "quote_source": quote_source
+        }
+        # Only one cycle runs at a time, so these still belong to this cycle's inference
+        if emotion_service.last_scores:
+            entry["confidence"] = emotion_service.last_confidence
+            entry["scores"] = emotion_service.last_scores
+        self.log_entry(entry)
+
+    def log_skip(self, reason):
+        self.log_entry({
+            "event": "skip",
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "reason": reason
+        })
+
+    def quote_fallback(self, error, user_state):
+        source = "timeout" if isinstance(error, StageTimeout) else "error"
+        return fallback_quote(user_state["emotion"], use_ai=False), source
+
+    def fetch_quote(self, user_state):
+        with self.metrics.span("groq_call"):
+            quote = fetch_motivational_quote(user_state)
+        if quote:
+            return quote, "ai"
+        return fallback_quote_with_source(user_state["emotion"])
+
+    def stop(self, wait=False):
+        """Stop scheduling now; flush the logs and stop the worker in the background.
+
+        Called from the Qt thread, so nothing here may wait on a running
+        inference (up to ANALYZE_TIMEOUT) or a log compression. Pass
+        `wait=True` to block until the teardown is done, e.g. before exiting.
+        """
+        global _last_teardown
+        if not self.running and self.job is None:
+            # Already stopped; a quitting caller still has to wait for that teardown
+            teardown = _last_teardown
+            if wait and teardown is not None:
+                teardown.join()
+            return
         self.running = False
-        if self.timer:
-            self.timer.cancel()
-            self.timer = None
-            print("[Debug] Timer cancelled.")
+        if self.job:
+            self.clock.cancel(self.job)
+            self.job = None
+            print("[Debug] Detection job cancelled.")
+        self.clock.stop()
+        stop_metrics_server()
+        self.next_trigger_time = None
+        with _teardown_lock:
+            teardown = _last_teardown = threading.Thread(target=self._teardown, args=(_last_teardown,),
+                                                         name="VibeSyncStop", daemon=True)
+            teardown.start()
+        if wait:
+            teardown.join()
+
+    def _teardown(self, previous):
+        # One teardown at a time, in the order the stops happened
+        if previous is not None:
+            previous.join()
+        self.history_writer.flush()
+        # Waits for any segment still being compressed
+        self.event_log.close()
+        # Waits for an inference in progress to finish
+        self.model_manager.shutdown()
         print("[Debug] EmotionScheduler stopped by user.")
 
+    def reload(self):
+        """Re-read settings.json: new camera source and a fresh schedule."""
+        if not self.running:
+            return
+        print("[Debug] Reloading settings.")
+        self.camera.set_source(source_from_setting(get_setting("camera_source")))
+        if self.job:
+            self.clock.cancel(self.job)
+        self.schedule_job()
+
     def get_next_trigger_time(self):
         if self.next_trigger_time:
             return self.next_trigger_time.strftime("%Y-%m-%d %H:%M:%S")
@@ -1,46 +1,143 @@
-from deepface import DeepFace
-import cv2
-import os
+import time
+from collections import deque
+import numpy as np
 from datetime import datetime
+from services.app_settings import get_setting
+from services.camera import CameraService
+from services.inference_worker import get_inference_worker
+from services.face_detector import detect_faces, largest_face, crop_face
+from services import frame_quality
+from services.snapshot_writer import get_snapshot_writer
+from services.perceptual_hash import dhash, find_similar
 
-SNAPSHOT_DIR = "data/snapshots"
-os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+# Recent results keyed by the frame's perceptual hash: (phash, (emotion, monotonic time))
+_emotion_cache = deque(maxlen=16)
+EMOTION_CACHE_SECONDS = 30 * 60
+# Confidence (percent) and per-class scores of the last detection; None when
+# the result was reused from the cache
+last_confidence = None
+last_scores = None
 
-def save_snapshot(frame, timestamp):
-    snapshot_path = os.path.join(SNAPSHOT_DIR, f"{timestamp}.jpg")
-    cv2.imwrite(snapshot_path, frame)
-    print(f"[Snapshot] Saved: {snapshot_path}")
-    return snapshot_path
+def save_snapshot(frame, timestamp, face_box=None, phash=None):
+    # Encoding and disk I/O happen on the writer's thread, not in the cycle
+    return get_snapshot_writer().submit(frame, timestamp, face_box, phash)
 
-def detect_emotion():
+def _cached_emotion(phash):
+    """Emotion of a recent near-identical frame, if reuse is switched on."""
+    if not get_setting("reuse_duplicate_emotion", False):
+        return None
+    max_distance = int(get_setting("snapshot_dedup_distance", 5))
+    match = find_similar(phash, reversed(_emotion_cache), max_distance)
+    if match is None:
+        return None
+    emotion, stored_at = match[1]
+    if time.monotonic() - stored_at > EMOTION_CACHE_SECONDS:
+        return None
+    return emotion
+
+_camera = None
+
+def _default_camera():
+    global _camera
+    if _camera is None:
+        _camera = CameraService()
+    return _camera
+
+def aggregate_scores(scores, method="weighted"):
+    """Combine per-frame {label: percent} dicts into one.
+
+    "mean" and "median" work per class; "weighted" is a mean where each frame
+    counts in proportion to its own top confidence, so blurry or ambiguous
+    frames have less say.
+    """
+    labels = list(scores[0])
+    matrix = np.array([[s.get(label, 0.0) for label in labels] for s in scores], dtype=np.float64)
+    if method == "median":
+        combined = np.median(matrix, axis=0)
+    elif method == "mean":
+        combined = matrix.mean(axis=0)
+    else:
+        weights = matrix.max(axis=1)
+        combined = np.average(matrix, axis=0, weights=weights if weights.sum() else None)
+    total = combined.sum() or 1.0
+    return {label: float(100 * value / total) for label, value in zip(labels, combined)}
+
+def detect_emotion(frame=None, faces=None):
+    """Single-frame detection; see detect_emotion_burst for the details."""
+    frames = [frame] if frame is not None else None
+    faces_per_frame = [faces] if faces is not None else None
+    return detect_emotion_burst(frames, faces_per_frame, aggregation="mean")
+
+def detect_emotion_burst(frames=None, faces_per_frame=None, aggregation="weighted"):
+    """Dominant emotion over a burst of frames, or None if none was usable.
+
+    Camera and model failures are raised rather than papered over with a
+    made-up result.
+    """
+    global last_confidence, last_scores
+    last_confidence = last_scores = None
     try:
-        cam = cv2.VideoCapture(0)
-        ret, frame = cam.read()
-        cam.release()
+        # The scheduler passes in the frames it already captured this cycle;
+        # only standalone callers fall back to grabbing one here.
+        if not frames:
+            frames = _default_camera().grab()
+            if not frames:
+                raise RuntimeError("Failed to capture webcam frame.")
+        if faces_per_frame is None:
+            faces_per_frame = [detect_faces(frame) for frame in frames]
 
-        if not ret:
-            raise RuntimeError("Failed to capture webcam frame.")
+        # Analyse only the faces the gate already found, so the model skips
+        # DeepFace's own (much slower) detector and works on small crops.
+        crops = []
+        for frame, faces in zip(frames, faces_per_frame):
+            box = largest_face(faces)
+            if box is not None:
+                crops.append(crop_face(frame, box))
+        candidates = crops or [frames[0]]
+
+        # Drop dark, blurry or covered frames before any model sees them
+        usable = []
+        for image in candidates:
+            verdict, image = frame_quality.check_quality(image)
+            if not verdict.startswith("rejected"):
+                usable.append(image)
+        print(f"[Quality] {frame_quality.summary()}")
 
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        save_snapshot(frame, timestamp)
+        phash = dhash(frames[0])
+        save_snapshot(frames[0], timestamp, largest_face(faces_per_frame[0]), phash)
+
+        if not usable:
+            print("[Emotion] No frame good enough to analyse; skipping inference.")
+            return None
 
-        try:
-            result = DeepFace.analyze(frame, actions=['emotion'], enforce_detection=False)
-        except Exception as inner_e:
-            print(f"[DeepFace Warning] Primary analysis failed, trying grayscale. Error: {inner_e}")
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            result = DeepFace.analyze(gray, actions=['emotion'], enforce_detection=False)
+        cached = _cached_emotion(phash)
+        if cached is not None:
+            print(f"[Emotion] {cached} (reused from a near-identical frame)")
+            return cached
 
-        if isinstance(result, list):
-            result = result[0]
+        model = get_inference_worker()
+        if crops:
+            # One batched forward pass for the whole burst
+            scores = aggregate_scores(model.predict_batch(usable), aggregation)
+            emotion = max(scores, key=scores.get)
+            confidence = scores[emotion]
+        else:
+            result = model.analyze(usable[0], detector_backend='opencv')
+            if isinstance(result, list):
+                result = result[0]
 
-        emotion = result.get('dominant_emotion', 'neutral')
-        confidence = result.get('emotion', {}).get(emotion, None)
+            emotion = result.get('dominant_emotion', 'neutral')
+            scores = result.get('emotion', {})
+            confidence = scores.get(emotion, None)
 
-        print(f"[Emotion] {emotion} (confidence: {confidence}%)")
+        print(f"[Emotion] {emotion} (confidence: {confidence}%, frames: {len(usable)})")
+        last_confidence = float(confidence) if confidence is not None else None
+        last_scores = {label: round(float(value), 2) for label, value in scores.items()}
+        _emotion_cache.append((phash, (emotion, time.monotonic())))
 
         return emotion
 
     except Exception as e:
         print(f"[Emotion Error] {e}")
-        return "neutral"
+        raise
@@ -0,0 +1,207 @@
+import gc
+import os
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+from services.app_settings import get_setting
+from utils.resource_path import resource_path
+
+# Label set every backend reports in, matching DeepFace's output
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+
+# FER+ (https://github.com/onnx/models, emotion-ferplus-8.onnx)
+FERPLUS_MODEL_PATH = "models/emotion-ferplus-8.onnx"
+FERPLUS_LABELS = ["neutral", "happy", "surprise", "sad", "angry", "disgust", "fear", "disgust"]  # contempt -> disgust
+FERPLUS_INPUT_SIZE = (64, 64)
+
+
+def _to_scores(probabilities, labels=EMOTION_LABELS):
+    """Turn one probability vector into a {label: percent} dict over EMOTION_LABELS."""
+    scores = dict.fromkeys(EMOTION_LABELS, 0.0)
+    total = float(np.sum(probabilities)) or 1.0
+    for label, p in zip(labels, probabilities):
+        scores[label] += 100 * float(p) / total
+    return scores
+
+
+def _gray(face):
+    return face if face.ndim == 2 else cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+
+
+class EmotionBackend(ABC):
+    """Scores cropped faces. Heavy imports belong in load(), not at module level."""
+
+    name = None
+
+    def __init__(self):
+        self.model = None
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+    @abstractmethod
+    def load(self):
+        """Build the model (once) and return it."""
+
+    def unload(self):
+        self.model = None
+        gc.collect()
+
+    @abstractmethod
+    def predict_batch(self, faces):
+        """Return one {label: percent} dict per face crop."""
+
+    def analyze(self, frame, **kwargs):
+        """DeepFace-style result for a single frame that may not be cropped yet."""
+        scores = self.predict_batch([frame])[0]
+        dominant = max(scores, key=scores.get)
+        return {"dominant_emotion": dominant, "emotion": scores}
+
+
+class DeepFaceBackend(EmotionBackend):
+    name = "DeepFace"
+    input_size = (48, 48)
+
+    def load(self):
+        if self.model is not None:
+            return self.model
+        from deepface import DeepFace
+        try:
+            self.model = DeepFace.build_model(model_name="Emotion", task="facial_attribute")
+        except TypeError:
+            self.model = DeepFace.build_model("Emotion")
+        return self.model
+
+    def warm_up(self):
+        from deepface import DeepFace
+        # The first inference compiles the graph; pay for it now, not mid-cycle
+        warm_up_frame = np.zeros((48, 48, 3), dtype=np.uint8)
+        DeepFace.analyze(warm_up_frame, actions=['emotion'], enforce_detection=False, detector_backend='skip')
+
+    def unload(self):
+        self.model = None
+        self._evict_deepface_cache()
+        gc.collect()
+
+    @staticmethod
+    def _evict_deepface_cache():
+        """Drop DeepFace's own reference to the emotion model so memory can be freed."""
+        from deepface import DeepFace
+        try:
+            from deepface.modules import modeling
+            cache = getattr(modeling, "cached_models", None)
+            if isinstance(cache, dict):
+                for task_models in cache.values():
+                    if isinstance(task_models, dict):
+                        task_models.pop("Emotion", None)
+        except ImportError:
+            pass
+
+        # Older DeepFace releases keep a flat cache on the DeepFace module
+        legacy_cache = getattr(DeepFace, "model_obj", None)
+        if isinstance(legacy_cache, dict):
+            legacy_cache.pop("Emotion", None)
+
+        try:
+            import tensorflow as tf
+            tf.keras.backend.clear_session()
+        except Exception:
+            pass
+
+    def predict_batch(self, faces):
+        model = self.load()
+        batch = np.stack([
+            np.expand_dims(cv2.resize(_gray(face), self.input_size, interpolation=cv2.INTER_AREA), -1)
+            for face in faces
+        ]).astype(np.float32) / 255.0
+        # Newer DeepFace wraps the Keras model in a client object
+        keras_model = getattr(model, "model", model)
+        predictions = keras_model.predict(batch, verbose=0)
+        return [_to_scores(prediction) for prediction in predictions]
+
+    def analyze(self, frame, **kwargs):
+        from deepface import DeepFace
+        self.load()
+        return DeepFace.analyze(frame, actions=['emotion'], enforce_detection=False, **kwargs)
+
+
+class OnnxEmotionBackend(EmotionBackend):
+    """FER+ on CPU through ONNX Runtime if installed, else OpenCV's DNN module.
+
+    Neither pulls in TensorFlow, so import, load and per-frame cost are a
+    fraction of the DeepFace backend.
+    """
+
+    name = "OpenCV DNN"
+
+    def __init__(self, model_path=None):
+        super().__init__()
+        self.model_path = model_path or get_setting("onnx_model_path", resource_path(FERPLUS_MODEL_PATH))
+        self.runtime = None
+        self.batch_supported = True
+
+    def load(self):
+        if self.model is not None:
+            return self.model
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(
+                f"FER+ model not found at {self.model_path}. Download emotion-ferplus-8.onnx "
+                "from the ONNX model zoo or set onnx_model_path in settings.json."
+            )
+        try:
+            import onnxruntime
+            self.model = onnxruntime.InferenceSession(self.model_path, providers=["CPUExecutionProvider"])
+            self.runtime = "onnxruntime"
+            # The published model has a fixed batch size of 1
+            self.batch_supported = not isinstance(self.model.get_inputs()[0].shape[0], int)
+        except ImportError:
+            self.model = cv2.dnn.readNetFromONNX(self.model_path)
+            self.runtime = "cv2.dnn"
+        return self.model
+
+    def warm_up(self):
+        self.predict_batch([np.zeros(FERPLUS_INPUT_SIZE, dtype=np.uint8)])
+
+    def _forward(self, blob):
+        if self.runtime == "onnxruntime":
+            input_name = self.model.get_inputs()[0].name
+            return self.model.run(None, {input_name: blob})[0]
+        self.model.setInput(blob)
+        return self.model.forward()
+
+    def predict_batch(self, faces):
+        self.load()
+        # FER+ takes raw 0-255 grey levels, NCHW
+        blob = np.stack([
+            cv2.resize(_gray(face), FERPLUS_INPUT_SIZE, interpolation=cv2.INTER_AREA)
+            for face in faces
+        ]).astype(np.float32)[:, np.newaxis, :, :]
+
+        logits = None
+        if self.batch_supported or len(faces) == 1:
+            try:
+                logits = self._forward(blob)
+            except Exception:
+                self.batch_supported = False
+        if logits is None:
+            logits = np.concatenate([self._forward(blob[i:i + 1]) for i in range(len(faces))])
+
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities = exp / exp.sum(axis=1, keepdims=True)
+        return [_to_scores(p, FERPLUS_LABELS) for p in probabilities]
+
+
+BACKENDS = {
+    DeepFaceBackend.name: DeepFaceBackend,
+    OnnxEmotionBackend.name: OnnxEmotionBackend,
+}
+
+
+def create_backend(name=None):
+    name = name or get_setting("emotion_backend", DeepFaceBackend.name)
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        print(f"[EmotionBackend] Unknown backend '{name}', using {DeepFaceBackend.name}")
+        backend_class = DeepFaceBackend
+    return backend_class()
@@ -0,0 +1,147 @@
+import threading
+import time
+from datetime import datetime
+from services.app_settings import get_setting
+from services.emotion_backends import DeepFaceBackend, create_backend
+
+# Seconds before the next trigger at which an unloaded model is rebuilt
+PRELOAD_LEAD_SECONDS = 60
+
+
+class EmotionModelManager:
+    """Keeps the emotion backend's model resident only while it is useful.
+
+    The model is built and warmed up once, unloaded after an idle period and
+    rebuilt shortly before the scheduler's next trigger so long schedules do
+    not hold the model in memory between detections. A backend that fails to
+    load (e.g. its model file is missing) is replaced by DeepFace until the
+    setting changes.
+    """
+
+    def __init__(self, idle_unload_minutes=None, preload_lead_seconds=PRELOAD_LEAD_SECONDS):
+        if idle_unload_minutes is None:
+            idle_unload_minutes = float(get_setting("model_idle_unload_minutes", 5))
+        self.idle_unload_seconds = idle_unload_minutes * 60
+        self.preload_lead_seconds = preload_lead_seconds
+        self.backend = None
+        self.last_used = None
+        self.lock = threading.RLock()
+        self.unload_timer = None
+        self.preload_timer = None
+        # Backend that failed to load, so it isn't retried on every detection
+        self.failed_backend = None
+
+    @property
+    def loaded(self):
+        return self.backend is not None and self.backend.loaded
+
+    def load(self):
+        with self.lock:
+            # Follow the emotion_backend setting; switching drops the old model
+            wanted = get_setting("emotion_backend", "DeepFace")
+            if wanted != self.failed_backend:
+                self.failed_backend = None
+            elif wanted != DeepFaceBackend.name:
+                wanted = DeepFaceBackend.name
+            if self.backend is not None and self.backend.name != wanted:
+                self.backend.unload()
+                self.backend = None
+            if self.backend is None:
+                self.backend = create_backend(wanted)
+            if self.backend.loaded:
+                return self.backend
+
+            started = time.monotonic()
+            try:
+                self.backend.load()
+                self.backend.warm_up()
+            except Exception as e:
+                if self.backend.name == DeepFaceBackend.name:
+                    raise
+                print(f"[EmotionModel Error] {self.backend.name} failed to load: {e}. "
+                      f"Using {DeepFaceBackend.name} instead.")
+                self.failed_backend = self.backend.name
+                self.backend.unload()
+                self.backend = None
+                return self.load()
+            self.last_used = time.monotonic()
+            print(f"[EmotionModel] {self.backend.name} loaded and warmed up in {time.monotonic() - started:.1f}s")
+            return self.backend
+
+    def warm_up_async(self):
+        def _load():
+            try:
+                self.load()
+            except Exception as e:
+                print(f"[EmotionModel Error] Warm-up failed: {e}")
+
+        threading.Thread(target=_load, daemon=True).start()
+
+    def analyze(self, frame, **kwargs):
+        with self.lock:
+            result = self.load().analyze(frame, **kwargs)
+            self.last_used = time.monotonic()
+        self._schedule_unload(self.idle_unload_seconds)
+        return result
+
+    def predict_batch(self, faces):
+        """Score already-cropped faces in one forward pass.
+
+        Returns one {label: percent} dict per face, like DeepFace's 'emotion'.
+        """
+        with self.lock:
+            scores = self.load().predict_batch(faces)
+            self.last_used = time.monotonic()
+        self._schedule_unload(self.idle_unload_seconds)
+        return scores
+
+    def unload(self):
+        with self.lock:
+            if not self.loaded:
+                return
+            self.backend.unload()
+            print("[EmotionModel] Unloaded after idle period.")
+
+    def plan_for(self, next_trigger_time):
+        """Decide whether to keep the model resident until `next_trigger_time`.
+
+        Short gaps keep it loaded. Long gaps unload it after the idle period
+        and rebuild it `preload_lead_seconds` before the trigger fires.
+        """
+        self._cancel_timer("preload_timer")
+        wait = (next_trigger_time - datetime.now()).total_seconds()
+        if wait <= self.idle_unload_seconds + self.preload_lead_seconds:
+            # Unloading would barely finish before the model is needed again
+            self._cancel_timer("unload_timer")
+            return
+
+        self._schedule_unload(self.idle_unload_seconds)
+        self.preload_timer = threading.Timer(wait - self.preload_lead_seconds, self.warm_up_async)
+        self.preload_timer.daemon = True
+        self.preload_timer.start()
+
+    def shutdown(self):
+        self._cancel_timer("unload_timer")
+        self._cancel_timer("preload_timer")
+        self.unload()
+
+    def _schedule_unload(self, delay):
+        self._cancel_timer("unload_timer")
+        self.unload_timer = threading.Timer(delay, self.unload)
+        self.unload_timer.daemon = True
+        self.unload_timer.start()
+
+    def _cancel_timer(self, name):
+        timer = getattr(self, name)
+        if timer:
+            timer.cancel()
+            setattr(self, name, None)
+
+
+_manager = None
+
+def get_model_manager():
+    global _manager
+    if _manager is None:
+        _manager = EmotionModelManager()
+    return _manager
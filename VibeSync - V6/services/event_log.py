@@ -0,0 +1,346 @@
+import glob
+import gzip
+import heapq
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from services.app_settings import get_setting
+
+EVENT_LOG_FILE = "data/events.jsonl"
+# Reanalysis events carry the timestamp of the detection they re-score, not
+# the time they were written, so they are kept out of the time-ranged segments
+REANALYSIS_LOG_FILE = "data/events-reanalysis.jsonl"
+MANIFEST_FILE = "manifest.json"
+# Sorts after any "YYYY-MM-DD HH:MM:SS" timestamp
+OPEN_END = "\uffff"
+
+
+def segment_dir(path=EVENT_LOG_FILE):
+    """Where sealed segments of `path` go: data/events.jsonl -> data/events/."""
+    return os.path.splitext(path)[0]
+
+
+class EventLog:
+    """Append-only log with one JSON object per line.
+
+    Entries carry an "event" field: "detection" for a cycle's result,
+    "skip" for a cycle that stopped early, "reanalysis" for a later re-score
+    of one. Reanalysis events are written to REANALYSIS_LOG_FILE; older logs
+    may still have some mixed in, which the segment ranges ignore.
+
+    Every entry is a single write of one complete line to a file opened for
+    appending, so writing costs the same however long the history is and a
+    crash can at worst leave a torn last line. That line is detected on open
+    and fenced off with a newline; readers skip it.
+
+    With `max_bytes` or `rotate_daily` set, the file is a segment: once it
+    reaches the size, or the date changes, it is sealed into segment_dir(),
+    gzipped on a background thread and recorded in the manifest with its
+    time range. Only one process should rotate a given log; tools that
+    append to it leave rotation off, and reopen the file if it was rotated
+    away from under them.
+    """
+
+    def __init__(self, path=EVENT_LOG_FILE, fsync=False, max_bytes=None, rotate_daily=False):
+        self.path = path
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.lock = threading.Lock()
+        self.manifest_lock = threading.Lock()
+        self.compressors = []
+        self.resumed = False
+        self.fd = None
+        # Time range, entry count and date of the open segment
+        self.first = self.last = None
+        self.entries = 0
+        self.day = None
+
+    @property
+    def rotates(self):
+        return bool(self.max_bytes or self.rotate_daily)
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        size = os.fstat(self.fd).st_size
+        if size:
+            with open(self.path, "rb") as f:
+                f.seek(size - 1)
+                torn = f.read(1) != b"\n"
+            if torn:
+                print(f"[EventLog] {self.path} ends in a partial line; starting a new line after it.")
+                os.write(self.fd, b"\n")
+        if self.rotates:
+            self._scan_segment()
+            if not self.resumed:
+                self.resumed = True
+                self._resume_compression()
+
+    def _scan_segment(self):
+        # One pass over the current segment, which is bounded by the rotation size
+        self.first = self.last = None
+        self.entries = 0
+        for entry in _read_file(self.path, {"read": 0, "skipped": 0}):
+            self._track(entry)
+        self.day = self.last[:10] if self.last else datetime.now().strftime("%Y-%m-%d")
+
+    def _track(self, entry):
+        self.entries += 1
+        timestamp = entry.get("timestamp")
+        if isinstance(timestamp, str) and _in_order(entry):
+            self.first = timestamp if self.first is None else min(self.first, timestamp)
+            self.last = timestamp if self.last is None else max(self.last, timestamp)
+
+    def append(self, entry):
+        line = (json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+        with self.lock:
+            if self.fd is None:
+                self._open()
+            elif not self.rotates and self._moved():
+                os.close(self.fd)
+                self._open()
+            if self.rotates and self._should_rotate():
+                try:
+                    self._rotate()
+                except OSError as e:
+                    # e.g. another program has the file open on Windows; try again on the next entry
+                    print(f"[EventLog] Couldn't rotate {self.path}: {e}")
+                if self.fd is not None:
+                    os.close(self.fd)
+                self._open()
+            os.write(self.fd, line)
+            if self.fsync:
+                os.fsync(self.fd)
+            if self.rotates:
+                self._track(entry)
+
+    def _moved(self):
+        # The rotating process renamed the file: appends through our fd would land in a sealed segment
+        try:
+            return not os.path.samestat(os.stat(self.path), os.fstat(self.fd))
+        except FileNotFoundError:
+            return True
+
+    def _should_rotate(self):
+        if not self.entries:
+            return False
+        if self.rotate_daily and datetime.now().strftime("%Y-%m-%d") != self.day:
+            return True
+        return bool(self.max_bytes) and os.fstat(self.fd).st_size >= self.max_bytes
+
+    def _rotate(self):
+        """Seal the current segment; called with the lock held."""
+        os.close(self.fd)
+        self.fd = None
+        name = seal_segment(self.path, self.path, self.first, self.last, self.entries, self.manifest_lock)
+        print(f"[EventLog] Sealed {self.entries} entries into {os.path.join(segment_dir(self.path), name)}.")
+        self._compress_later(name)
+
+    def _compress_later(self, name):
+        self.compressors = [t for t in self.compressors if t.is_alive()]
+        thread = threading.Thread(target=compress_segment, args=(self.path, name, self.manifest_lock),
+                                  name="VibeSyncLogCompress", daemon=True)
+        self.compressors.append(thread)
+        thread.start()
+
+    def _resume_compression(self):
+        # Segments sealed before a crash or shutdown that were never gzipped
+        for segment in load_manifest(self.path):
+            if not segment["file"].endswith(".gz"):
+                self._compress_later(segment["file"])
+
+    def close(self, timeout=10.0):
+        with self.lock:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+        for thread in self.compressors:
+            thread.join(timeout)
+
+
+# --- Manifest ---
+def load_manifest(path=EVENT_LOG_FILE):
+    """Sealed segments of `path`, as recorded in the manifest.
+
+    If the manifest is missing or unreadable, whatever segment files exist
+    are listed with an unknown time range, so they are always read.
+    """
+    directory = segment_dir(path)
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            return json.load(f)["segments"]
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"[EventLog] Manifest unreadable ({e}); reading every segment.")
+    files = {os.path.basename(p)[:-3] if p.endswith(".gz") else os.path.basename(p)
+             for p in glob.glob(os.path.join(directory, "events-*.jsonl*")) if not p.endswith(".tmp")}
+    return [{"file": name, "first": None, "last": None} for name in sorted(files)]
+
+
+def seal_segment(path, source, first, last, entries, lock=None):
+    """Move `source` into the segments of `path` and record it in the manifest.
+
+    Returns the segment's file name, events-<first timestamp>.jsonl.
+    """
+    directory = segment_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    stamp = (first or datetime.now().strftime("%Y-%m-%d %H:%M:%S")).replace(" ", "_").replace(":", "-")
+    name = f"events-{stamp}.jsonl"
+    suffix = 1
+    while glob.glob(os.path.join(directory, name + "*")):
+        name = f"events-{stamp}-{suffix}.jsonl"
+        suffix += 1
+    sealed = os.path.join(directory, name)
+    with lock or threading.Lock():
+        # Loaded before the rename so a first-time scan of the folder can't list it twice
+        manifest = load_manifest(path)
+        os.replace(source, sealed)
+        manifest.append({"file": name, "first": first, "last": last, "entries": entries,
+                         "bytes": os.path.getsize(sealed)})
+        _write_manifest(path, manifest)
+    return name
+
+
+def compress_segment(path, name, lock=None):
+    """Gzip a sealed segment and point the manifest at the .gz."""
+    source = os.path.join(segment_dir(path), name)
+    target = source + ".gz"
+    try:
+        # A crash after the rename but before the manifest update leaves only the .gz
+        if os.path.exists(source) or not os.path.exists(target):
+            with open(source, "rb") as f, gzip.open(target + ".tmp", "wb") as out:
+                shutil.copyfileobj(f, out)
+            os.replace(target + ".tmp", target)
+        with lock or threading.Lock():
+            manifest = load_manifest(path)
+            for segment in manifest:
+                if segment["file"] == name:
+                    segment["file"] = name + ".gz"
+            _write_manifest(path, manifest)
+        # Readers that loaded the old manifest fall back to the .gz name
+        if os.path.exists(source):
+            os.remove(source)
+    except OSError as e:
+        print(f"[EventLog] Couldn't compress {source}: {e}")
+
+
+def _write_manifest(path, segments):
+    manifest_path = os.path.join(segment_dir(path), MANIFEST_FILE)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump({"segments": segments}, f, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+# --- Reading ---
+def _read_file(path, stats):
+    """Yield the entries of one segment, plain or gzipped."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                stats["skipped"] += 1  # torn tail of an interrupted write
+                continue
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                stats["skipped"] += 1
+                continue
+            stats["read"] += 1
+            yield entry
+
+
+def _in_order(entry):
+    """Whether the entry's timestamp is when it was appended (not true of reanalysis events)."""
+    return entry.get("event", "detection") != "reanalysis"
+
+
+def _read_segment(path, stats, start, end):
+    """Yield (sort key, entry); the key is the last in-order timestamp, so it never goes backwards."""
+    if not os.path.exists(path):
+        # Compressed since the manifest was loaded
+        if os.path.exists(path + ".gz"):
+            path += ".gz"
+        else:
+            stats["missing"] += 1
+            return
+    key = ""
+    for entry in _read_file(path, stats):
+        timestamp = _timestamp(entry)
+        if _in_order(entry):
+            key = max(key, timestamp)
+        if (start is None or timestamp >= start) and (end is None or timestamp < end):
+            yield key, entry
+
+
+def _timestamp(entry):
+    return entry.get("timestamp") or ""
+
+
+def _first_timestamp(path):
+    return next((_timestamp(e) for e in _read_file(path, {"read": 0, "skipped": 0}) if _in_order(e)), "")
+
+
+def read_events(path=EVENT_LOG_FILE, stats=None, start=None, end=None):
+    """Yield the entries of an event log, sealed segments included.
+
+    `start` (inclusive) and `end` (exclusive) limit the output to a time
+    window; only segments whose manifest range overlaps it are opened.
+    Segments come out in time order. Where their ranges overlap (after a
+    clock change, say) they are merged by timestamp, so only overlapping
+    segments are ever open at once. Within one segment entries keep the
+    order they were appended in; reanalysis events mixed into older
+    segments stay where they were appended.
+
+    Lines that are cut short or aren't valid JSON are skipped; pass a dict as
+    `stats` to get the number of entries read and lines skipped.
+    """
+    if stats is None:
+        stats = {}
+    for key in ("read", "skipped", "missing"):
+        stats.setdefault(key, 0)
+    directory = segment_dir(path)
+    segments = [(s.get("first") or "", s.get("last") or OPEN_END, os.path.join(directory, s["file"]))
+                for s in load_manifest(path)]
+    if os.path.exists(path):
+        # The open segment's range isn't recorded yet; its first in-order line stands in for the start
+        segments.append((_first_timestamp(path), OPEN_END, path))
+    segments = sorted(s for s in segments
+                      if (start is None or s[1] >= start) and (end is None or s[0] < end))
+
+    groups = []
+    for first, last, segment in segments:
+        if groups and first <= groups[-1][0]:
+            groups[-1][0] = max(groups[-1][0], last)
+            groups[-1][1].append(segment)
+        else:
+            groups.append([last, [segment]])
+    for _, group in groups:
+        streams = [_read_segment(p, stats, start, end) for p in group]
+        merged = streams[0] if len(streams) == 1 else heapq.merge(*streams, key=lambda item: item[0])
+        for _, entry in merged:
+            yield entry
+
+
+_event_log = None
+_event_log_lock = threading.Lock()
+
+
+def get_event_log():
+    global _event_log
+    with _event_log_lock:
+        if _event_log is None:
+            segment_mb = float(get_setting("event_log_segment_mb", 8))
+            _event_log = EventLog(
+                fsync=bool(get_setting("event_log_fsync", False)),
+                max_bytes=int(segment_mb * 1024 * 1024) or None,
+                rotate_daily=bool(get_setting("event_log_rotate_daily", True)),
+            )
+        return _event_log
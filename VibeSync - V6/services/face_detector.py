@@ -0,0 +1,58 @@
+import threading
+import cv2
+
+CASCADE_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+# The cascade runs on a copy no wider than this; boxes are scaled back up
+DETECTION_WIDTH = 320
+# Smallest face (in downscaled pixels) worth reporting, roughly arm's length
+MIN_FACE_SIZE = (30, 30)
+# Size of the face crop handed to the emotion model
+FACE_SIZE = (224, 224)
+# Extra context kept around the Haar box, as a fraction of its size
+FACE_MARGIN = 0.15
+
+_cascade = None
+_cascade_lock = threading.Lock()
+
+
+def get_cascade():
+    global _cascade
+    with _cascade_lock:
+        if _cascade is None:
+            _cascade = cv2.CascadeClassifier(CASCADE_PATH)
+        return _cascade
+
+
+def detect_faces(frame):
+    """Return face boxes as (x, y, w, h) in full-resolution frame coordinates."""
+    if frame is None:
+        return []
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    height, width = gray.shape[:2]
+    scale = min(1.0, DETECTION_WIDTH / float(width))
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    faces = get_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=MIN_FACE_SIZE)
+    return [
+        (int(x / scale), int(y / scale), int(w / scale), int(h / scale))
+        for (x, y, w, h) in faces
+    ]
+
+
+def largest_face(faces):
+    if not faces:
+        return None
+    return max(faces, key=lambda box: box[2] * box[3])
+
+
+def crop_face(frame, box, margin=FACE_MARGIN, size=FACE_SIZE):
+    """Cut the face out of `frame` with a small margin and resize it to `size`."""
+    x, y, w, h = box
+    pad_x, pad_y = int(w * margin), int(h * margin)
+    height, width = frame.shape[:2]
+    left, top = max(x - pad_x, 0), max(y - pad_y, 0)
+    right, bottom = min(x + w + pad_x, width), min(y + h + pad_y, height)
+    face = frame[top:bottom, left:right]
+    return cv2.resize(face, size, interpolation=cv2.INTER_AREA)
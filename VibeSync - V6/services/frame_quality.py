@@ -0,0 +1,90 @@
+import logging
+from collections import Counter
+import numpy as np
+
+# Mean grey level outside this range gets normalized...
+MIN_BRIGHTNESS = 60
+MAX_BRIGHTNESS = 190
+# ...unless it is this far out, at which point there is nothing left to recover
+HOPELESS_DARK = 20
+HOPELESS_BRIGHT = 240
+# Standard deviation of grey levels; a flat image is usually a covered lens
+MIN_CONTRAST = 8
+LOW_CONTRAST = 30
+# Variance of the Laplacian; below this the image is too blurred to read
+MIN_SHARPNESS = 20
+
+TARGET_BRIGHTNESS = 120
+TARGET_CONTRAST = 50
+
+# How often each verdict was reached since start-up
+verdict_counts = Counter()
+
+
+def _gray(image):
+    if image.ndim == 2:
+        return image.astype(np.float32)
+    # Same weights as cv2.COLOR_BGR2GRAY
+    return image[..., :3].astype(np.float32) @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+def measure(image):
+    """Brightness, contrast and Laplacian sharpness of an image, in plain NumPy."""
+    # Every other pixel is plenty for global statistics and 4x cheaper
+    gray = _gray(image[::2, ::2])
+    laplacian = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+        - 4 * gray[1:-1, 1:-1]
+    )
+    return {
+        "brightness": float(gray.mean()),
+        "contrast": float(gray.std()),
+        "sharpness": float(laplacian.var()),
+    }
+
+
+def normalize_exposure(image, metrics):
+    """Linearly stretch grey levels towards the target brightness and contrast."""
+    gain = TARGET_CONTRAST / max(metrics["contrast"], 1.0)
+    gain = min(gain, 4.0)
+    stretched = (image.astype(np.float32) - metrics["brightness"]) * gain + TARGET_BRIGHTNESS
+    return np.clip(stretched, 0, 255).astype(np.uint8)
+
+
+def check_quality(image):
+    """Decide whether `image` is worth running the emotion model on.
+
+    Returns (verdict, image). The verdict is "ok", "normalized" or a
+    "rejected: ..." reason; for "normalized" the returned image has had its
+    exposure corrected, otherwise it is the input unchanged.
+    """
+    metrics = measure(image)
+    brightness, contrast, sharpness = metrics["brightness"], metrics["contrast"], metrics["sharpness"]
+
+    if brightness < HOPELESS_DARK:
+        verdict = "rejected: too dark"
+    elif brightness > HOPELESS_BRIGHT:
+        verdict = "rejected: overexposed"
+    elif contrast < MIN_CONTRAST:
+        verdict = "rejected: occluded"
+    else:
+        verdict = "ok"
+        if not MIN_BRIGHTNESS <= brightness <= MAX_BRIGHTNESS or contrast < LOW_CONTRAST:
+            verdict = "normalized"
+            image = normalize_exposure(image, metrics)
+            # Laplacian variance grows with contrast, so judge blur after the stretch
+            sharpness = measure(image)["sharpness"]
+        if sharpness < MIN_SHARPNESS:
+            verdict = "rejected: blurry"
+
+    verdict_counts[verdict] += 1
+    logging.info(
+        f"[Quality] {verdict} (brightness {brightness:.0f}, contrast {contrast:.0f}, sharpness {sharpness:.0f})"
+    )
+    return verdict, image
+
+
+def summary():
+    total = sum(verdict_counts.values())
+    rejected = sum(count for verdict, count in verdict_counts.items() if verdict.startswith("rejected"))
+    return f"{rejected}/{total} frames rejected before inference ({dict(verdict_counts)})"
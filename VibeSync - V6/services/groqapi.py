@@ -8,6 +8,8 @@ load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
 QUOTE_LOG_FILE = "data/last_quote.json"
+# (connect, read) seconds; a hung request must not stall the detection cycle
+GROQ_TIMEOUT = (3, 8)
 
 HEADERS = {
     "Authorization": f"Bearer {GROQ_API_KEY}",
@@ -71,7 +73,7 @@ def fetch_motivational_quote(user_state):
 
     try:
         print("[GroqAPI] Sending request with state:", json.dumps(user_state, indent=2))
-        response = requests.post(GROQ_URL, headers=HEADERS, json=data)
+        response = requests.post(GROQ_URL, headers=HEADERS, json=data, timeout=GROQ_TIMEOUT)
         if response.status_code == 200:
             content = response.json()['choices'][0]['message']['content'].strip()
             if is_quote_recent(content):
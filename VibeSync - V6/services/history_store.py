@@ -0,0 +1,411 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from services.emotion_backends import EMOTION_LABELS
+
+HISTORY_DB = "data/history.db"
+# A batch hitting a database error (e.g. "database is locked") is tried this often, this far apart
+WRITE_ATTEMPTS = 3
+RETRY_SECONDS = 2.0
+# "timeout" is a static quote used because Groq didn't answer within the stage limit;
+# "error" is one used because the quote stage raised
+QUOTE_SOURCES = ("ai", "static", "timeout", "error")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL UNIQUE,
+    emotion TEXT NOT NULL,
+    confidence REAL,
+    typing_speed REAL,
+    mouse_speed REAL,
+    active_window TEXT,
+    quote TEXT,
+    {", ".join(f"score_{label} REAL" for label in EMOTION_LABELS)},
+    quote_source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_detections_emotion ON detections (emotion, timestamp);
+CREATE INDEX IF NOT EXISTS idx_detections_window ON detections (active_window, timestamp);
+
+CREATE TABLE IF NOT EXISTS skips (
+    timestamp TEXT PRIMARY KEY,
+    reason TEXT
+) WITHOUT ROWID;
+
+-- Per-hour and per-day totals, kept up to date as rows are inserted
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    detections INTEGER NOT NULL DEFAULT 0,
+    skips INTEGER NOT NULL DEFAULT 0,
+    {", ".join(f"count_{label} INTEGER NOT NULL DEFAULT 0" for label in EMOTION_LABELS)},
+    activity_samples INTEGER NOT NULL DEFAULT 0,
+    typing_sum REAL NOT NULL DEFAULT 0,
+    typing_max REAL NOT NULL DEFAULT 0,
+    mouse_sum REAL NOT NULL DEFAULT 0,
+    mouse_max REAL NOT NULL DEFAULT 0,
+    {", ".join(f"quotes_{source} INTEGER NOT NULL DEFAULT 0" for source in QUOTE_SOURCES)},
+    PRIMARY KEY (period, bucket)
+) WITHOUT ROWID;
+"""
+
+COLUMNS = (["timestamp", "emotion", "confidence", "typing_speed", "mouse_speed", "active_window", "quote"]
+           + [f"score_{label}" for label in EMOTION_LABELS] + ["quote_source"])
+
+# Columns added after the first release, with their types, for older databases
+ADDED_COLUMNS = {
+    "detections": {"quote_source": "TEXT"},
+    "rollups": {"quotes_error": "INTEGER NOT NULL DEFAULT 0"},
+}
+
+# Bucket key length in a "YYYY-MM-DD HH:MM:SS" timestamp
+PERIODS = {"hour": 13, "day": 10}
+
+# Summed when rollup deltas are merged; the *_max columns are merged with max()
+ROLLUP_SUMS = (["detections", "skips"] + [f"count_{label}" for label in EMOTION_LABELS]
+               + ["activity_samples", "typing_sum", "mouse_sum"] + [f"quotes_{source}" for source in QUOTE_SOURCES])
+ROLLUP_MAXES = ["typing_max", "mouse_max"]
+
+# What aggregate() can group by, and the SQL for each
+GROUPINGS = {
+    "emotion": "emotion",
+    "active_window": "active_window",
+    "hour": "substr(timestamp, 1, 13)",
+    "day": "substr(timestamp, 1, 10)",
+    "hour_of_day": "substr(timestamp, 12, 2)",
+}
+
+
+def row_from_entry(entry):
+    """Flatten a detection event into a row in COLUMNS order."""
+    activity = entry.get("activity") or {}
+    scores = entry.get("scores") or {}
+    return tuple(
+        [
+            entry["timestamp"],
+            entry["emotion"],
+            entry.get("confidence"),
+            activity.get("typing_speed"),
+            activity.get("mouse_speed"),
+            activity.get("active_window"),
+            entry.get("quote"),
+        ]
+        + [scores.get(label) for label in EMOTION_LABELS]
+        + [entry.get("quote_source")]
+    )
+
+
+def _add_to_rollups(deltas, timestamp, emotion=None, typing=None, mouse=None, quote_source=None, skip=False):
+    """Fold one detection (or skip) into per-bucket deltas."""
+    for period, length in PERIODS.items():
+        delta = deltas.get((period, timestamp[:length]))
+        if delta is None:
+            delta = deltas[(period, timestamp[:length])] = dict.fromkeys(ROLLUP_SUMS + ROLLUP_MAXES, 0)
+        if skip:
+            delta["skips"] += 1
+            continue
+        delta["detections"] += 1
+        if emotion in EMOTION_LABELS:
+            delta[f"count_{emotion}"] += 1
+        if typing is not None or mouse is not None:
+            delta["activity_samples"] += 1
+            delta["typing_sum"] += typing or 0
+            delta["mouse_sum"] += mouse or 0
+            delta["typing_max"] = max(delta["typing_max"], typing or 0)
+            delta["mouse_max"] = max(delta["mouse_max"], mouse or 0)
+        if quote_source in QUOTE_SOURCES:
+            delta[f"quotes_{quote_source}"] += 1
+
+
+def _apply_rollups(db, deltas):
+    columns = ROLLUP_SUMS + ROLLUP_MAXES
+    updates = [f"{c} = {c} + excluded.{c}" for c in ROLLUP_SUMS] + [f"{c} = max({c}, excluded.{c})" for c in ROLLUP_MAXES]
+    db.executemany(
+        f"""INSERT INTO rollups (period, bucket, {', '.join(columns)})
+            VALUES (?, ?, {', '.join('?' * len(columns))})
+            ON CONFLICT (period, bucket) DO UPDATE SET {', '.join(updates)}""",
+        [(period, bucket, *(delta[c] for c in columns)) for (period, bucket), delta in deltas.items()],
+    )
+
+
+def _where(start=None, end=None, emotion=None, active_window=None):
+    """WHERE clause for a time range (start inclusive, end exclusive) and filters."""
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(str(start))
+    if end is not None:
+        clauses.append("timestamp < ?")
+        params.append(str(end))
+    if emotion is not None:
+        clauses.append("emotion = ?")
+        params.append(emotion)
+    if active_window is not None:
+        clauses.append("active_window = ?")
+        params.append(active_window)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class HistoryStore:
+    """Detection history in SQLite, queried by time range, emotion and window.
+
+    Timestamps are stored as "YYYY-MM-DD HH:MM:SS" text, which sorts in time
+    order, so range queries use the unique index on it. The database runs in
+    WAL mode: readers (dashboard, exporters) never wait for the writer.
+    Each thread gets its own connection.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self.local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connection() as db:
+            db.executescript(SCHEMA)
+            for table, columns in ADDED_COLUMNS.items():
+                existing = {row["name"] for row in db.execute(f"PRAGMA table_info({table})")}
+                for column, kind in columns.items():
+                    if column not in existing:
+                        db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+            # Databases from before rollups existed: fill them in once
+            if (db.execute("SELECT 1 FROM detections LIMIT 1").fetchone()
+                    and not db.execute("SELECT 1 FROM rollups LIMIT 1").fetchone()):
+                print(f"[History] Building hourly and daily rollups for {path}...")
+                self.rebuild_rollups()
+
+    def connection(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            # Safe with WAL: a power cut can lose the last commits, never corrupt the file
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    def insert_many(self, entries):
+        """Insert detection and skip events in one transaction and roll them up.
+
+        Entries already stored (same timestamp) are ignored and not counted
+        again. Returns how many were new.
+        """
+        insert = f"INSERT OR IGNORE INTO detections ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        deltas, added = {}, 0
+        with self.connection() as db:
+            for entry in entries:
+                kind = entry.get("event", "detection")
+                if kind == "detection":
+                    if not db.execute(insert, row_from_entry(entry)).rowcount:
+                        continue
+                    activity = entry.get("activity") or {}
+                    _add_to_rollups(deltas, entry["timestamp"], entry["emotion"], activity.get("typing_speed"),
+                                    activity.get("mouse_speed"), entry.get("quote_source"))
+                elif kind == "skip":
+                    if not db.execute("INSERT OR IGNORE INTO skips (timestamp, reason) VALUES (?, ?)",
+                                      (entry["timestamp"], entry.get("reason"))).rowcount:
+                        continue
+                    _add_to_rollups(deltas, entry["timestamp"], skip=True)
+                else:
+                    continue
+                added += 1
+            _apply_rollups(db, deltas)
+        return added
+
+    def rebuild_rollups(self):
+        """Recompute every rollup from the stored detections and skips."""
+        deltas = {}
+        with self.connection() as db:
+            rows = db.execute("SELECT timestamp, emotion, typing_speed, mouse_speed, quote_source FROM detections")
+            for row in rows:
+                _add_to_rollups(deltas, *row)
+            for row in db.execute("SELECT timestamp FROM skips"):
+                _add_to_rollups(deltas, row[0], skip=True)
+            db.execute("DELETE FROM rollups")
+            _apply_rollups(db, deltas)
+        return len(deltas)
+
+    def rollup_summary(self, period="day", start=None, end=None):
+        """Rollup rows for [start, end), oldest first; costs one row per bucket.
+
+        `start` and `end` compare against bucket keys ("YYYY-MM-DD" or
+        "YYYY-MM-DD HH"). Each row gets the dominant emotion and mean speeds.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Period must be one of {', '.join(PERIODS)}")
+        clauses, params = ["period = ?"], [period]
+        if start is not None:
+            clauses.append("bucket >= ?")
+            params.append(str(start)[:PERIODS[period]])
+        if end is not None:
+            clauses.append("bucket < ?")
+            params.append(str(end)[:PERIODS[period]])
+        rows = []
+        for row in self.connection().execute(
+                f"SELECT * FROM rollups WHERE {' AND '.join(clauses)} ORDER BY bucket", params):
+            row = dict(row)
+            counts = {label: row[f"count_{label}"] for label in EMOTION_LABELS}
+            row["dominant_emotion"] = max(counts, key=counts.get) if row["detections"] else None
+            samples = row["activity_samples"] or 1
+            row["typing_mean"] = round(row["typing_sum"] / samples, 2)
+            row["mouse_mean"] = round(row["mouse_sum"] / samples, 2)
+            rows.append(row)
+        return rows
+
+    def import_events(self, events, batch_size=500):
+        """Insert a stream of events in batches; returns (events seen, inserted)."""
+        seen = inserted = 0
+        batch = []
+        for entry in events:
+            if entry.get("event", "detection") not in ("detection", "skip"):
+                continue
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                seen, inserted = seen + len(batch), inserted + self.insert_many(batch)
+                batch = []
+        if batch:
+            seen, inserted = seen + len(batch), inserted + self.insert_many(batch)
+        return seen, inserted
+
+    def query(self, start=None, end=None, emotion=None, active_window=None,
+              limit=100, offset=0, newest_first=False):
+        """Detections in [start, end) matching the filters, one page at a time."""
+        where, params = _where(start, end, emotion, active_window)
+        order = "DESC" if newest_first else "ASC"
+        rows = self.connection().execute(
+            f"SELECT * FROM detections{where} ORDER BY timestamp {order} LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return [dict(row) for row in rows]
+
+    def count(self, start=None, end=None, emotion=None, active_window=None):
+        where, params = _where(start, end, emotion, active_window)
+        return self.connection().execute(f"SELECT COUNT(*) FROM detections{where}", params).fetchone()[0]
+
+    def aggregate(self, by="emotion", start=None, end=None, emotion=None, active_window=None):
+        """Counts and averages grouped by one of GROUPINGS."""
+        if by not in GROUPINGS:
+            raise ValueError(f"Can't group by '{by}'; choose from {', '.join(GROUPINGS)}")
+        where, params = _where(start, end, emotion, active_window)
+        rows = self.connection().execute(
+            f"""SELECT {GROUPINGS[by]} AS {by}, COUNT(*) AS count, AVG(confidence) AS avg_confidence,
+                       AVG(typing_speed) AS avg_typing_speed, AVG(mouse_speed) AS avg_mouse_speed
+                FROM detections{where} GROUP BY 1 ORDER BY 1""",
+            params,
+        )
+        return [dict(row) for row in rows]
+
+    def existing_timestamps(self, timestamps):
+        """The subset of `timestamps` that already has a detection row."""
+        timestamps = list(timestamps)
+        found = set()
+        # Chunked to stay under SQLite's limit on bound parameters
+        for i in range(0, len(timestamps), 500):
+            chunk = timestamps[i:i + 500]
+            rows = self.connection().execute(
+                f"SELECT timestamp FROM detections WHERE timestamp IN ({', '.join('?' * len(chunk))})", chunk)
+            found.update(row[0] for row in rows)
+        return found
+
+    def latest(self):
+        rows = self.query(limit=1, newest_first=True)
+        return rows[0] if rows else None
+
+
+class HistoryWriter:
+    """Batches detection and skip events into the store from its own thread.
+
+    `submit` only puts the entry on a queue, so logging never waits on disk.
+    The thread writes whatever has piled up in one transaction, up to
+    `batch_size` rows at a time.
+    """
+
+    def __init__(self, path=HISTORY_DB, batch_size=50, max_pending=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.store = None
+        self.written = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="VibeSyncHistory", daemon=True)
+        self.thread.start()
+
+    def submit(self, entry):
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            # The event log still has it; the store can be rebuilt from there
+            self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """Wait until everything submitted so far is written, or the timeout passes."""
+        done = threading.Event()
+        deadline = time.monotonic() + timeout
+        try:
+            # Unlike entries, the marker waits for room; dropping it would only make flush wait for nothing
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(max(0.0, deadline - time.monotonic()))
+
+    def _run(self):
+        try:
+            self.store = HistoryStore(self.path)
+        except Exception as e:
+            print(f"[History Error] Can't open {self.path}: {e}")
+            return
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            entries = [item for item in batch if isinstance(item, dict)]
+            if entries:
+                self._write(entries)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+
+    def _write(self, entries):
+        # Nothing raised here may end the thread; later entries still need writing
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                self.written += self.store.insert_many(entries)
+                return
+            except sqlite3.Error as e:
+                if attempt == WRITE_ATTEMPTS:
+                    # The event log still has them; the store can be rebuilt from there
+                    self.dropped += len(entries)
+                    print(f"[History Error] {e}; dropped a batch of {len(entries)} after {attempt} attempts.")
+                    return
+                print(f"[History Error] {e}; retrying in {RETRY_SECONDS:.0f}s.")
+                time.sleep(RETRY_SECONDS)
+            except Exception as e:
+                print(f"[History Error] Batch of {len(entries)} failed ({type(e).__name__}: {e}); "
+                      f"writing one at a time.")
+                break
+        # The batch was rolled back; write the rest around the bad entry
+        for entry in entries:
+            try:
+                self.written += self.store.insert_many([entry])
+            except Exception as e:
+                self.dropped += 1
+                print(f"[History Error] Dropped entry {entry.get('timestamp')!r}: {type(e).__name__}: {e}")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_history_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = HistoryWriter()
+        return _writer
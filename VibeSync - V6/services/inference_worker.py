@@ -0,0 +1,219 @@
+import multiprocessing as mp
+import os
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+
+# How long to wait for an answer before the worker is considered hung
+PING_TIMEOUT = 5
+ANALYZE_TIMEOUT = 120
+
+
+def _attach(name):
+    """Open an existing shared memory block without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always tracks; the spawned worker shares the parent's
+        # resource tracker, so the block is still only unlinked once.
+        return shared_memory.SharedMemory(name=name)
+
+
+class WorkerClosed(RuntimeError):
+    """A request arrived after shutdown() and before the next start()."""
+
+
+# --- Worker process ---
+def _worker_main(conn):
+    # TensorFlow and DeepFace are only ever imported here, never in the UI process
+    from services.emotion_model import EmotionModelManager
+
+    manager = EmotionModelManager()
+    shm = None
+    while True:
+        try:
+            command, payload = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+
+        try:
+            if command == "ping":
+                conn.send(("ok", {"pid": os.getpid(), "loaded": manager.loaded}))
+            elif command in ("analyze", "predict_batch"):
+                if shm is None or shm.name != payload["shm"]:
+                    if shm is not None:
+                        shm.close()
+                    shm = _attach(payload["shm"])
+                array = np.ndarray(payload["shape"], dtype=payload["dtype"], buffer=shm.buf)
+                if command == "analyze":
+                    result = manager.analyze(array, **payload.get("kwargs", {}))
+                else:
+                    result = manager.predict_batch(list(array))
+                conn.send(("ok", result))
+            elif command == "warm_up":
+                manager.warm_up_async()
+                conn.send(("ok", None))
+            elif command == "plan_for":
+                manager.plan_for(payload)
+                conn.send(("ok", None))
+            elif command == "stop":
+                manager.shutdown()
+                conn.send(("ok", None))
+                break
+            else:
+                conn.send(("error", f"Unknown command: {command}"))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+    if shm is not None:
+        shm.close()
+    conn.close()
+
+
+# --- Client used by the UI process ---
+class InferenceWorker:
+    """Runs emotion inference in a long-lived child process.
+
+    Frames travel through a shared memory block owned by this client; only
+    the small command and result tuples go over the pipe. A dead or hung
+    worker is restarted and the request retried once. After shutdown(),
+    requests are refused until start() is called again, so a late warm-up
+    can't bring back a worker nobody will stop.
+    """
+
+    def __init__(self):
+        self.context = mp.get_context("spawn")
+        self.process = None
+        self.conn = None
+        self.shm = None
+        self.lock = threading.RLock()
+        self.closed = False
+
+    def start(self):
+        """Start the worker, or allow it to start again after shutdown()."""
+        with self.lock:
+            self.closed = False
+            self._spawn()
+
+    def _spawn(self):
+        with self.lock:
+            if self.closed:
+                raise WorkerClosed("The inference worker has been shut down")
+            if self.process is not None and self.process.is_alive():
+                return
+            parent_conn, child_conn = self.context.Pipe()
+            self.process = self.context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+            self.process.start()
+            child_conn.close()
+            self.conn = parent_conn
+            print(f"[InferenceWorker] Started worker pid {self.process.pid}")
+
+    def restart(self):
+        with self.lock:
+            print("[InferenceWorker] Restarting worker...")
+            self._kill()
+            self._spawn()
+
+    def _kill(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.process is not None:
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process.join(timeout=5)
+            self.process = None
+
+    def _call(self, command, payload=None, timeout=PING_TIMEOUT):
+        self._spawn()
+        self.conn.send((command, payload))
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Worker did not answer '{command}' within {timeout}s")
+        status, result = self.conn.recv()
+        if status == "error":
+            raise RuntimeError(result)
+        return result
+
+    def request(self, command, payload=None, timeout=PING_TIMEOUT):
+        """Send a command, restarting the worker once if it crashed or hung."""
+        with self.lock:
+            try:
+                return self._call(command, payload, timeout)
+            except (EOFError, OSError, TimeoutError) as e:
+                print(f"[InferenceWorker] Worker unavailable ({e}).")
+                self.restart()
+                return self._call(command, payload, timeout)
+
+    def check_health(self):
+        try:
+            with self.lock:
+                self._call("ping")
+            return True
+        except WorkerClosed:
+            return False
+        except Exception as e:
+            print(f"[InferenceWorker] Health check failed: {e}")
+            self.restart()
+            return False
+
+    def _frame_buffer(self, nbytes):
+        if self.shm is None or self.shm.size < nbytes:
+            if self.shm is not None:
+                self.shm.close()
+                self.shm.unlink()
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        return self.shm
+
+    def _send_array(self, command, array, **extra):
+        array = np.ascontiguousarray(array)
+        with self.lock:
+            shm = self._frame_buffer(array.nbytes)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+            payload = {"shm": shm.name, "shape": array.shape, "dtype": array.dtype.str, **extra}
+            return self.request(command, payload, timeout=ANALYZE_TIMEOUT)
+
+    # Same interface as EmotionModelManager, so callers don't care where it runs
+    def analyze(self, frame, **kwargs):
+        return self._send_array("analyze", frame, kwargs=kwargs)
+
+    def predict_batch(self, faces):
+        # Crops share one size, so the whole burst goes over as a single array
+        return self._send_array("predict_batch", np.stack(faces))
+
+    def warm_up_async(self):
+        threading.Thread(target=self._safe_request, args=("warm_up",), daemon=True).start()
+
+    def plan_for(self, next_trigger_time):
+        self._safe_request("plan_for", next_trigger_time)
+
+    def _safe_request(self, command, payload=None):
+        try:
+            self.request(command, payload)
+        except WorkerClosed:
+            print(f"[InferenceWorker] '{command}' ignored; the worker has been shut down.")
+        except Exception as e:
+            print(f"[InferenceWorker Error] '{command}' failed: {e}")
+
+    def shutdown(self):
+        with self.lock:
+            self.closed = True
+            if self.process is not None and self.process.is_alive():
+                try:
+                    self._call("stop", timeout=PING_TIMEOUT)
+                except Exception as e:
+                    print(f"[InferenceWorker] Stop failed: {e}")
+            self._kill()
+            if self.shm is not None:
+                self.shm.close()
+                self.shm.unlink()
+                self.shm = None
+            print("[InferenceWorker] Worker stopped.")
+
+
+_worker = None
+
+def get_inference_worker():
+    global _worker
+    if _worker is None:
+        _worker = InferenceWorker()
+    return _worker
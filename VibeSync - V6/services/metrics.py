@@ -0,0 +1,260 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from services.app_settings import get_setting
+
+# Upper bounds in seconds, from a fast stage up to a slow model load
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Percentiles are taken over this many recent samples per stage
+RECENT_SAMPLES = 512
+TRACE_DIR = "data/traces"
+METRICS_PORT = 9464
+
+
+class Histogram:
+    """Cumulative bucket counts for Prometheus plus a window of recent samples for percentiles."""
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def percentile(self, q):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class CycleTrace:
+    """Spans of one detection cycle, exportable as Chrome trace-event JSON.
+
+    Open the file in chrome://tracing or https://ui.perfetto.dev; each thread
+    gets its own row, so stages that ran concurrently show up side by side.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.wall_started = datetime.now()
+        self.events = []
+        self.lock = threading.Lock()
+
+    def add(self, name, start, end, outcome="ok"):
+        with self.lock:
+            self.events.append({
+                "name": name,
+                "ph": "X",
+                "ts": round((start - self.started) * 1e6),
+                "dur": round((end - start) * 1e6),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {"outcome": outcome},
+            })
+
+    def to_chrome(self):
+        with self.lock:
+            events = list(self.events)
+        names = {event["tid"]: thread.name for thread in threading.enumerate()
+                 for event in events if event["tid"] == thread.ident}
+        metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                    for tid, name in names.items()]
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"cycle_started": self.wall_started.isoformat(timespec="seconds")},
+        }
+
+
+class Metrics:
+    """Stage latency histograms, event counters and per-cycle traces."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = Counter()
+        self.trace = None
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, name, trace=None):
+        """Time the block into `name`'s histogram and the current (or given) cycle's trace."""
+        trace = trace or self.trace
+        started = time.monotonic()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            ended = time.monotonic()
+            self.observe(name, ended - started)
+            if trace is not None:
+                trace.add(name, started, ended, outcome)
+
+    def begin_cycle(self):
+        self.trace = CycleTrace()
+        return self.trace
+
+    def end_cycle(self, trace, pending=()):
+        """Record the cycle's total time and write its trace file, if enabled.
+
+        The file is written once the `pending` futures (sinks the cycle
+        didn't wait for) are done, so their spans are in it; the caller
+        doesn't wait for them.
+        """
+        ended = time.monotonic()
+        self.observe("cycle", ended - trace.started)
+        trace.add("cycle", trace.started, ended)
+        if self.trace is trace:
+            self.trace = None
+        if not get_setting("trace_cycles", True):
+            return
+        pending = list(pending)
+        if not pending:
+            self._write_trace(trace)
+            return
+        remaining = [len(pending)]
+        lock = threading.Lock()
+
+        def _done(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self._write_trace(trace)
+
+        for future in pending:
+            future.add_done_callback(_done)
+
+    def _write_trace(self, trace):
+        try:
+            write_trace(trace, int(get_setting("trace_keep", 20)))
+        except OSError as e:
+            print(f"[Metrics] Couldn't write trace: {e}")
+
+    def summary(self):
+        """{stage: {count, p50, p95, p99}} in milliseconds, for logs and the dashboard."""
+        with self.lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "p50_ms": round(h.percentile(0.50) * 1000, 1),
+                    "p95_ms": round(h.percentile(0.95) * 1000, 1),
+                    "p99_ms": round(h.percentile(0.99) * 1000, 1),
+                }
+                for name, h in sorted(self.histograms.items())
+            }
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP vibesync_stage_seconds Time spent in each detection cycle stage.",
+            "# TYPE vibesync_stage_seconds histogram",
+        ]
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            for name, h in histograms:
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h.bucket_counts):
+                    cumulative += count
+                    lines.append(f'vibesync_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'vibesync_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'vibesync_stage_seconds_sum{{stage="{name}"}} {h.sum:.6f}')
+                lines.append(f'vibesync_stage_seconds_count{{stage="{name}"}} {h.count}')
+
+            lines.append(f"# HELP vibesync_stage_recent_seconds Percentiles over the last {RECENT_SAMPLES} runs of each stage.")
+            lines.append("# TYPE vibesync_stage_recent_seconds gauge")
+            for name, h in histograms:
+                for q in (0.5, 0.95, 0.99):
+                    lines.append(f'vibesync_stage_recent_seconds{{stage="{name}",quantile="{q}"}} {h.percentile(q):.6f}')
+
+            lines.append("# HELP vibesync_events_total Skips, timeouts, errors and overruns.")
+            lines.append("# TYPE vibesync_events_total counter")
+            for event, count in sorted(self.counters.items()):
+                lines.append(f'vibesync_events_total{{event="{event}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def write_trace(trace, keep=20):
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    path = os.path.join(TRACE_DIR, f"cycle-{trace.wall_started.strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(path, "w") as f:
+        json.dump(trace.to_chrome(), f)
+    for old in sorted(glob.glob(os.path.join(TRACE_DIR, "cycle-*.json")))[:-keep or None]:
+        os.remove(old)
+    return path
+
+
+# --- Prometheus endpoint ---
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would drown the console
+
+
+_server = None
+
+
+def start_metrics_server(port=None):
+    """Serve /metrics on 127.0.0.1; the `metrics_port` setting picks the port, 0 turns it off."""
+    global _server
+    if _server is not None:
+        return _server
+    port = int(get_setting("metrics_port", METRICS_PORT) if port is None else port)
+    if not port:
+        return None
+    try:
+        _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+    except OSError as e:
+        print(f"[Metrics] Can't listen on 127.0.0.1:{port}: {e}")
+        return None
+    threading.Thread(target=_server.serve_forever, name="VibeSyncMetrics", daemon=True).start()
+    print(f"[Metrics] Serving http://127.0.0.1:{port}/metrics")
+    return _server
+
+
+def stop_metrics_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
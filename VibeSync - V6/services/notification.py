@@ -1,11 +1,34 @@
-from windows_toasts import Toast, WindowsToaster
 import logging
 import textwrap
 
+try:
+    from windows_toasts import Toast, WindowsToaster
+except ImportError:
+    # Not on Windows; notifications only go to the log
+    Toast = WindowsToaster = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 
+# Set by set_notifier(); None means toasts where available, else the log
+_notifier = None
+
+def set_notifier(notifier):
+    """Route notifications through `notifier(title, message)`; None restores the default."""
+    global _notifier
+    _notifier = notifier
+
+def log_notification(title: str, message: str):
+    logging.info(f"[Notification] {title}: {message}")
+
 def show_notification(title: str, message: str):
+    if _notifier is not None:
+        return _notifier(title, message)
+    if WindowsToaster is None:
+        return log_notification(title, message)
+    return toast_notification(title, message)
+
+def toast_notification(title: str, message: str):
     try:
         # Format the message to ensure line breaks for readability
         wrapped_message = "\n".join(textwrap.wrap(message, width=50))
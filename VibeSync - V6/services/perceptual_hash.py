@@ -0,0 +1,35 @@
+import cv2
+import numpy as np
+
+
+def _thumbnail(image, size):
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def _to_int(bits):
+    return int.from_bytes(np.packbits(bits.flatten()).tobytes(), "big")
+
+
+def ahash(image):
+    """64-bit average hash: which pixels of an 8x8 thumbnail are above the mean."""
+    thumb = _thumbnail(image, (8, 8))
+    return _to_int(thumb > thumb.mean())
+
+
+def dhash(image):
+    """64-bit difference hash: horizontal gradients of a 9x8 thumbnail."""
+    thumb = _thumbnail(image, (9, 8))
+    return _to_int(thumb[:, 1:] > thumb[:, :-1])
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def find_similar(phash, candidates, max_distance):
+    """Return the first (hash, value) pair within `max_distance` bits, or None."""
+    for candidate_hash, value in candidates:
+        if hamming(phash, candidate_hash) <= max_distance:
+            return candidate_hash, value
+    return None
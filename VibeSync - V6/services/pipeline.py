@@ -0,0 +1,57 @@
+from services.cycle_budget import SkipCycle, StageFailed, StageTimeout
+
+
+class Pipeline:
+    """A detection cycle as a small dependency graph.
+
+    Stages whose dependencies are met run concurrently on the budget's
+    executor, so the cycle takes as long as its critical path rather than the
+    sum of all stages. Sink stages are started and never waited on.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.stages = {}
+
+    def stage(self, name, fn, needs=(), after=(), sink=False, fallback=None):
+        """Register a stage.
+
+        `needs` results are passed to `fn` positionally; `after` only orders.
+        `fallback(error, *needs)` supplies the result if the stage times out
+        or raises; `error` is the StageTimeout or StageFailed.
+        """
+        self.stages[name] = (fn, tuple(needs), tuple(needs) + tuple(after), sink, fallback)
+        return self
+
+    def run(self):
+        results, running, inputs = {}, {}, {}
+        waiting = dict(self.stages)
+        while waiting or running:
+            for name, (fn, needs, deps, sink, _) in list(waiting.items()):
+                if not all(dep in results for dep in deps):
+                    continue
+                del waiting[name]
+                args = [results[dep] for dep in needs]
+                if sink:
+                    self.budget.fire_and_forget(name, fn, *args)
+                    results[name] = None
+                else:
+                    inputs[name] = args
+                    running[name] = self.budget.start(name, fn, *args)
+
+            if not running:
+                if waiting:
+                    raise RuntimeError(f"Stages with unmet dependencies: {', '.join(waiting)}")
+                break
+
+            try:
+                name, value = self.budget.wait_any(running)
+            except (StageTimeout, StageFailed) as e:
+                fallback = self.stages[e.stage][4]
+                if fallback is None:
+                    raise
+                print(f"[VibeSync] {e}. Using fallback.")
+                name, value = e.stage, fallback(e, *inputs[e.stage])
+            del running[name]
+            results[name] = value
+        return results
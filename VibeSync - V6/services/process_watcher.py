@@ -0,0 +1,158 @@
+import re
+import threading
+import time
+import psutil
+from services.app_settings import get_setting
+
+# Exact process names (case-insensitive, ".exe" optional) or "re:<pattern>".
+# Chat clients that sit open all day (Slack) would turn every cycle into a
+# "video call" skip, so they are left out; add them in settings if wanted.
+DEFAULT_VIDEO_APPS = [
+    "zoom",
+    "teams",
+    "ms-teams",
+    "skype",
+    "webex",
+    "webexmta",
+    "ciscocollabhost",
+    "discord",
+    "re:^cpthost$",
+]
+# PIDs get reused; a full rebuild now and then catches a reused PID whose name changed
+FULL_RESCAN_SECONDS = 600
+
+
+def compile_app_patterns(apps):
+    """Build one regex for the whole app list so a name is matched in a single pass."""
+    exact, patterns = [], []
+    for app in apps:
+        app = str(app).strip()
+        if not app:
+            continue
+        if app.startswith("re:"):
+            re.compile(app[3:])  # fail here, naming the bad entry, rather than in the join
+            patterns.append(f"(?:{app[3:]})")
+        else:
+            exact.append(re.escape(_normalize(app)))
+    if exact:
+        patterns.append(f"^(?:{'|'.join(exact)})$")
+    if not patterns:
+        return None
+    return re.compile("|".join(patterns), re.IGNORECASE)
+
+
+def _normalize(name):
+    name = name.lower()
+    return name[:-4] if name.endswith(".exe") else name
+
+
+class ProcessWatcher:
+    """Keeps a PID -> (process name, create time) index and only inspects PIDs it hasn't seen.
+
+    Each check diffs the current PID set against the index: PIDs that are gone
+    are dropped and only new ones are looked up, so the cost tracks process
+    churn rather than the number of processes on the machine. Matched PIDs
+    are few, so their create time is checked every time; a PID reused by
+    another process between two checks is not mistaken for the call app.
+    """
+
+    def __init__(self, apps=None):
+        self.lock = threading.Lock()
+        self.index = {}
+        self.matched = {}
+        self.apps = None
+        self.matcher = None
+        self.fixed_apps = apps
+        self.last_full_scan = 0.0
+        self.checks = 0
+        self.total_seconds = 0.0
+        self.last_check_ms = 0.0
+        self.last_inspected = 0
+
+    def _load_matcher(self):
+        apps = self.fixed_apps or get_setting("video_call_apps", DEFAULT_VIDEO_APPS)
+        apps = tuple(apps)
+        if apps != self.apps:
+            try:
+                self.matcher = compile_app_patterns(apps)
+            except re.error as e:
+                print(f"[Error] Invalid video_call_apps entry: {e}. Using defaults.")
+                self.matcher = compile_app_patterns(DEFAULT_VIDEO_APPS)
+            self.apps = apps
+            # Names already indexed have to be re-matched against the new list
+            self.matched = {pid: entry for pid, entry in self.index.items() if self._matches(entry[0])}
+
+    def _matches(self, name):
+        return bool(name) and self.matcher is not None and self.matcher.search(_normalize(name)) is not None
+
+    def refresh(self):
+        pids = set(psutil.pids())
+        now = time.monotonic()
+        if now - self.last_full_scan > FULL_RESCAN_SECONDS:
+            self.index.clear()
+            self.matched.clear()
+            self.last_full_scan = now
+
+        for pid in self.index.keys() - pids:
+            del self.index[pid]
+            self.matched.pop(pid, None)
+
+        for pid, (_, created) in list(self.matched.items()):
+            if _create_time(pid) != created:
+                del self.index[pid]
+                del self.matched[pid]
+
+        new_pids = pids - self.index.keys()
+        for pid in new_pids:
+            self.index[pid] = entry = _inspect(pid)
+            if self._matches(entry[0]):
+                self.matched[pid] = entry
+        self.last_inspected = len(new_pids)
+
+    def find_video_app(self):
+        """Return the name of a running video-call app, or None."""
+        with self.lock:
+            started = time.perf_counter()
+            self._load_matcher()
+            self.refresh()
+            elapsed = time.perf_counter() - started
+            self.checks += 1
+            self.total_seconds += elapsed
+            self.last_check_ms = elapsed * 1000
+            return next((name for name, _ in self.matched.values()), None)
+
+    def stats(self):
+        return {
+            "processes": len(self.index),
+            "inspected": self.last_inspected,
+            "checks": self.checks,
+            "last_check_ms": round(self.last_check_ms, 2),
+            "mean_check_ms": round(self.total_seconds * 1000 / max(self.checks, 1), 2),
+        }
+
+
+def _create_time(pid):
+    try:
+        return psutil.Process(pid).create_time()
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+
+def _inspect(pid):
+    try:
+        process = psutil.Process(pid)
+        return process.name(), process.create_time()
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return "", None  # remembered so we don't ask again
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def get_process_watcher():
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = ProcessWatcher()
+        return _watcher
@@ -56,21 +56,26 @@ def load_custom_quotes():
 # Load custom quotes into fallback_quotes on import
 load_custom_quotes()
 
-def fallback_quote(emotion):
+def fallback_quote(emotion, use_ai=True):
     """
     Try to fetch an AI-generated quote using Groq based on emotion context.
-    If that fails, fallback to static predefined quote.
+    If that fails (or use_ai is False), fallback to static predefined quote.
     """
-    try:
-        user_state = {
-            "emotion": emotion,
-            "activity": {"typing_speed": 0, "mouse_speed": 0, "active_window": "VibeSync"}
-        }
-        quote = fetch_motivational_quote(user_state)
-        if quote:
-            return quote
-    except Exception as e:
-        print(f"[Quotes AI fallback error] {e}")
+    return fallback_quote_with_source(emotion, use_ai)[0]
+
+def fallback_quote_with_source(emotion, use_ai=True):
+    """Like fallback_quote, but returns (quote, "ai" or "static")."""
+    if use_ai:
+        try:
+            user_state = {
+                "emotion": emotion,
+                "activity": {"typing_speed": 0, "mouse_speed": 0, "active_window": "VibeSync"}
+            }
+            quote = fetch_motivational_quote(user_state)
+            if quote:
+                return quote, "ai"
+        except Exception as e:
+            print(f"[Quotes AI fallback error] {e}")
 
     quotes = fallback_quotes.get(emotion, fallback_quotes["neutral"])
-    return random.choice(quotes)
+    return random.choice(quotes), "static"
@@ -0,0 +1,257 @@
+import bisect
+from datetime import datetime, timedelta
+
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+WEEK_SECONDS = 7 * 24 * 3600
+# Monday to Friday with a lunch break
+DEFAULT_WORK_HOURS = {"mon-fri": ["09:00-12:00", "13:00-17:00"]}
+
+
+class ScheduleError(ValueError):
+    """A cron expression or time window in the settings can't be parsed."""
+
+
+# --- Cron expressions ---
+def _parse_value(text, names, offset):
+    text = text.strip().lower()
+    if text in names:
+        return names.index(text) + offset
+    try:
+        return int(text)
+    except ValueError:
+        raise ScheduleError(f"Bad value '{text}'")
+
+
+def _parse_field(field, low, high, names=(), offset=0):
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ScheduleError(f"Bad step in '{field}'")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (_parse_value(v, names, offset) for v in part.split("-", 1))
+        else:
+            start = _parse_value(part, names, offset)
+            end = high if step > 1 else start
+        if not (low <= start <= high and low <= end <= high and start <= end):
+            raise ScheduleError(f"'{field}' is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+def _next_value(values, current):
+    """Smallest value >= current, or None."""
+    i = bisect.bisect_left(values, current)
+    return values[i] if i < len(values) else None
+
+
+class CronExpression:
+    """Standard five-field cron: minute hour day-of-month month day-of-week.
+
+    Fields accept *, lists, ranges, steps and day/month names; day-of-week 0
+    and 7 are both Sunday. As in cron, when both day fields are restricted a
+    day matches if either does.
+    """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ScheduleError(f"Cron needs 5 fields, got {len(fields)}: '{expression}'")
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12, MONTH_NAMES, 1)
+        # Cron counts Sunday as 0; store Python weekdays (Monday = 0)
+        cron_days = _parse_field(fields[4], 0, 7, DAY_NAMES, 1)
+        self.weekdays = sorted({(day - 1) % 7 for day in cron_days})
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, t):
+        in_month = t.day in self.days
+        in_week = t.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_at_or_after(self, after):
+        t = after.replace(second=0, microsecond=0)
+        if t < after:
+            t += timedelta(minutes=1)
+        # Each step jumps to the next candidate of one field, so this settles
+        # in a handful of iterations; the bound only guards impossible dates
+        for _ in range(2000):
+            if t.month not in self.months:
+                month = _next_value(self.months, t.month)
+                t = datetime(t.year + (month is None), month or self.months[0], 1)
+                continue
+            if not self._day_matches(t):
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                continue
+            hour = _next_value(self.hours, t.hour)
+            if hour is None:
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                continue
+            if hour != t.hour:
+                t = t.replace(hour=hour, minute=0)
+            minute = _next_value(self.minutes, t.minute)
+            if minute is None:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            return t.replace(minute=minute)
+        raise ScheduleError(f"'{self.expression}' never fires")
+
+
+# --- Weekly windows ---
+def _parse_days(text):
+    days = set()
+    for part in text.lower().split(","):
+        part = part.strip()
+        if part in ("*", "daily", "all"):
+            days.update(range(7))
+        elif "-" in part:
+            start, end = (DAY_NAMES.index(d.strip()[:3]) for d in part.split("-", 1))
+            days.update(range(start, end + 1) if start <= end else list(range(start, 7)) + list(range(end + 1)))
+        elif part[:3] in DAY_NAMES:
+            days.add(DAY_NAMES.index(part[:3]))
+        else:
+            raise ScheduleError(f"Bad day '{part}'")
+    return days
+
+
+def _parse_clock(text):
+    try:
+        hours, minutes = text.strip().split(":")
+        seconds = int(hours) * 3600 + int(minutes) * 60
+    except ValueError:
+        raise ScheduleError(f"Bad time '{text}'")
+    if not 0 <= seconds <= 24 * 3600:
+        raise ScheduleError(f"Bad time '{text}'")
+    return seconds
+
+
+def _week_ranges(spec):
+    """{"mon-fri": ["09:00-17:00"]} or ["12:00-13:00"] (every day) -> [(start, end)] in seconds of the week."""
+    if isinstance(spec, (list, tuple)):
+        spec = {"daily": spec}
+    ranges = []
+    for days, periods in spec.items():
+        if isinstance(periods, str):
+            periods = [periods]
+        for day in _parse_days(days):
+            for period in periods:
+                start, end = (_parse_clock(t) for t in period.split("-", 1))
+                base = day * 24 * 3600
+                if end > start:
+                    ranges.append((base + start, base + end))
+                else:
+                    # Runs past midnight, possibly into next week
+                    ranges.append((base + start, base + 24 * 3600))
+                    tail = (base + 24 * 3600) % WEEK_SECONDS
+                    ranges.append((tail, tail + end))
+    return _merge(ranges)
+
+
+def _merge(ranges):
+    merged = []
+    for start, end in sorted(r for r in ranges if r[1] > r[0]):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(ranges, holes):
+    result = []
+    for start, end in ranges:
+        for hole_start, hole_end in holes:
+            if hole_end <= start or hole_start >= end:
+                continue
+            if hole_start > start:
+                result.append((start, hole_start))
+            start = max(start, hole_end)
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+class WeeklyWindows:
+    """Times of the week when detection may run, as sorted disjoint ranges.
+
+    Finding the next allowed moment is a binary search over the range starts.
+    """
+
+    def __init__(self, work_hours=None, quiet_periods=None):
+        allowed = _week_ranges(work_hours) if work_hours else [(0, WEEK_SECONDS)]
+        if quiet_periods:
+            allowed = _subtract(allowed, _week_ranges(quiet_periods))
+        if not allowed:
+            raise ScheduleError("Work hours and quiet periods leave no time to run")
+        self.ranges = allowed
+        self.starts = [start for start, _ in allowed]
+
+    @property
+    def always(self):
+        return self.ranges == [(0, WEEK_SECONDS)]
+
+    def next_allowed(self, when):
+        """`when` itself if it falls inside a window, else the start of the next one."""
+        week_start = datetime(when.year, when.month, when.day) - timedelta(days=when.weekday())
+        offset = (when - week_start).total_seconds()
+        i = bisect.bisect_right(self.starts, offset) - 1
+        if i >= 0 and offset < self.ranges[i][1]:
+            return when
+        if i + 1 < len(self.starts):
+            return week_start + timedelta(seconds=self.starts[i + 1])
+        return week_start + timedelta(seconds=WEEK_SECONDS + self.starts[0])
+
+
+# --- Schedule ---
+class DetectionSchedule:
+    """When the next detection should fire, computed directly from the calendar.
+
+    Either every `interval` seconds or on a cron expression, in both cases
+    only inside the allowed weekly windows.
+    """
+
+    def __init__(self, cron=None, windows=None):
+        self.cron = CronExpression(cron) if cron else None
+        self.windows = windows or WeeklyWindows()
+
+    @property
+    def is_plain_interval(self):
+        return self.cron is None and self.windows.always
+
+    def next_fire(self, after, interval_seconds=None):
+        if self.cron is None:
+            return self.windows.next_allowed(after + timedelta(seconds=interval_seconds))
+        t = self.cron.next_at_or_after(after + timedelta(seconds=1))
+        for _ in range(1000):
+            allowed = self.windows.next_allowed(t)
+            if allowed == t:
+                return t
+            t = self.cron.next_at_or_after(allowed)
+        raise ScheduleError("The cron expression never fires inside the allowed hours")
+
+
+def schedule_from_settings(get_setting):
+    """Build the schedule from settings; falls back to a plain interval if they're invalid."""
+    cron = None
+    if str(get_setting("monitoring_schedule", "")).lower().startswith("custom"):
+        cron = get_setting("schedule_cron", "*/15 * * * *")
+    work_hours = None
+    if get_setting("active_hours", "Always") == "Work hours":
+        work_hours = get_setting("work_hours", DEFAULT_WORK_HOURS)
+    try:
+        return DetectionSchedule(cron, WeeklyWindows(work_hours, get_setting("quiet_periods", [])))
+    except (ScheduleError, ValueError, AttributeError) as e:
+        print(f"[Error] Invalid schedule settings: {e}. Running on the plain interval.")
+        return DetectionSchedule()
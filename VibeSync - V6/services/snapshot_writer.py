@@ -0,0 +1,174 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+import cv2
+from services.app_settings import get_setting, load_settings
+from services.face_detector import crop_face
+from services.perceptual_hash import find_similar
+
+SNAPSHOT_DIR = "data/snapshots"
+
+
+class SnapshotWriter:
+    """Encodes and stores snapshots on a background thread.
+
+    The queue is bounded: when the disk can't keep up the oldest pending
+    snapshot is dropped rather than stalling the detection cycle. After every
+    write the directory is trimmed oldest-first to stay within the count,
+    size and age limits.
+
+    Frames whose perceptual hash is close to a recently stored snapshot are
+    not written again; a line in references.jsonl points them at the
+    existing image instead.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR, max_pending=4):
+        self.directory = directory
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.thread = None
+        self.lock = threading.Lock()
+        # (mtime, path, size) of stored snapshots, oldest first
+        self.index = None
+        self.total_bytes = 0
+        # (phash, path) of the last stored snapshots, newest last
+        self.recent = deque(maxlen=32)
+        self.references_file = os.path.join(self.directory, "references.jsonl")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def submit(self, frame, timestamp, face_box=None, phash=None):
+        """Queue a frame for writing and return the path it will be stored at.
+
+        For a near-duplicate of a recent snapshot the existing path is
+        returned and only a reference is recorded.
+        """
+        path = os.path.join(self.directory, f"{timestamp}.jpg")
+        if phash is not None:
+            max_distance = int(get_setting("snapshot_dedup_distance", 5))
+            with self.lock:
+                match = find_similar(phash, reversed(self.recent), max_distance)
+                if match is None:
+                    self.recent.append((phash, path))
+            if match is not None:
+                self._enqueue({"kind": "reference", "path": path, "same_as": match[1]})
+                return match[1]
+
+        self._enqueue({"kind": "image", "frame": frame, "path": path, "face_box": face_box})
+        return path
+
+    def _enqueue(self, job):
+        try:
+            self.pending.put_nowait(job)
+        except queue.Full:
+            try:
+                dropped = self.pending.get_nowait()
+                self.pending.task_done()
+                print(f"[Snapshot] Writer busy, dropped {dropped['path']}")
+                if dropped["kind"] == "image":
+                    self._forget(dropped["path"])
+            except queue.Empty:
+                pass
+            self.pending.put_nowait(job)
+        self._ensure_thread()
+
+    def _forget(self, path):
+        with self.lock:
+            for entry in [entry for entry in self.recent if entry[1] == path]:
+                self.recent.remove(entry)
+
+    def flush(self):
+        self.pending.join()
+
+    def _ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            job = self.pending.get()
+            try:
+                if job["kind"] == "reference":
+                    self._write_reference(job["path"], job["same_as"])
+                    continue
+                settings = load_settings()
+                self._write(job["frame"], job["path"], job["face_box"], settings)
+                self._enforce_retention(settings)
+            except Exception as e:
+                print(f"[Snapshot Error] {e}")
+            finally:
+                self.pending.task_done()
+
+    def _write(self, frame, path, face_box, settings):
+        if settings.get("snapshot_face_only", False) and face_box is not None:
+            frame = crop_face(frame, face_box)
+        else:
+            max_width = int(settings.get("snapshot_max_width", 640))
+            height, width = frame.shape[:2]
+            if width > max_width:
+                scale = max_width / float(width)
+                frame = cv2.resize(frame, (max_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+
+        quality = int(settings.get("snapshot_quality", 80))
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise RuntimeError(f"Could not encode {path}")
+        with open(path, "wb") as f:
+            f.write(encoded.tobytes())
+
+        self._load_index()
+        self.index.append((time.time(), path, len(encoded)))
+        self.total_bytes += len(encoded)
+        print(f"[Snapshot] Saved: {path}")
+
+    def _write_reference(self, path, same_as):
+        with open(self.references_file, "a") as f:
+            f.write(json.dumps({"snapshot": path, "same_as": same_as}) + "\n")
+        print(f"[Snapshot] Near-duplicate of {same_as}, stored as reference")
+
+    def _load_index(self):
+        if self.index is not None:
+            return
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.jpg")):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        entries.sort()
+        self.index = deque(entries)
+        self.total_bytes = sum(size for _, _, size in entries)
+
+    def _enforce_retention(self, settings):
+        max_count = int(settings.get("snapshot_max_count", 500))
+        max_bytes = float(settings.get("snapshot_max_mb", 200)) * 1024 * 1024
+        max_age = float(settings.get("snapshot_max_age_days", 30)) * 86400
+        oldest_allowed = time.time() - max_age
+
+        while self.index and (
+            len(self.index) > max_count
+            or self.total_bytes > max_bytes
+            or self.index[0][0] < oldest_allowed
+        ):
+            _, path, size = self.index.popleft()
+            self.total_bytes -= size
+            self._forget(path)
+            try:
+                os.remove(path)
+                print(f"[Snapshot] Evicted: {path}")
+            except FileNotFoundError:
+                pass
+
+
+_writer = None
+
+def get_snapshot_writer():
+    global _writer
+    if _writer is None:
+        _writer = SnapshotWriter()
+    return _writer
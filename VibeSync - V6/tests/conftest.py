@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the app's packages the same way the app does, from its own folder
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
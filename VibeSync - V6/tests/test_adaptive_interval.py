@@ -0,0 +1,75 @@
+import pytest
+
+from services.adaptive_interval import AdaptiveInterval
+
+ACTIVE = {"typing_speed": 2.0, "mouse_speed": 200.0}
+IDLE = {"typing_speed": 0.0, "mouse_speed": 0.0}
+
+
+@pytest.fixture
+def adaptive():
+    return AdaptiveInterval(base_seconds=240, min_seconds=30, max_seconds=1800, stable_cycles=3, min_confidence=60)
+
+
+def test_stable_confident_emotion_grows_the_interval(adaptive):
+    assert adaptive.observe("happy", 90, ACTIVE) == 240
+    assert adaptive.observe("happy", 90, ACTIVE) == 240
+    assert adaptive.observe("happy", 90, ACTIVE) == 360
+    assert adaptive.last_reason == "stable happy"
+    assert adaptive.observe("happy", None, ACTIVE) == 540
+
+
+def test_low_confidence_isnt_stable(adaptive):
+    for _ in range(3):
+        interval = adaptive.observe("happy", 40, ACTIVE)
+    assert interval == 240
+    assert adaptive.last_reason == "settling"
+
+
+def test_new_emotion_drops_to_the_floor(adaptive):
+    for _ in range(4):
+        adaptive.observe("happy", 90, ACTIVE)
+    assert adaptive.observe("sad", 90, ACTIVE) == 30
+    assert adaptive.last_reason == "emotion changed (happy -> sad)"
+
+
+def test_sharp_activity_change_drops_to_the_floor(adaptive):
+    adaptive.observe("neutral", 90, ACTIVE)
+    assert adaptive.observe("neutral", 90, {"typing_speed": 8.0, "mouse_speed": 200.0}) == 30
+    assert adaptive.last_reason == "activity changed sharply"
+
+
+def test_noise_below_the_activity_floor_isnt_a_jump(adaptive):
+    adaptive.observe("neutral", 40, {"typing_speed": 0.1, "mouse_speed": 10.0})
+    assert adaptive.observe("neutral", 40, {"typing_speed": 0.4, "mouse_speed": 40.0}) == 240
+    assert adaptive.last_reason == "settling"
+
+
+def test_idle_and_absence_back_off(adaptive):
+    adaptive.observe("neutral", 40, IDLE)
+    assert adaptive.last_reason == "idle"
+    assert adaptive.interval == 360
+    assert adaptive.observe_absence() == 540
+    assert adaptive.last_reason == "away"
+
+
+def test_interval_stays_within_bounds(adaptive):
+    for _ in range(30):
+        adaptive.observe_absence()
+    assert adaptive.interval == 1800
+    adaptive.observe("happy", 90)
+    assert adaptive.observe("sad", 90) == 30
+
+
+def test_settling_drifts_back_to_base(adaptive):
+    adaptive.observe("happy", 90)
+    adaptive.observe("sad", 90)
+    assert adaptive.interval == 30
+    assert adaptive.observe("sad", 40) == 135
+    assert adaptive.observe("sad", 40) == 187.5
+
+
+def test_bad_bounds_are_fixed_up():
+    adaptive = AdaptiveInterval(base_seconds=5, min_seconds=60, max_seconds=10)
+    assert adaptive.max_seconds == 60
+    assert adaptive.base_seconds == 60
@@ -0,0 +1,131 @@
+import cv2
+import numpy as np
+import pytest
+from services.camera import (CameraService, CameraUnavailable, FrameSource, ImageDirectorySource,
+                             VideoFileSource, source_from_setting)
+
+
+def _frame(value):
+    return np.full((32, 32, 3), value, dtype=np.uint8)
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    for i, value in enumerate((10, 120, 240)):
+        cv2.imwrite(str(tmp_path / f"{i:02d}.png"), _frame(value))
+    return tmp_path
+
+
+@pytest.fixture
+def video_file(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 32))
+    if not writer.isOpened():
+        pytest.skip("OpenCV has no MJPG writer here")
+    for value in range(0, 250, 25):
+        writer.write(_frame(value))
+    writer.release()
+    return path
+
+
+class FakeProbe:
+    def __init__(self, holders=None):
+        self.holders = holders or {}
+
+    def device_holders(self, device):
+        return self.holders
+
+
+class StaticSource(FrameSource):
+    device_path = "/dev/video0"
+
+    def __init__(self):
+        self.closed = 0
+
+    def read(self):
+        return True, _frame(0)
+
+    def close(self):
+        self.closed += 1
+
+
+def test_frame_source_needs_read():
+    with pytest.raises(TypeError):
+        FrameSource()
+
+
+def test_image_directory_reads_in_order_and_loops(image_dir):
+    source = ImageDirectorySource(str(image_dir))
+    assert source.open()
+    values = [int(source.read()[1][0, 0, 0]) for _ in range(4)]
+    assert values == [10, 120, 240, 10]
+
+
+def test_image_directory_without_loop_runs_dry(image_dir):
+    source = ImageDirectorySource(str(image_dir), loop=False)
+    source.open()
+    for _ in range(3):
+        assert source.read()[0]
+    assert source.read() == (False, None)
+
+
+def test_video_file_close_releases_and_resumes(video_file):
+    source = VideoFileSource(video_file)
+    assert source.open()
+    for _ in range(3):
+        assert source.read()[0]
+    source.close()
+    assert source.cap is None
+    assert source.position == 3
+    assert source.open()
+    assert int(source.cap.get(cv2.CAP_PROP_POS_FRAMES)) == 3
+    source.close()
+
+
+def test_video_file_loops_at_the_end(video_file):
+    source = VideoFileSource(video_file)
+    source.open()
+    assert all(source.read()[0] for _ in range(25))
+    source.close()
+
+
+def test_source_from_setting(image_dir, video_file):
+    assert source_from_setting(None).index == 0
+    assert source_from_setting("2").index == 2
+    assert isinstance(source_from_setting(str(image_dir)), ImageDirectorySource)
+    assert isinstance(source_from_setting(video_file), VideoFileSource)
+
+
+def test_grab_closes_the_source_after_each_cycle(image_dir):
+    source = ImageDirectorySource(str(image_dir))
+    service = CameraService(source, probe=FakeProbe())
+    assert len(service.grab(count=2)) == 2
+    assert len(service.grab(count=1)) == 1
+    assert not service.lock.locked()
+
+
+def test_set_source_closes_the_previous_one(video_file, image_dir):
+    old = VideoFileSource(video_file)
+    service = CameraService(old, probe=FakeProbe())
+    service.grab(count=1)
+    old.open()
+    service.set_source(ImageDirectorySource(str(image_dir)))
+    assert old.cap is None
+
+
+def test_acquire_refuses_a_held_device():
+    source = StaticSource()
+    service = CameraService(source, probe=FakeProbe({4242: "zoom"}))
+    with pytest.raises(CameraUnavailable, match="zoom"):
+        service.acquire()
+    assert not service.lock.locked()
+    assert service.grab() == []
+
+
+def test_lease_keeps_frames_after_release():
+    service = CameraService(StaticSource(), probe=FakeProbe())
+    with service.acquire() as lease:
+        lease.capture(count=2)
+    assert len(lease.frames) == 2
+    with pytest.raises(RuntimeError):
+        lease.capture()
@@ -0,0 +1,82 @@
+import os
+import pytest
+from services.camera_probe import CameraProbe
+
+
+class FakeProc:
+    """A /proc tree with fd symlinks, built under tmp_path."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def process(self, pid, name):
+        os.makedirs(os.path.join(self.root, str(pid), "fd"), exist_ok=True)
+        with open(os.path.join(self.root, str(pid), "comm"), "w") as f:
+            f.write(name + "\n")
+
+    def open_fd(self, pid, fd, target):
+        link = os.path.join(self.root, str(pid), "fd", str(fd))
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(target, link)
+
+    def close_fd(self, pid, fd):
+        os.remove(os.path.join(self.root, str(pid), "fd", str(fd)))
+
+
+@pytest.fixture
+def proc(tmp_path):
+    fake = FakeProc(str(tmp_path / "proc"))
+    os.makedirs(fake.root)
+    fake.process(100, "bash")
+    fake.open_fd(100, 0, "/dev/pts/0")
+    fake.process(200, "zoom")
+    fake.open_fd(200, 3, "socket:[4242]")
+    return fake
+
+
+def _probe(proc):
+    return CameraProbe(proc_root=proc.root, cache_seconds=0, ignore_pids=())
+
+
+def test_finds_the_process_holding_the_camera(proc):
+    probe = _probe(proc)
+    assert probe.device_holders("/dev/video0") == {}
+    proc.open_fd(200, 4, "/dev/video0")
+    assert probe.device_holders("/dev/video0") == {200: "zoom"}
+    assert probe.is_busy("/dev/video0")
+    assert not probe.is_busy("/dev/video1")
+
+
+def test_reused_fd_number_is_read_again(proc):
+    probe = _probe(proc)
+    proc.open_fd(200, 5, "socket:[9999]")
+    assert probe.device_holders("/dev/video0") == {}
+    # The socket on fd 5 is closed and the camera opened on the same number
+    proc.close_fd(200, 5)
+    proc.open_fd(200, 5, "/dev/video0")
+    assert probe.device_holders("/dev/video0") == {200: "zoom"}
+
+
+def test_closing_the_camera_frees_it(proc):
+    probe = _probe(proc)
+    proc.open_fd(200, 4, "/dev/video0")
+    assert probe.is_busy("/dev/video0")
+    proc.close_fd(200, 4)
+    assert not probe.is_busy("/dev/video0")
+
+
+def test_exited_and_ignored_processes(proc):
+    proc.open_fd(100, 7, "/dev/video0")
+    probe = CameraProbe(proc_root=proc.root, cache_seconds=0, ignore_pids={100})
+    assert probe.device_holders("/dev/video0") == {}
+    # A process dir without a readable fd folder is skipped
+    os.makedirs(os.path.join(proc.root, "300"))
+    assert probe.device_holders("/dev/video0") == {}
+
+
+def test_results_are_cached(proc):
+    probe = CameraProbe(proc_root=proc.root, cache_seconds=60, ignore_pids=())
+    assert not probe.is_busy("/dev/video0")
+    proc.open_fd(200, 4, "/dev/video0")
+    assert not probe.is_busy("/dev/video0")
@@ -0,0 +1,182 @@
+import threading
+import time
+from datetime import datetime
+import pytest
+from services import deadline_scheduler
+from services.deadline_scheduler import FIXED_DELAY, FIXED_RATE, DeadlineScheduler
+
+
+@pytest.fixture
+def clock():
+    scheduler = DeadlineScheduler(name="TestScheduler")
+    yield scheduler
+    scheduler.stop()
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_fixed_rate_ticks_on_a_grid(clock):
+    ticks = []
+    job = clock.schedule(lambda: ticks.append(time.monotonic()), 0.05, mode=FIXED_RATE)
+    assert _wait_for(lambda: len(ticks) >= 4)
+    clock.cancel(job)
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    assert all(0.02 < gap < 0.15 for gap in gaps)
+    assert job.ticks >= 4
+
+
+def test_fixed_delay_waits_after_the_callback_returns(clock):
+    starts, ends = [], []
+
+    def slow():
+        starts.append(time.monotonic())
+        time.sleep(0.08)
+        ends.append(time.monotonic())
+
+    clock.schedule(slow, 0.05, mode=FIXED_DELAY)
+    assert _wait_for(lambda: len(starts) >= 3)
+    assert starts[1] - ends[0] >= 0.045
+    assert starts[2] - ends[1] >= 0.045
+
+
+def test_fixed_delay_without_rearm_waits_for_reschedule(clock):
+    fired = threading.Event()
+    count = []
+
+    def hand_off():
+        count.append(1)
+        fired.set()
+
+    job = clock.schedule(hand_off, 0.02, mode=FIXED_DELAY, rearm=False)
+    assert fired.wait(1)
+    time.sleep(0.1)
+    assert len(count) == 1
+    # The owner re-arms once the handed-off work is done
+    clock.reschedule(job, 0.01)
+    assert _wait_for(lambda: len(count) == 2)
+
+
+def test_schedule_right_after_stop(clock):
+    release, in_callback = threading.Event(), threading.Event()
+
+    def busy():
+        in_callback.set()
+        release.wait(1)
+
+    clock.schedule(busy, 0.01)
+    assert in_callback.wait(1)
+    # The old loop is still in its callback when the scheduler is stopped and reused
+    clock.stop()
+    fired = threading.Event()
+    clock.schedule(fired.set, 0.02)
+    release.set()
+    assert fired.wait(1)
+    assert not clock.stopped
+    assert clock.thread.is_alive()
+
+
+def test_cancel_stops_a_job(clock):
+    count = []
+    job = clock.schedule(lambda: count.append(1), 0.02)
+    assert _wait_for(lambda: count)
+    clock.cancel(job)
+    seen = len(count)
+    time.sleep(0.1)
+    assert len(count) <= seen + 1
+    assert job.next_fire_time is None
+
+
+def test_announces_each_new_deadline(clock):
+    announced = []
+    job = clock.schedule(lambda: None, 0.03, mode=FIXED_DELAY, on_scheduled=lambda j: announced.append(j.deadline))
+    assert _wait_for(lambda: len(announced) >= 3)
+    assert announced == sorted(announced)
+    clock.cancel(job)
+
+
+def test_no_announcement_until_a_handed_off_job_is_rearmed(clock):
+    announced = []
+    job = clock.schedule(lambda: None, 0.02, mode=FIXED_DELAY, rearm=False,
+                         on_scheduled=lambda j: announced.append(j.next_fire_time))
+    assert _wait_for(lambda: job.ticks == 1)
+    time.sleep(0.05)
+    # Only the first deadline; the one that just fired isn't announced again as "next"
+    assert len(announced) == 1
+    clock.reschedule(job, 10)
+    assert len(announced) == 2
+    assert announced[1] > datetime.now()
+
+
+def test_forward_jump_collapses_missed_ticks(monkeypatch):
+    wall = [1_000_000.0]
+    monkeypatch.setattr(deadline_scheduler, "_wall_seconds", lambda: wall[0] + time.monotonic())
+    clock = DeadlineScheduler(name="TestScheduler", settle_seconds=0.05)
+    try:
+        count = []
+        job = clock.schedule(lambda: count.append(1), 30, mode=FIXED_RATE)
+        time.sleep(0.05)
+        # A two-minute suspend: the wall clock moves on, monotonic time didn't
+        wall[0] += 120
+        with clock.condition:
+            clock.condition.notify()
+        assert _wait_for(lambda: count)
+        assert len(count) == 1
+        assert job.missed == 3
+        assert clock.suspends == 1
+    finally:
+        clock.stop()
+
+
+def test_backward_jump_replans_calendar_jobs_only(monkeypatch):
+    wall = [1_000_000.0]
+    monkeypatch.setattr(deadline_scheduler, "_wall_seconds", lambda: wall[0] + time.monotonic())
+    clock = DeadlineScheduler(name="TestScheduler")
+    try:
+        plain = clock.schedule(lambda: None, 60)
+        calendar = clock.schedule(lambda: None, lambda: 45, wall_clock=True)
+        plain_deadline = plain.deadline
+        time.sleep(0.05)
+        wall[0] -= 3600
+        with clock.condition:
+            clock.condition.notify()
+        assert _wait_for(lambda: clock.backward_jumps == 1)
+        assert plain.deadline == plain_deadline
+        assert calendar.deadline == pytest.approx(time.monotonic() + 45, abs=1)
+    finally:
+        clock.stop()
+
+
+def test_dst_change_is_not_a_suspend(monkeypatch):
+    wall, offset = [1_000_000.0], [3600.0]
+    monkeypatch.setattr(deadline_scheduler, "_wall_seconds", lambda: wall[0] + time.monotonic())
+    monkeypatch.setattr(deadline_scheduler, "_utc_offset", lambda: offset[0])
+    clock = DeadlineScheduler(name="TestScheduler", settle_seconds=0.05)
+    try:
+        count = []
+        plain = clock.schedule(lambda: count.append(1), 60)
+        # The next cron fire, which moves with local time
+        until_fire = [45]
+        calendar = clock.schedule(lambda: None, lambda: until_fire[0], wall_clock=True)
+        plain_deadline = plain.deadline
+        time.sleep(0.05)
+        until_fire[0] = 45 + 3600
+        # Spring forward: local time jumps an hour, UTC doesn't
+        offset[0] += 3600
+        with clock.condition:
+            clock.condition.notify()
+        assert _wait_for(lambda: clock.last_offset == offset[0])
+        time.sleep(0.05)
+        assert count == []
+        assert clock.suspends == 0
+        assert plain.missed == 0
+        assert plain.deadline == plain_deadline
+        assert calendar.deadline == pytest.approx(time.monotonic() + 45 + 3600, abs=1)
+    finally:
+        clock.stop()
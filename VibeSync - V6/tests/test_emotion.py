@@ -0,0 +1,35 @@
+import pytest
+
+from services.emotion import aggregate_scores
+
+CONFIDENT = {"happy": 90.0, "sad": 10.0}
+UNSURE = {"happy": 40.0, "sad": 60.0}
+
+
+def test_mean_and_median_are_per_class():
+    scores = [CONFIDENT, UNSURE, {"happy": 80.0, "sad": 20.0}]
+    assert aggregate_scores(scores, "mean") == pytest.approx({"happy": 70.0, "sad": 30.0})
+    assert aggregate_scores(scores, "median") == pytest.approx({"happy": 80.0, "sad": 20.0})
+
+
+def test_weighted_favours_confident_frames():
+    weighted = aggregate_scores([CONFIDENT, UNSURE])
+    mean = aggregate_scores([CONFIDENT, UNSURE], "mean")
+    # Weights 90 and 60: (90 * 90 + 40 * 60) / 150
+    assert weighted["happy"] == pytest.approx(70.0)
+    assert weighted["happy"] > mean["happy"]
+
+
+def test_result_is_normalised_to_100():
+    combined = aggregate_scores([{"happy": 0.3, "sad": 0.1}, {"happy": 0.2, "sad": 0.2}], "mean")
+    assert sum(combined.values()) == pytest.approx(100.0)
+    assert combined["happy"] == pytest.approx(62.5)
+
+
+def test_missing_labels_count_as_zero():
+    combined = aggregate_scores([CONFIDENT, {"happy": 100.0}], "mean")
+    assert combined == pytest.approx({"happy": 95.0, "sad": 5.0})
+
+
+def test_all_zero_frames_dont_divide_by_zero():
+    assert aggregate_scores([{"happy": 0.0, "sad": 0.0}] * 2) == {"happy": 0.0, "sad": 0.0}
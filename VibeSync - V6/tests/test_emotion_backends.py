@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from services import emotion_model
+from services.emotion_backends import EMOTION_LABELS, EmotionBackend, OnnxEmotionBackend, _to_scores
+
+
+class FakeBackend(EmotionBackend):
+    name = "DeepFace"
+
+    def load(self):
+        self.model = object()
+        return self.model
+
+    def warm_up(self):
+        pass
+
+    def predict_batch(self, faces):
+        return [_to_scores(np.eye(len(EMOTION_LABELS))[3]) for _ in faces]
+
+
+class BrokenBackend(FakeBackend):
+    name = "OpenCV DNN"
+
+    def load(self):
+        raise FileNotFoundError("no model")
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    settings = {"emotion_backend": "OpenCV DNN"}
+    created = []
+
+    def create_backend(name):
+        backend = BrokenBackend() if name == "OpenCV DNN" else FakeBackend()
+        created.append(name)
+        return backend
+
+    monkeypatch.setattr(emotion_model, "get_setting", lambda key, default=None: settings.get(key, default))
+    monkeypatch.setattr(emotion_model, "create_backend", create_backend)
+    manager = emotion_model.EmotionModelManager(idle_unload_minutes=5)
+    manager.settings, manager.created = settings, created
+    yield manager
+    manager.shutdown()
+
+
+def test_backend_needs_load_and_predict():
+    with pytest.raises(TypeError):
+        EmotionBackend()
+
+
+def test_onnx_backend_without_model_file(tmp_path):
+    backend = OnnxEmotionBackend(model_path=str(tmp_path / "missing.onnx"))
+    with pytest.raises(FileNotFoundError, match="onnx_model_path"):
+        backend.load()
+
+
+def test_to_scores_folds_contempt_into_disgust():
+    from services.emotion_backends import FERPLUS_LABELS
+    scores = _to_scores([0, 0, 0, 0, 0, 1, 0, 1], FERPLUS_LABELS)
+    assert scores["disgust"] == pytest.approx(100)
+
+
+def test_failed_backend_falls_back_to_deepface(manager):
+    scores = manager.predict_batch([np.zeros((48, 48), dtype=np.uint8)])
+    assert max(scores[0], key=scores[0].get) == "happy"
+    assert manager.backend.name == "DeepFace"
+    # Not retried on every detection while the setting stays the same
+    manager.predict_batch([np.zeros((48, 48), dtype=np.uint8)])
+    assert manager.created == ["OpenCV DNN", "DeepFace"]
+
+
+def test_changing_the_setting_retries_the_backend(manager):
+    manager.load()
+    manager.settings["emotion_backend"] = "DeepFace"
+    manager.load()
+    manager.settings["emotion_backend"] = "OpenCV DNN"
+    manager.load()
+    assert manager.created.count("OpenCV DNN") == 2
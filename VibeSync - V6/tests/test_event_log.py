@@ -0,0 +1,147 @@
+import json
+import os
+
+from services.event_log import EventLog, load_manifest, read_events, segment_dir
+
+
+def entry(timestamp, emotion="happy"):
+    return {"event": "detection", "timestamp": timestamp, "emotion": emotion}
+
+
+def write_lines(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_append_writes_one_line_per_entry(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    log = EventLog(path)
+    log.append(entry("2024-01-01 10:00:00"))
+    log.append(entry("2024-01-01 10:01:00", "sad"))
+    log.close()
+    with open(path, "rb") as f:
+        lines = f.read().splitlines()
+    assert [json.loads(line)["emotion"] for line in lines] == ["happy", "sad"]
+
+
+def test_torn_tail_is_fenced_on_reopen(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    good = json.dumps(entry("2024-01-01 10:00:00")).encode() + b"\n"
+    write_lines(path, good + b'{"event": "detection", "timest')
+
+    log = EventLog(path)
+    log.append(entry("2024-01-01 10:05:00", "sad"))
+    log.close()
+
+    with open(path, "rb") as f:
+        lines = f.read().split(b"\n")
+    # The torn line stays on its own line and the new entry starts a fresh one
+    assert lines[1] == b'{"event": "detection", "timest'
+    assert json.loads(lines[2])["emotion"] == "sad"
+    stats = {}
+    assert [e["emotion"] for e in read_events(path, stats)] == ["happy", "sad"]
+    assert stats["read"] == 2
+    assert stats["skipped"] == 1
+
+
+def test_read_events_counts_torn_and_invalid_lines(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    good = json.dumps(entry("2024-01-01 10:00:00")).encode() + b"\n"
+    write_lines(path, good + b"not json\n\n" + good + b'{"torn"')
+    stats = {}
+    assert len(list(read_events(path, stats))) == 2
+    assert stats == {"read": 2, "skipped": 2, "missing": 0}
+
+
+def test_read_events_without_a_log(tmp_path):
+    stats = {}
+    assert list(read_events(str(tmp_path / "events.jsonl"), stats)) == []
+    assert stats["read"] == 0
+
+
+def test_rotation_seals_into_manifest(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    log = EventLog(path, max_bytes=200)
+    timestamps = [f"2024-01-01 10:{minute:02d}:00" for minute in range(12)]
+    for timestamp in timestamps:
+        log.append(entry(timestamp))
+    log.close()
+
+    manifest = load_manifest(path)
+    assert manifest
+    assert all(segment["file"].endswith(".gz") for segment in manifest)
+    assert sum(segment["entries"] for segment in manifest) < len(timestamps)
+    assert os.path.isdir(segment_dir(path))
+    assert [e["timestamp"] for e in read_events(path)] == timestamps
+
+
+def test_read_events_window_skips_segments(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    log = EventLog(path, max_bytes=200)
+    timestamps = [f"2024-01-{day:02d} 10:00:00" for day in range(1, 13)]
+    for timestamp in timestamps:
+        log.append(entry(timestamp))
+    log.close()
+
+    stats = {}
+    window = list(read_events(path, stats, start="2024-01-11", end="2024-01-12"))
+    assert [e["timestamp"] for e in window] == ["2024-01-11 10:00:00"]
+    # Only segments overlapping the window were opened
+    assert stats["read"] < len(timestamps)
+
+
+def test_reanalysis_events_dont_widen_the_segment_range(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    log = EventLog(path, max_bytes=10000)
+    log.append(entry("2024-03-01 10:00:00"))
+    # A re-score of a detection from weeks earlier, appended later
+    log.append({"event": "reanalysis", "timestamp": "2024-01-01 10:00:00", "emotion": "sad"})
+    log.append(entry("2024-03-01 10:05:00"))
+    with log.lock:
+        log._rotate()
+    log.close()
+
+    manifest = load_manifest(path)
+    assert (manifest[0]["first"], manifest[0]["last"]) == ("2024-03-01 10:00:00", "2024-03-01 10:05:00")
+    assert list(read_events(path, start="2024-02-01", end="2024-02-02")) == []
+
+
+def test_merge_keeps_appended_reanalysis_in_place(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    directory = segment_dir(path)
+    os.makedirs(directory)
+    # Two overlapping segments, e.g. after a clock change; the first has a reanalysis line mixed in
+    write_lines(os.path.join(directory, "events-a.jsonl"), b"".join(json.dumps(e).encode() + b"\n" for e in [
+        entry("2024-03-01 10:00:00"),
+        {"event": "reanalysis", "timestamp": "2024-01-01 10:00:00", "emotion": "sad"},
+        entry("2024-03-01 10:10:00"),
+    ]))
+    write_lines(os.path.join(directory, "events-b.jsonl"), json.dumps(entry("2024-03-01 10:05:00")).encode() + b"\n")
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump({"segments": [
+            {"file": "events-a.jsonl", "first": "2024-03-01 10:00:00", "last": "2024-03-01 10:10:00"},
+            {"file": "events-b.jsonl", "first": "2024-03-01 10:05:00", "last": "2024-03-01 10:05:00"},
+        ]}, f)
+
+    timestamps = [e["timestamp"] for e in read_events(path)]
+    assert timestamps == ["2024-03-01 10:00:00", "2024-01-01 10:00:00", "2024-03-01 10:05:00", "2024-03-01 10:10:00"]
+
+
+def test_tool_reopens_after_the_app_rotates(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    app = EventLog(path, max_bytes=10000)
+    tool = EventLog(path)
+    app.append(entry("2024-03-01 10:00:00"))
+    tool.append(entry("2024-03-01 10:01:00", "sad"))
+    with app.lock:
+        app._rotate()
+    tool.append(entry("2024-03-01 10:02:00", "fear"))
+    app.append(entry("2024-03-01 10:03:00"))
+    tool.close()
+    app.close()
+
+    # The tool's last entry went into the new open segment, not the sealed one
+    with open(path, "rb") as f:
+        assert [json.loads(line)["emotion"] for line in f] == ["fear", "happy"]
+    assert [e["timestamp"] for e in read_events(path)] == [
+        "2024-03-01 10:00:00", "2024-03-01 10:01:00", "2024-03-01 10:02:00", "2024-03-01 10:03:00"]
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from services import frame_quality
+from services.frame_quality import check_quality, measure
+
+
+def noise(mean, spread, shape=(120, 160, 3), seed=0):
+    rng = np.random.default_rng(seed)
+    return np.clip(rng.normal(mean, spread, shape), 0, 255).astype(np.uint8)
+
+
+def test_a_good_frame_passes_unchanged():
+    image = noise(120, 50)
+    verdict, out = check_quality(image)
+    assert verdict == "ok"
+    assert out is image
+
+
+@pytest.mark.parametrize("image, verdict", [
+    (np.full((120, 160, 3), 10, np.uint8), "rejected: too dark"),
+    (np.full((120, 160, 3), 250, np.uint8), "rejected: overexposed"),
+    (noise(120, 2), "rejected: occluded"),
+    # A smooth ramp: plenty of contrast but no edges at all
+    (np.tile(np.linspace(40, 210, 160, dtype=np.float32), (120, 1)).astype(np.uint8), "rejected: blurry"),
+])
+def test_rejections(image, verdict):
+    assert check_quality(image)[0] == verdict
+
+
+def test_dim_frame_is_normalized():
+    image = noise(40, 15)
+    verdict, out = check_quality(image)
+    assert verdict == "normalized"
+    assert out is not image
+    metrics = measure(out)
+    assert metrics["brightness"] == pytest.approx(frame_quality.TARGET_BRIGHTNESS, abs=10)
+    assert metrics["contrast"] > measure(image)["contrast"]
+
+
+def test_grey_and_colour_measure_alike():
+    image = noise(120, 40, shape=(60, 80))
+    colour = np.repeat(image[..., None], 3, axis=2)
+    assert measure(colour) == pytest.approx(measure(image), rel=1e-3)
+
+
+def test_verdicts_are_counted(monkeypatch):
+    monkeypatch.setattr(frame_quality, "verdict_counts", frame_quality.Counter())
+    check_quality(noise(120, 50))
+    check_quality(np.full((40, 40), 5, np.uint8))
+    assert frame_quality.summary().startswith("1/2 frames rejected")
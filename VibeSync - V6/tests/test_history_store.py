@@ -0,0 +1,78 @@
+import sqlite3
+
+from services import history_store
+from services.history_store import HistoryStore, HistoryWriter
+
+
+def detection(timestamp, emotion="happy"):
+    return {"event": "detection", "timestamp": timestamp, "emotion": emotion}
+
+
+def test_writer_survives_a_bad_entry(tmp_path):
+    path = str(tmp_path / "history.db")
+    writer = HistoryWriter(path)
+    # No "emotion": the row can't be built, which isn't an sqlite3.Error
+    writer.submit({"event": "detection", "timestamp": "2024-01-01 10:00:00"})
+    writer.submit(detection("2024-01-01 10:01:00"))
+    assert writer.flush()
+    writer.submit(detection("2024-01-01 10:02:00", "sad"))
+    assert writer.flush()
+
+    assert writer.thread.is_alive()
+    assert writer.written == 2
+    assert writer.dropped == 1
+    assert HistoryStore(path).existing_timestamps(["2024-01-01 10:01:00", "2024-01-01 10:02:00"]) == {
+        "2024-01-01 10:01:00", "2024-01-01 10:02:00"}
+
+
+def test_flush_waits_for_room_in_a_full_queue(tmp_path):
+    writer = HistoryWriter(str(tmp_path / "history.db"), max_pending=5)
+    for minute in range(50):
+        writer.submit(detection(f"2024-01-01 10:{minute:02d}:00"))
+    assert writer.flush()
+    assert writer.written + writer.dropped == 50
+
+
+def test_older_rollups_get_the_error_quote_column(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = HistoryStore(path)
+    with store.connection() as db:
+        db.execute("ALTER TABLE rollups DROP COLUMN quotes_error")
+    store.connection().close()
+
+    store = HistoryStore(path)
+    store.insert_many([dict(detection("2024-01-01 10:00:00"), quote_source="error")])
+    assert store.rollup_summary("day")[0]["quotes_error"] == 1
+
+
+def test_writer_retries_a_locked_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_store, "RETRY_SECONDS", 0)
+    writer = HistoryWriter(str(tmp_path / "history.db"))
+    assert writer.flush()
+    insert_many = writer.store.insert_many
+    failures = [sqlite3.OperationalError("database is locked")] * 2
+
+    def flaky(entries):
+        if failures:
+            raise failures.pop()
+        return insert_many(entries)
+
+    monkeypatch.setattr(writer.store, "insert_many", flaky)
+    writer.submit(detection("2024-01-01 10:00:00"))
+    assert writer.flush()
+    assert (writer.written, writer.dropped) == (1, 0)
+
+
+def test_writer_counts_a_batch_it_gives_up_on(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_store, "RETRY_SECONDS", 0)
+    writer = HistoryWriter(str(tmp_path / "history.db"))
+    assert writer.flush()
+
+    def locked(entries):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(writer.store, "insert_many", locked)
+    writer.submit(detection("2024-01-01 10:00:00"))
+    writer.submit(detection("2024-01-01 10:01:00"))
+    assert writer.flush()
+    assert (writer.written, writer.dropped) == (0, 2)
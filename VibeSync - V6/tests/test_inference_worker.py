@@ -0,0 +1,55 @@
+import pytest
+
+from services.inference_worker import InferenceWorker, WorkerClosed
+
+
+class FakeProcess:
+    pid = 1234
+
+    def __init__(self, target=None, args=(), daemon=None):
+        self.alive = False
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.alive = False
+
+    def join(self, timeout=None):
+        pass
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    worker = InferenceWorker()
+    worker.spawned = []
+
+    def process(*args, **kwargs):
+        worker.spawned.append(FakeProcess(*args, **kwargs))
+        return worker.spawned[-1]
+
+    monkeypatch.setattr(worker.context, "Process", process)
+    yield worker
+    worker._kill()
+
+
+def test_requests_after_shutdown_dont_start_a_worker(worker):
+    worker.shutdown()
+    # A warm-up or plan that was queued behind the shutdown
+    worker.plan_for(None)
+    with pytest.raises(WorkerClosed):
+        worker.request("ping")
+    assert not worker.check_health()
+    assert worker.spawned == []
+    assert worker.process is None
+
+
+def test_start_reopens_after_shutdown(worker):
+    worker.shutdown()
+    worker.start()
+    assert not worker.closed
+    assert len(worker.spawned) == 1
+    assert worker.process.is_alive()
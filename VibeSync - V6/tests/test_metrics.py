@@ -0,0 +1,24 @@
+from concurrent.futures import Future
+
+from services import metrics as metrics_module
+from services.metrics import Metrics
+
+
+def test_trace_written_after_pending_sinks(monkeypatch):
+    written = []
+    monkeypatch.setattr(metrics_module, "get_setting", lambda key, default=None: default)
+    monkeypatch.setattr(metrics_module, "write_trace", lambda trace, keep=20: written.append(trace))
+    metrics = Metrics()
+    trace = metrics.begin_cycle()
+    sink = Future()
+
+    metrics.end_cycle(trace, pending=[sink])
+    assert metrics.summary()["cycle"]["count"] == 1
+    assert written == []
+
+    # A sink that starts after the cycle ended still lands in that cycle's trace
+    with metrics.span("log", trace):
+        pass
+    sink.set_result(None)
+    assert written == [trace]
+    assert "log" in [event["name"] for event in trace.events]
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from tools.migrate_legacy_log import LegacyLogError, iter_array
+
+ENTRIES = [{"timestamp": f"2024-01-01 10:{minute:02d}:00", "emotion": "happy", "quote": "Café ☕"}
+           for minute in range(6)]
+
+
+def write_legacy(path, newline):
+    # Pretty-printed the way json.dump(..., indent=4) writes it, with the given line endings
+    text = json.dumps(ENTRIES, indent=4, ensure_ascii=False).replace("\n", newline)
+    path.write_bytes(text.encode("utf-8"))
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_resume_from_any_offset(tmp_path, newline):
+    path = tmp_path / "log.json"
+    write_legacy(path, newline)
+    items = list(iter_array(str(path)))
+    assert [entry for entry, _ in items] == ENTRIES
+
+    data = path.read_bytes()
+    for i, (_, end) in enumerate(items):
+        assert data[:end].rstrip().endswith(b"}")
+        assert [entry for entry, _ in iter_array(str(path), end)] == ENTRIES[i + 1:]
+
+
+def test_truncated_array(tmp_path):
+    path = tmp_path / "log.json"
+    path.write_bytes(json.dumps(ENTRIES).encode("utf-8")[:-40])
+    with pytest.raises(LegacyLogError):
+        list(iter_array(str(path)))
+
+
+def test_not_an_array(tmp_path):
+    path = tmp_path / "log.json"
+    path.write_text('{"timestamp": "2024-01-01 10:00:00"}')
+    with pytest.raises(LegacyLogError):
+        list(iter_array(str(path)))
@@ -0,0 +1,43 @@
+import numpy as np
+
+from services.perceptual_hash import ahash, dhash, find_similar, hamming
+
+
+def scene(seed=0, shape=(240, 320, 3)):
+    rng = np.random.default_rng(seed)
+    # Large blocks, like a face and background, rather than pixel noise
+    blocks = rng.integers(0, 256, (shape[0] // 40, shape[1] // 40, shape[2]), dtype=np.uint8)
+    return np.kron(blocks, np.ones((40, 40, 1), np.uint8))
+
+
+def test_hashes_are_64_bit():
+    for hash_fn in (ahash, dhash):
+        assert 0 <= hash_fn(scene()) < 2 ** 64
+
+
+def test_near_duplicates_hash_close():
+    image = scene()
+    noisy = np.clip(image.astype(np.int16) + np.random.default_rng(1).integers(-6, 7, image.shape), 0, 255)
+    brighter = np.clip(image.astype(np.int16) + 20, 0, 255).astype(np.uint8)
+    assert hamming(dhash(image), dhash(noisy.astype(np.uint8))) <= 5
+    assert hamming(dhash(image), dhash(brighter)) <= 5
+    # Scale doesn't matter; the hash is of a thumbnail
+    assert hamming(dhash(image), dhash(image[::2, ::2])) <= 5
+
+
+def test_different_scenes_hash_apart():
+    assert hamming(dhash(scene(0)), dhash(scene(1))) > 10
+    assert hamming(ahash(scene(0)), ahash(scene(1))) > 10
+
+
+def test_grey_and_colour_inputs():
+    grey = scene(shape=(240, 320, 1))[..., 0]
+    assert dhash(grey) == dhash(np.repeat(grey[..., None], 3, axis=2))
+
+
+def test_find_similar_returns_the_first_match():
+    candidates = [(0b1111, "far"), (0b0001, "near"), (0b0000, "same")]
+    assert find_similar(0b0000, candidates, 1) == (0b0001, "near")
+    assert find_similar(0b0000, candidates, 0) == (0b0000, "same")
+    assert find_similar(0b0000, candidates[:1], 3) is None
+    assert hamming(0b1010, 0b0101) == 4
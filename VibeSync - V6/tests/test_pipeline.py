@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.cycle_budget import CycleBudget, SkipCycle, StageFailed, StageTimeout
+from services.pipeline import Pipeline
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def source_fallback(error, value):
+    return "timeout" if isinstance(error, StageTimeout) else "error"
+
+
+def test_fallback_tells_a_failure_from_a_timeout(executor):
+    def fail(value):
+        raise RuntimeError("no quote")
+
+    budget = CycleBudget(10, executor)
+    pipeline = Pipeline(budget).stage("state", lambda: 1).stage("quote", fail, needs=("state",), fallback=source_fallback)
+    assert pipeline.run()["quote"] == "error"
+    assert budget.counters["quote_errors"] == 1
+
+    budget = CycleBudget(10, executor, stage_timeouts={"quote": 0.05})
+    pipeline = Pipeline(budget).stage("state", lambda: 1)
+    pipeline.stage("quote", lambda value: time.sleep(0.5), needs=("state",), fallback=source_fallback)
+    assert pipeline.run()["quote"] == "timeout"
+
+
+def test_failure_without_fallback_names_the_stage(executor):
+    def fail():
+        raise KeyError("emotion")
+
+    with pytest.raises(StageFailed) as e:
+        Pipeline(CycleBudget(10, executor)).stage("inference", fail).run()
+    assert e.value.stage == "inference"
+    assert isinstance(e.value.__cause__, KeyError)
+
+
+def test_skip_is_not_a_failure(executor):
+    def skip():
+        raise SkipCycle(reason="video call")
+
+    pipeline = Pipeline(CycleBudget(10, executor)).stage("busy_check", skip, fallback=source_fallback)
+    with pytest.raises(SkipCycle):
+        pipeline.run()
@@ -0,0 +1,79 @@
+import psutil
+import pytest
+from services import process_watcher
+from services.process_watcher import DEFAULT_VIDEO_APPS, ProcessWatcher, compile_app_patterns
+
+
+class FakeProcesses:
+    """Stands in for psutil's process table: pid -> (name, create time)."""
+
+    def __init__(self, table):
+        self.table = dict(table)
+        self.lookups = 0
+
+    def pids(self):
+        return list(self.table)
+
+    def process(self, pid):
+        if pid not in self.table:
+            raise psutil.NoSuchProcess(pid)
+        fake = self
+
+        class Process:
+            def name(self):
+                fake.lookups += 1
+                return fake.table[pid][0]
+
+            def create_time(self):
+                return fake.table[pid][1]
+
+        return Process()
+
+
+@pytest.fixture
+def processes(monkeypatch):
+    fake = FakeProcesses({1: ("systemd", 1.0), 200: ("bash", 5.0)})
+    monkeypatch.setattr(process_watcher.psutil, "pids", fake.pids)
+    monkeypatch.setattr(process_watcher.psutil, "Process", fake.process)
+    return fake
+
+
+def test_patterns_match_exact_names_and_regexes():
+    matcher = compile_app_patterns(["zoom", "re:^cpthost$"])
+    assert matcher.search("zoom")
+    assert matcher.search("cpthost")
+    assert not matcher.search("zoomer")
+
+
+def test_slack_is_not_a_video_app_by_default():
+    assert not compile_app_patterns(DEFAULT_VIDEO_APPS).search("slack")
+
+
+def test_only_new_pids_are_inspected(processes):
+    watcher = ProcessWatcher(apps=["zoom"])
+    assert watcher.find_video_app() is None
+    processes.table[300] = ("Zoom.exe", 10.0)
+    assert watcher.find_video_app() == "Zoom.exe"
+    assert watcher.last_inspected == 1
+    del processes.table[300]
+    assert watcher.find_video_app() is None
+
+
+def test_reused_pid_is_not_trusted(processes):
+    watcher = ProcessWatcher(apps=["zoom"])
+    processes.table[300] = ("zoom", 10.0)
+    assert watcher.find_video_app() == "zoom"
+    # Zoom exits and an unrelated process gets the same PID before the next check
+    processes.table[300] = ("python", 20.0)
+    assert watcher.find_video_app() is None
+
+
+def test_changing_the_app_list_rematches_known_processes(processes, monkeypatch):
+    settings = {"video_call_apps": ["zoom"]}
+    monkeypatch.setattr(process_watcher, "get_setting", lambda key, default=None: settings.get(key, default))
+    watcher = ProcessWatcher()
+    assert watcher.find_video_app() is None
+    settings["video_call_apps"] = ["bash"]
+    lookups = processes.lookups
+    assert watcher.find_video_app() == "bash"
+    assert processes.lookups == lookups
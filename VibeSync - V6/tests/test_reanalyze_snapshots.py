@@ -0,0 +1,50 @@
+import json
+from tools.reanalyze_snapshots import load_done, match_log_entries
+
+
+def _write(path, results):
+    with open(path, "w") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+
+def test_load_done_is_per_backend(tmp_path):
+    results = tmp_path / "reanalysis.jsonl"
+    _write(results, [
+        {"snapshot": "a.jpg", "backend": "DeepFace", "emotion": "sad"},
+        {"snapshot": "b.jpg", "backend": "OpenCV DNN", "emotion": "happy"},
+        {"snapshot": "c.jpg", "emotion": "fear"},
+    ])
+    with open(results, "a") as f:
+        f.write('{"snapshot": "d.jpg", "back')  # torn by an interrupted run
+    assert set(load_done(str(results), "DeepFace")) == {"a.jpg"}
+    assert set(load_done(str(results), "OpenCV DNN")) == {"b.jpg"}
+    assert load_done(str(tmp_path / "missing.jsonl"), "DeepFace") == {}
+
+
+def test_match_log_entries_takes_the_next_detection():
+    results = {
+        "2025-06-01_10-00-00.jpg": {"snapshot": "2025-06-01_10-00-00.jpg", "emotion": "sad"},
+        "2025-06-01_11-00-00.jpg": {"snapshot": "2025-06-01_11-00-00.jpg", "emotion": "happy"},
+        "2025-06-01_12-00-00.jpg": {"snapshot": "2025-06-01_12-00-00.jpg", "emotion": None},
+    }
+    # The 11:00 snapshot has no detection within the tolerance
+    timestamps = ["2025-06-01 10:00:05", "2025-06-01 11:30:00", "2025-06-01 12:00:01"]
+    matches = match_log_entries(timestamps, results)
+    assert list(matches) == ["2025-06-01 10:00:05"]
+    assert matches["2025-06-01 10:00:05"]["emotion"] == "sad"
+
+
+def test_apply_to_log_keeps_reanalysis_out_of_the_event_log(tmp_path, monkeypatch):
+    from services.event_log import read_events
+    from tools import reanalyze_snapshots
+
+    monkeypatch.setattr(reanalyze_snapshots, "LEGACY_LOG_FILE", str(tmp_path / "log.json"))
+    events, reanalysis = tmp_path / "events.jsonl", tmp_path / "events-reanalysis.jsonl"
+    _write(events, [{"event": "detection", "timestamp": "2025-06-01 10:00:05", "emotion": "happy"}])
+    results = {"2025-06-01_10-00-00.jpg": {"snapshot": "2025-06-01_10-00-00.jpg", "emotion": "sad", "scores": {}}}
+
+    reanalyze_snapshots.apply_to_log(results, "DeepFace", str(events), str(reanalysis))
+    reanalyze_snapshots.apply_to_log(results, "DeepFace", str(events), str(reanalysis))
+    assert [e["event"] for e in read_events(str(events))] == ["detection"]
+    assert [(e["timestamp"], e["emotion"]) for e in read_events(str(reanalysis))] == [("2025-06-01 10:00:05", "sad")]
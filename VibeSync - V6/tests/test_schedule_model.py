@@ -0,0 +1,135 @@
+from datetime import datetime
+
+import pytest
+
+from services.schedule_model import (
+    DEFAULT_WORK_HOURS, CronExpression, DetectionSchedule, ScheduleError, WeeklyWindows, schedule_from_settings,
+)
+
+# 2024-01-01 is a Monday
+MONDAY = datetime(2024, 1, 1)
+
+
+def test_cron_fields():
+    cron = CronExpression("*/15 9-17 * * mon-fri")
+    assert cron.minutes == [0, 15, 30, 45]
+    assert cron.hours == list(range(9, 18))
+    assert cron.weekdays == [0, 1, 2, 3, 4]
+
+
+def test_cron_sunday_is_0_and_7():
+    assert CronExpression("0 0 * * 0").weekdays == [6]
+    assert CronExpression("0 0 * * 7").weekdays == [6]
+    assert CronExpression("0 0 * * sun").weekdays == [6]
+
+
+def test_cron_step_from_a_value():
+    assert CronExpression("5/20 * * * *").minutes == [5, 25, 45]
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *",
+    "60 * * * *",
+    "* 24 * * *",
+    "*/0 * * * *",
+    "* * * foo *",
+    "5-1 * * * *",
+])
+def test_cron_rejects_bad_expressions(expression):
+    with pytest.raises(ScheduleError):
+        CronExpression(expression)
+
+
+def test_cron_next_fire():
+    cron = CronExpression("*/15 9-17 * * mon-fri")
+    assert cron.next_at_or_after(MONDAY.replace(hour=9, minute=7)) == MONDAY.replace(hour=9, minute=15)
+    assert cron.next_at_or_after(MONDAY.replace(hour=9, minute=15)) == MONDAY.replace(hour=9, minute=15)
+    # Friday evening rolls over to Monday morning
+    assert cron.next_at_or_after(datetime(2024, 1, 5, 17, 50)) == datetime(2024, 1, 8, 9, 0)
+
+
+def test_cron_either_day_field_matches():
+    # The 15th, or any Sunday
+    cron = CronExpression("0 12 15 * sun")
+    assert cron.next_at_or_after(MONDAY) == datetime(2024, 1, 7, 12, 0)
+    assert cron.next_at_or_after(datetime(2024, 1, 8)) == datetime(2024, 1, 14, 12, 0)
+    assert cron.next_at_or_after(datetime(2024, 1, 14, 13)) == datetime(2024, 1, 15, 12, 0)
+
+
+def test_cron_month_and_year_rollover():
+    assert CronExpression("0 0 1 jan *").next_at_or_after(MONDAY.replace(minute=1)) == datetime(2025, 1, 1)
+    assert CronExpression("30 6 29 feb *").next_at_or_after(datetime(2024, 3, 1)) == datetime(2028, 2, 29, 6, 30)
+
+
+def test_cron_impossible_date_never_fires():
+    with pytest.raises(ScheduleError):
+        CronExpression("0 0 31 feb *").next_at_or_after(MONDAY)
+
+
+def test_windows_work_hours_and_quiet_periods():
+    windows = WeeklyWindows({"mon-fri": ["09:00-17:00"]}, ["12:00-13:00"])
+    assert windows.next_allowed(MONDAY.replace(hour=10)) == MONDAY.replace(hour=10)
+    assert windows.next_allowed(MONDAY.replace(hour=12, minute=30)) == MONDAY.replace(hour=13)
+    assert windows.next_allowed(MONDAY.replace(hour=7)) == MONDAY.replace(hour=9)
+    # Saturday waits for the next week's Monday
+    assert windows.next_allowed(datetime(2024, 1, 6, 10)) == datetime(2024, 1, 8, 9)
+
+
+def test_windows_past_midnight_wrap_into_next_week():
+    windows = WeeklyWindows({"sun": "22:00-02:00"})
+    assert windows.next_allowed(MONDAY.replace(hour=1)) == MONDAY.replace(hour=1)
+    assert windows.next_allowed(MONDAY.replace(hour=3)) == datetime(2024, 1, 7, 22)
+
+
+def test_windows_that_leave_no_time():
+    with pytest.raises(ScheduleError):
+        WeeklyWindows(None, ["00:00-24:00"])
+
+
+def test_schedule_interval_respects_windows():
+    schedule = DetectionSchedule(windows=WeeklyWindows({"mon-fri": ["09:00-17:00"]}))
+    assert schedule.next_fire(MONDAY.replace(hour=9), 600) == MONDAY.replace(hour=9, minute=10)
+    assert schedule.next_fire(MONDAY.replace(hour=16, minute=55), 600) == datetime(2024, 1, 2, 9)
+    assert DetectionSchedule().is_plain_interval
+
+
+def test_schedule_cron_inside_windows():
+    schedule = DetectionSchedule("0 * * * *", WeeklyWindows(DEFAULT_WORK_HOURS))
+    assert schedule.next_fire(MONDAY.replace(hour=11)) == MONDAY.replace(hour=13)
+    assert schedule.next_fire(MONDAY.replace(hour=16)) == datetime(2024, 1, 2, 9)
+
+
+def test_schedule_from_settings_falls_back_on_bad_cron():
+    settings = {"monitoring_schedule": "Custom", "schedule_cron": "every minute"}
+    schedule = schedule_from_settings(lambda key, default=None: settings.get(key, default))
+    assert schedule.is_plain_interval
+
+
+def test_schedule_from_settings_builds_cron():
+    settings = {"monitoring_schedule": "Custom (cron)", "schedule_cron": "*/5 * * * *", "active_hours": "Work hours"}
+    schedule = schedule_from_settings(lambda key, default=None: settings.get(key, default))
+    assert schedule.cron.minutes == list(range(0, 60, 5))
+    assert not schedule.windows.always
+
+
+def test_cron_month_names_and_lists():
+    cron = CronExpression("0 9 1 jan,jul *")
+    assert cron.months == [1, 7]
+    assert cron.next_at_or_after(datetime(2024, 2, 1)) == datetime(2024, 7, 1, 9, 0)
+
+
+def test_windows_day_ranges_wrap_the_week():
+    windows = WeeklyWindows({"fri-mon": "10:00-11:00"})
+    # Saturday and Sunday are inside the wrapped range; Tuesday isn't
+    assert windows.next_allowed(datetime(2024, 1, 6, 10, 30)) == datetime(2024, 1, 6, 10, 30)
+    assert windows.next_allowed(datetime(2024, 1, 2, 10, 30)) == datetime(2024, 1, 5, 10, 0)
+
+
+@pytest.mark.parametrize("spec", [{"someday": "09:00-10:00"}, {"mon": "9am-5pm"}, {"mon": "09:00-25:00"}])
+def test_windows_reject_bad_specs(spec):
+    with pytest.raises(ScheduleError):
+        WeeklyWindows(spec)
+
+
+def test_quiet_hours_alone_arent_a_plain_interval():
+    assert not DetectionSchedule(windows=WeeklyWindows(None, ["22:00-07:00"])).is_plain_interval
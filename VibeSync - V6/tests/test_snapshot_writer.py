@@ -0,0 +1,69 @@
+import os
+import time
+
+import pytest
+
+from services.snapshot_writer import SnapshotWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    return SnapshotWriter(str(tmp_path / "snapshots"))
+
+
+def add_snapshot(writer, name, size=1000, age_days=0.0):
+    path = os.path.join(writer.directory, name)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    mtime = time.time() - age_days * 86400
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def remaining(writer):
+    return sorted(os.path.basename(p) for p in os.listdir(writer.directory))
+
+
+def test_count_limit_evicts_oldest_first(writer):
+    for i in range(5):
+        add_snapshot(writer, f"{i}.jpg", age_days=5 - i)
+    writer._load_index()
+    writer._enforce_retention({"snapshot_max_count": 3})
+    assert remaining(writer) == ["2.jpg", "3.jpg", "4.jpg"]
+    assert len(writer.index) == 3
+    assert writer.total_bytes == 3000
+
+
+def test_size_limit(writer):
+    for i in range(4):
+        add_snapshot(writer, f"{i}.jpg", size=400 * 1024, age_days=4 - i)
+    writer._load_index()
+    writer._enforce_retention({"snapshot_max_mb": 1})
+    assert remaining(writer) == ["2.jpg", "3.jpg"]
+    assert writer.total_bytes == 800 * 1024
+
+
+def test_age_limit(writer):
+    add_snapshot(writer, "old.jpg", age_days=40)
+    add_snapshot(writer, "new.jpg", age_days=1)
+    writer._load_index()
+    writer._enforce_retention({"snapshot_max_age_days": 30})
+    assert remaining(writer) == ["new.jpg"]
+
+
+def test_evicted_snapshots_are_no_dedup_target(writer):
+    old = add_snapshot(writer, "old.jpg", age_days=2)
+    add_snapshot(writer, "new.jpg")
+    writer.recent.append((0b1010, old))
+    writer._load_index()
+    writer._enforce_retention({"snapshot_max_count": 1})
+    assert list(writer.recent) == []
+
+
+def test_already_deleted_files_are_skipped(writer):
+    gone = add_snapshot(writer, "gone.jpg", age_days=2)
+    add_snapshot(writer, "kept.jpg")
+    writer._load_index()
+    os.remove(gone)
+    writer._enforce_retention({"snapshot_max_count": 1})
+    assert remaining(writer) == ["kept.jpg"]
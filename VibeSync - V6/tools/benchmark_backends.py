@@ -0,0 +1,112 @@
+"""Compare emotion backends on the same face crops.
+
+Run from the app folder:
+
+    python -m tools.benchmark_backends [image_dir] [--backends "DeepFace" "OpenCV DNN"]
+
+Each backend is measured in a fresh process so import time and memory are
+not shared between them.
+"""
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import queue as queue_module
+import time
+import cv2
+import psutil
+
+DEFAULT_IMAGES = "data/snapshots"
+
+
+def load_faces(image_dir):
+    from services.face_detector import detect_faces, largest_face, crop_face
+
+    faces, names = [], []
+    for path in sorted(glob.glob(os.path.join(image_dir, "*.jpg"))):
+        frame = cv2.imread(path)
+        box = largest_face(detect_faces(frame)) if frame is not None else None
+        if box is not None:
+            faces.append(crop_face(frame, box))
+            names.append(os.path.basename(path))
+    return faces, names
+
+
+def _measure(backend_name, image_dir, repeats, queue):
+    process = psutil.Process()
+    faces, names = load_faces(image_dir)
+    rss_before = process.memory_info().rss
+
+    started = time.perf_counter()
+    from services.emotion_backends import create_backend
+    backend = create_backend(backend_name)
+    backend.load()
+    backend.warm_up()
+    load_seconds = time.perf_counter() - started
+
+    single, scores = [], []
+    for face in faces:
+        t = time.perf_counter()
+        scores.extend(backend.predict_batch([face]))
+        single.append(time.perf_counter() - t)
+
+    batched = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        scores = backend.predict_batch(faces)
+        batched.append(time.perf_counter() - t)
+
+    queue.put({
+        "backend": backend_name,
+        "load_seconds": round(load_seconds, 2),
+        "rss_mb": round((process.memory_info().rss - rss_before) / 2**20, 1),
+        "ms_per_frame": round(1000 * sum(single) / max(len(single), 1), 2),
+        "ms_per_frame_batched": round(1000 * min(batched) / max(len(faces), 1), 2) if batched else None,
+        "dominant": {name: max(s, key=s.get) for name, s in zip(names, scores)},
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("image_dir", nargs="?", default=DEFAULT_IMAGES)
+    parser.add_argument("--backends", nargs="+", default=["DeepFace", "OpenCV DNN"])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    context = mp.get_context("spawn")
+    results = []
+    for name in args.backends:
+        queue = context.Queue()
+        process = context.Process(target=_measure, args=(name, args.image_dir, args.repeats, queue))
+        process.start()
+        # Read before joining: the child can't exit until its result is consumed
+        result = None
+        while result is None and (process.is_alive() or not queue.empty()):
+            try:
+                result = queue.get(timeout=1)
+            except queue_module.Empty:
+                pass
+        process.join()
+        if result is None:
+            print(f"[Benchmark] {name} failed (exit code {process.exitcode})")
+            continue
+        results.append(result)
+
+    if not results:
+        return
+    print(f"{'backend':<12} {'load s':>8} {'RSS MB':>8} {'ms/frame':>9} {'batched':>9}")
+    for r in results:
+        # No batched timing with --repeats 0
+        batched = "-" if r["ms_per_frame_batched"] is None else r["ms_per_frame_batched"]
+        print(f"{r['backend']:<12} {r['load_seconds']:>8} {r['rss_mb']:>8} {r['ms_per_frame']:>9} {batched:>9}")
+
+    if len(results) > 1:
+        first, other = results[0]["dominant"], results[1]["dominant"]
+        agree = sum(1 for name in first if other.get(name) == first[name])
+        print(f"Dominant emotion agreement ({results[0]['backend']} vs {results[1]['backend']}): {agree}/{len(first)}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Export detection history from the SQLite store.
+
+Run from the app folder:
+
+    python -m tools.export_history [--since 2025-06-01] [--until 2025-07-01] [--emotion sad] [--format csv|json] [-o file]
+    python -m tools.export_history --summary day
+    python -m tools.export_history --rebuild
+
+--rebuild loads every detection and skip from the event log into the store
+first (already stored ones are skipped), e.g. after deleting data/history.db,
+and recomputes the hourly and daily rollups.
+
+--summary hour/day without --emotion or --window reads the rollups, so it
+costs one row per hour or day however long the history is.
+"""
+import argparse
+import csv
+import json
+import sys
+
+PAGE_SIZE = 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--since", help="Start, inclusive (YYYY-MM-DD[ HH:MM:SS])")
+    parser.add_argument("--until", help="End, exclusive")
+    parser.add_argument("--emotion")
+    parser.add_argument("--window", help="Exact active window title")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--summary", choices=["emotion", "active_window", "hour", "day", "hour_of_day"],
+                        help="Print grouped counts and averages instead of rows")
+    parser.add_argument("--rebuild", action="store_true", help="Import the event log into the store first")
+    parser.add_argument("-o", "--output", help="Write here instead of stdout")
+    args = parser.parse_args()
+
+    from services.history_store import HistoryStore, COLUMNS
+    store = HistoryStore()
+    if args.rebuild:
+        from services.event_log import read_events
+        stats = {}
+        seen, inserted = store.import_events(read_events(stats=stats))
+        print(f"[Export] Event log: {seen} events, {inserted} new, {stats.get('skipped', 0)} bad lines skipped.",
+              file=sys.stderr)
+        print(f"[Export] Rebuilt {store.rebuild_rollups()} rollup buckets.", file=sys.stderr)
+
+    filters = dict(start=args.since, end=args.until, emotion=args.emotion, active_window=args.window)
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.summary in ("hour", "day") and not (args.emotion or args.window):
+            json.dump(store.rollup_summary(args.summary, args.since, args.until), out, indent=2)
+            out.write("\n")
+            return
+        if args.summary:
+            json.dump(store.aggregate(by=args.summary, **filters), out, indent=2)
+            out.write("\n")
+            return
+        writer = csv.DictWriter(out, fieldnames=["id"] + COLUMNS) if args.format == "csv" else None
+        if writer:
+            writer.writeheader()
+        # Page through the range so a long history is never held in memory at once
+        offset = 0
+        while True:
+            rows = store.query(limit=PAGE_SIZE, offset=offset, **filters)
+            for row in rows:
+                if writer:
+                    writer.writerow(row)
+                else:
+                    out.write(json.dumps(row) + "\n")
+            if len(rows) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
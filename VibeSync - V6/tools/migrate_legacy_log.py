@@ -0,0 +1,301 @@
+"""Convert the legacy data/log.json array into the event log and history database.
+
+Run from the app folder, with VibeSync stopped:
+
+    python -m tools.migrate_legacy_log [--batch-size 500] [--keep-legacy]
+
+The array is parsed one entry at a time, so memory stays flat however big
+the file is. Entries go in batches into sealed, gzipped event log segments
+and into data/history.db. Timestamps already in the database are skipped,
+so running it twice adds nothing. Progress is checkpointed after every
+batch in data/migration_state.json; an interrupted run picks up from there.
+
+Afterwards the legacy file is read once more and every timestamp in it is
+checked against the database. If none are missing it is renamed to
+data/log.json.migrated (kept in place with --keep-legacy).
+"""
+import argparse
+import io
+import json
+import os
+import sys
+
+LEGACY_LOG_FILE = "data/log.json"
+STATE_FILE = "data/migration_state.json"
+# Entries being written into the next segment; inside the segment folder but not an events-* name
+PART_FILE = "legacy-part.jsonl"
+CHUNK_SIZE = 1 << 20
+# An entry bigger than this means the file is damaged, not that the chunk was too small
+MAX_ENTRY_CHARS = 16 << 20
+
+
+class LegacyLogError(ValueError):
+    """The legacy log isn't a readable JSON array."""
+
+
+def iter_array(path, offset=0):
+    """Yield (entry, end) for each element of the top-level JSON array in `path`.
+
+    `end` is the byte offset just past the element; pass it back as
+    `offset` to continue after it.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "rb") as raw:
+        raw.seek(offset)
+        # newline="" keeps \r\n as two characters, so counting characters' bytes matches the file
+        reader = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        buf, pos, eof = "", 0, False
+
+        def peek():
+            # Next non-blank character, reading more as needed; None at end of file
+            nonlocal buf, pos, eof, offset
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                    offset += 1
+                if pos < len(buf) or eof:
+                    return buf[pos] if pos < len(buf) else None
+                chunk = reader.read(CHUNK_SIZE)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+
+        if offset == 0:
+            if peek() != "[":
+                raise LegacyLogError(f"{path} doesn't start with a JSON array")
+            pos += 1
+            offset += 1
+        while True:
+            char = peek()
+            if char == "]":
+                return
+            if char is None:
+                raise LegacyLogError(f"{path} ends before the closing ] (truncated at byte {offset})")
+            if char == ",":
+                pos += 1
+                offset += 1
+                continue
+            try:
+                entry, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof or len(buf) - pos > MAX_ENTRY_CHARS:
+                    raise LegacyLogError(f"Unreadable entry at byte {offset} of {path}")
+                chunk = reader.read(CHUNK_SIZE)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            offset += len(buf[pos:end].encode("utf-8"))
+            pos = end
+            yield entry, offset
+
+
+# --- Checkpoint ---
+def _source_id(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def load_state(legacy):
+    fresh = {"source": _source_id(legacy), "offset": 0, "part_bytes": 0, "parsed": 0, "invalid": 0,
+             "added": 0, "duplicates": 0, "segments": 0}
+    try:
+        with open(STATE_FILE) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return fresh
+    if state.get("source") != fresh["source"]:
+        print("[Migrate] The legacy log changed since the interrupted run; starting over.")
+        return fresh
+    print(f"[Migrate] Resuming after {state['parsed']} entries (byte {state['offset']}).")
+    return state
+
+
+def save_state(state):
+    with open(STATE_FILE + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(STATE_FILE + ".tmp", STATE_FILE)
+
+
+def recover_part(part, state):
+    """Timestamps written to the part file after the last checkpoint.
+
+    A batch is appended before it is inserted and checkpointed, so after a
+    crash these entries must not be appended again, but may still be
+    missing from the database.
+    """
+    if not os.path.exists(part):
+        return set()
+    with open(part, "rb+") as f:
+        data = f.read()
+        # Drop a torn last line
+        f.truncate(data.rfind(b"\n") + 1)
+    tail = data[min(state["part_bytes"], len(data)):data.rfind(b"\n") + 1]
+    timestamps = set()
+    for line in tail.splitlines():
+        try:
+            timestamps.add(json.loads(line)["timestamp"])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return timestamps
+
+
+# --- Migration ---
+class Migration:
+    def __init__(self, legacy, event_file, store, batch_size, segment_bytes):
+        from services.event_log import segment_dir
+
+        self.legacy = legacy
+        self.event_file = event_file
+        self.store = store
+        self.batch_size = batch_size
+        self.segment_bytes = segment_bytes
+        self.part = os.path.join(segment_dir(event_file), PART_FILE)
+        self.state = load_state(legacy)
+        self.tail = recover_part(self.part, self.state)
+
+    def run(self):
+        batch, parsed, invalid, end = [], 0, 0, self.state["offset"]
+        for entry, end in iter_array(self.legacy, self.state["offset"]):
+            parsed += 1
+            if not isinstance(entry, dict) or not isinstance(entry.get("timestamp"), str) or "emotion" not in entry:
+                invalid += 1
+                continue
+            batch.append(entry)
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch, end, parsed, invalid)
+                batch, parsed, invalid = [], 0, 0
+        if batch or parsed:
+            self.write_batch(batch, end, parsed, invalid)
+        if os.path.exists(self.part) and os.path.getsize(self.part):
+            self.seal()
+
+    def write_batch(self, entries, end, parsed, invalid):
+        in_db = self.store.existing_timestamps(entry["timestamp"] for entry in entries)
+        new, duplicates = [], 0
+        for entry in entries:
+            if entry["timestamp"] in in_db:
+                duplicates += 1
+                continue
+            in_db.add(entry["timestamp"])
+            new.append(dict({"event": "detection"}, **entry))
+
+        lines = [json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n"
+                 for entry in new if entry["timestamp"] not in self.tail]
+        if lines:
+            os.makedirs(os.path.dirname(self.part), exist_ok=True)
+            with open(self.part, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        self.store.insert_many(new)
+        self.tail.clear()
+
+        state = self.state
+        state["offset"] = end
+        state["part_bytes"] = os.path.getsize(self.part) if os.path.exists(self.part) else 0
+        state["parsed"] += parsed
+        state["invalid"] += invalid
+        state["added"] += len(new)
+        state["duplicates"] += duplicates
+        save_state(state)
+        print(f"[Migrate] {state['parsed']} entries read, {state['added']} added, "
+              f"{state['duplicates']} already stored.")
+        if state["part_bytes"] >= self.segment_bytes:
+            self.seal()
+
+    def seal(self):
+        from services.event_log import compress_segment, seal_segment
+
+        first = last = None
+        entries = 0
+        for entry in _read_lines(self.part):
+            entries += 1
+            first = entry["timestamp"] if first is None else min(first, entry["timestamp"])
+            last = entry["timestamp"] if last is None else max(last, entry["timestamp"])
+        name = seal_segment(self.event_file, self.part, first, last, entries)
+        compress_segment(self.event_file, name)
+        self.state["part_bytes"] = 0
+        self.state["segments"] += 1
+        save_state(self.state)
+        print(f"[Migrate] Sealed {entries} entries into segment {name}.")
+
+
+def _read_lines(path):
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def validate(legacy, store, batch_size):
+    """Read the legacy log again and check every timestamp against the database."""
+    counts = {"entries": 0, "invalid": 0, "stored": 0, "missing": 0}
+    batch = []
+
+    def check():
+        found = store.existing_timestamps(batch)
+        counts["stored"] += sum(1 for timestamp in batch if timestamp in found)
+        counts["missing"] += sum(1 for timestamp in batch if timestamp not in found)
+        batch.clear()
+
+    for entry, _ in iter_array(legacy):
+        counts["entries"] += 1
+        if not isinstance(entry, dict) or not isinstance(entry.get("timestamp"), str) or "emotion" not in entry:
+            counts["invalid"] += 1
+            continue
+        batch.append(entry["timestamp"])
+        if len(batch) >= batch_size:
+            check()
+    check()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--legacy", default=LEGACY_LOG_FILE)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--keep-legacy", action="store_true", help="Don't rename the legacy file afterwards")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.legacy):
+        print(f"[Migrate] {args.legacy} not found; nothing to migrate.")
+        return
+
+    from services.app_settings import get_setting
+    from services.event_log import EVENT_LOG_FILE, read_events
+    from services.history_store import HistoryStore
+
+    store = HistoryStore()
+    # The database is the index duplicates are checked against, so bring it up to date first
+    seen, inserted = store.import_events(read_events(EVENT_LOG_FILE))
+    if inserted:
+        print(f"[Migrate] Loaded {inserted} of {seen} event log entries into the database first.")
+
+    segment_bytes = int(float(get_setting("event_log_segment_mb", 8)) * 1024 * 1024) or CHUNK_SIZE * 8
+    try:
+        migration = Migration(args.legacy, EVENT_LOG_FILE, store, args.batch_size, segment_bytes)
+        migration.run()
+        counts = validate(args.legacy, store, args.batch_size)
+    except LegacyLogError as e:
+        print(f"[Migrate Error] {e}. Entries before that point were migrated; rerun to retry.")
+        sys.exit(1)
+
+    state = migration.state
+    print(f"[Migrate] Legacy log: {counts['entries']} entries, {counts['invalid']} without a timestamp or emotion.")
+    print(f"[Migrate] Migrated: {state['added']} added, {state['duplicates']} already stored, "
+          f"{state['segments']} segments written.")
+    if counts["missing"] or counts["entries"] != state["parsed"]:
+        print(f"[Migrate Error] Validation failed: {counts['missing']} timestamps missing from the database, "
+              f"{state['parsed']} entries migrated of {counts['entries']}. The legacy file was left in place.")
+        sys.exit(1)
+    print(f"[Migrate] Validated: all {counts['stored']} timestamps are in the database.")
+    if os.path.exists(STATE_FILE):
+        os.remove(STATE_FILE)
+    if not args.keep_legacy:
+        os.replace(args.legacy, args.legacy + ".migrated")
+        print(f"[Migrate] Renamed {args.legacy} to {args.legacy}.migrated.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Re-score the snapshot archive with the current emotion backend.
+
+Run from the app folder:
+
+    python -m tools.reanalyze_snapshots [--backend "OpenCV DNN"] [--workers 8]
+
+Results are appended to data/reanalysis.jsonl as they arrive, tagged with
+the backend, so an interrupted run picks up where it stopped and a run with
+another backend scores everything again. Once every snapshot is scored,
+each result that matches a logged detection is appended to
+data/events-reanalysis.jsonl as a "reanalysis" event with that detection's
+timestamp.
+"""
+import argparse
+import bisect
+import glob
+import json
+import multiprocessing as mp
+import os
+import time
+from datetime import datetime
+
+SNAPSHOT_DIR = "data/snapshots"
+# Written by versions before the event log; read if it's still around
+LEGACY_LOG_FILE = "data/log.json"
+RESULTS_FILE = "data/reanalysis.jsonl"
+SNAPSHOT_FORMAT = "%Y-%m-%d_%H-%M-%S"
+LOG_FORMAT = "%Y-%m-%d %H:%M:%S"
+# A log entry is written a moment after its snapshot; this is how late it may be
+MATCH_TOLERANCE_SECONDS = 120
+
+_backend = None
+
+
+def _init_worker(backend_name):
+    # One single-threaded model per core beats N models fighting over all cores
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("TF_NUM_INTRAOP_THREADS", "1")
+    os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+    import cv2
+    cv2.setNumThreads(1)
+
+    from services.emotion_backends import create_backend
+    global _backend
+    _backend = create_backend(backend_name)
+    _backend.load()
+
+
+def _score_batch(paths):
+    import cv2
+    from services.face_detector import detect_faces, largest_face, crop_face
+
+    crops, scored_paths, results = [], [], []
+    for path in paths:
+        frame = cv2.imread(path)
+        box = largest_face(detect_faces(frame)) if frame is not None else None
+        if box is None:
+            results.append({"snapshot": os.path.basename(path), "backend": _backend.name,
+                            "emotion": None, "reason": "no face"})
+            continue
+        crops.append(crop_face(frame, box))
+        scored_paths.append(path)
+
+    if crops:
+        for path, scores in zip(scored_paths, _backend.predict_batch(crops)):
+            results.append({
+                "snapshot": os.path.basename(path),
+                "backend": _backend.name,
+                "emotion": max(scores, key=scores.get),
+                "scores": {label: round(value, 2) for label, value in scores.items()},
+            })
+    return results
+
+
+def _read_jsonl(path):
+    with open(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+
+
+def load_done(results_file, backend_name):
+    """Results already scored by `backend_name`, by snapshot name.
+
+    Lines without a backend come from before results were tagged; they are
+    scored again rather than guessed at.
+    """
+    if not os.path.exists(results_file):
+        return {}
+    return {result["snapshot"]: result for result in _read_jsonl(results_file)
+            if result.get("backend") == backend_name}
+
+
+def snapshot_time(name):
+    try:
+        return datetime.strptime(os.path.splitext(name)[0], SNAPSHOT_FORMAT)
+    except ValueError:
+        return None
+
+
+def match_log_entries(timestamps, results):
+    """Map each result to the first detection logged at or shortly after its snapshot.
+
+    Returns {detection timestamp: result}.
+    """
+    sorted_times = sorted({datetime.strptime(stamp, LOG_FORMAT) for stamp in timestamps})
+
+    matches = {}
+    for result in results.values():
+        taken = snapshot_time(result["snapshot"])
+        if taken is None or result.get("emotion") is None:
+            continue
+        position = bisect.bisect_left(sorted_times, taken)
+        if position < len(sorted_times) and (sorted_times[position] - taken).total_seconds() <= MATCH_TOLERANCE_SECONDS:
+            matches[sorted_times[position].strftime(LOG_FORMAT)] = result
+    return matches
+
+
+def logged_detections(event_file, reanalysis_file):
+    """Timestamps of every logged detection, and the reanalyses already recorded."""
+    from services.event_log import read_events
+
+    timestamps, reanalysed = [], set()
+    # Older versions appended reanalysis events to the event log itself
+    for entry in read_events(event_file):
+        if entry.get("event", "detection") == "detection":
+            timestamps.append(entry["timestamp"])
+        elif entry["event"] == "reanalysis":
+            reanalysed.add((entry["timestamp"], entry["backend"], entry["snapshot"]))
+    for entry in read_events(reanalysis_file):
+        if entry.get("event") == "reanalysis":
+            reanalysed.add((entry["timestamp"], entry["backend"], entry["snapshot"]))
+    if os.path.exists(LEGACY_LOG_FILE):
+        with open(LEGACY_LOG_FILE) as f:
+            timestamps.extend(entry["timestamp"] for entry in json.load(f))
+    return timestamps, reanalysed
+
+
+def apply_to_log(results, backend_name, event_file=None, reanalysis_file=None):
+    from services.event_log import EVENT_LOG_FILE, REANALYSIS_LOG_FILE, EventLog
+
+    event_file = event_file or EVENT_LOG_FILE
+    reanalysis_file = reanalysis_file or REANALYSIS_LOG_FILE
+    timestamps, reanalysed = logged_detections(event_file, reanalysis_file)
+    matches = match_log_entries(timestamps, results)
+    log, added = EventLog(reanalysis_file), 0
+    for timestamp, result in sorted(matches.items()):
+        if (timestamp, backend_name, result["snapshot"]) in reanalysed:
+            continue
+        log.append({
+            "event": "reanalysis",
+            "timestamp": timestamp,
+            "backend": backend_name,
+            "snapshot": result["snapshot"],
+            "emotion": result["emotion"],
+            "scores": result["scores"],
+        })
+        added += 1
+    log.close()
+    print(f"[Reanalyze] Matched {len(matches)} of {len(timestamps)} detections, {added} new reanalysis events.")
+
+
+def add_references(results, snapshot_dir):
+    """Deduplicated snapshots share the result of the image they point at."""
+    references_file = os.path.join(snapshot_dir, "references.jsonl")
+    if not os.path.exists(references_file):
+        return
+    for reference in _read_jsonl(references_file):
+        source = results.get(os.path.basename(reference["same_as"]))
+        name = os.path.basename(reference["snapshot"])
+        if source is not None and name not in results:
+            results[name] = dict(source, snapshot=name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default=None, help="Backend name (defaults to the emotion_backend setting)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--snapshots", default=SNAPSHOT_DIR)
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--no-apply", action="store_true", help="Only write the results file, not reanalysis events")
+    args = parser.parse_args()
+
+    from services.app_settings import get_setting
+    from services.emotion_backends import BACKENDS
+    backend_name = args.backend or get_setting("emotion_backend", "DeepFace")
+    if backend_name not in BACKENDS:
+        parser.error(f"Unknown backend '{backend_name}'; choose from {', '.join(BACKENDS)}")
+
+    done = load_done(args.results, backend_name)
+    paths = sorted(glob.glob(os.path.join(args.snapshots, "*.jpg")))
+    todo = [path for path in paths if os.path.basename(path) not in done]
+    print(f"[Reanalyze] {len(paths)} snapshots, {len(done)} already scored, {len(todo)} to go "
+          f"with {args.workers} {backend_name} workers.")
+
+    batches = [todo[i:i + args.batch_size] for i in range(0, len(todo), args.batch_size)]
+    started, finished = time.monotonic(), 0
+    if batches:
+        with mp.get_context("spawn").Pool(args.workers, initializer=_init_worker, initargs=(backend_name,)) as pool, \
+                open(args.results, "a") as out:
+            for results in pool.imap_unordered(_score_batch, batches):
+                for result in results:
+                    out.write(json.dumps(result) + "\n")
+                    done[result["snapshot"]] = result
+                out.flush()
+                finished += len(results)
+                rate = finished / max(time.monotonic() - started, 1e-6)
+                remaining = (len(todo) - finished) / rate if rate else 0
+                print(f"[Reanalyze] {finished}/{len(todo)} ({100 * finished / len(todo):.0f}%), "
+                      f"{rate:.1f} img/s, ~{remaining:.0f}s left")
+
+    add_references(done, args.snapshots)
+    if not args.no_apply:
+        apply_to_log(done, backend_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -102,9 +102,11 @@ class BackgroundApp(QWidget):
 
     def quit_app(self):
         print("[DEBUG] Quitting app...")
-        self.scheduler.stop()
+        self.scheduler.stop(wait=True)
         self.dashboard.start_status = True
         self.dashboard.toggle_functionality()
+        # The teardown runs on a daemon thread; let it flush the logs and stop the worker before exiting
+        self.dashboard.stop_scheduler(wait=True)
         self.tray_icon.hide()  # ✅ Hide the tray icon before quitting
         QApplication.quit()
 
@@ -3,16 +3,20 @@ from PyQt5.QtWidgets import (
      QWidget, QVBoxLayout, QLabel, QGridLayout,
     QGroupBox, QFrame, QSizePolicy
 )
-from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtCore import QTimer, Qt, pyqtSignal
 from ui.settings import SettingsWidget
 import threading
 from datetime import datetime
 from services.detection_loop_scheduler import EmotionScheduler
+from services.history_store import HistoryStore
 from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QFont
 
 
 class DashboardWidget(QWidget):
+    # Emitted from the history thread; Qt delivers it on the UI thread
+    last_detection_loaded = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Emotion Motivator Dashboard")
@@ -23,6 +27,9 @@ class DashboardWidget(QWidget):
         self.is_running = False
         self.cam_thread = None
         self.scheduler = None
+        self.history = None
+        self.history_thread = None
+        self.last_detection_loaded.connect(self.show_last_detection)
 
         self.next_trigger_timer = QTimer(self)
         self.next_trigger_timer.timeout.connect(self.update_next_trigger_time)
@@ -37,12 +44,14 @@ class DashboardWidget(QWidget):
             with open('settings.json', 'r') as file:
                 settings = json.load(file)
                 self.selected_schedule = settings.get('monitoring_schedule')
+                self.selected_active_hours = settings.get('active_hours', 'Always')
                 self.selected_notification_theme = settings.get('notification_theme')
                 self.selected_auto_start = settings.get('auto_start')
                 # print(f"Loaded settings: {self.selected_schedule}, {self.selected_notification}, {self.selected_popup_size}")
         except FileNotFoundError:
             print("Settings file not found. Using default settings.")
             self.selected_schedule = 'Hourly'
+            self.selected_active_hours = 'Always'
             self.selected_notification_theme = 'light'
             self.selected_auto_start = 'disable'
             # print(f"Default settings applied: {self.selected_schedule}, {self.selected_notification}, {self.selected_popup_size}")
@@ -173,12 +182,14 @@ class DashboardWidget(QWidget):
         self.notification_theme_label = QLabel()
         self.auto_start_label = QLabel()
         self.next_schedule_label = QLabel()
+        self.last_detection_label = QLabel()
 
 
         layout.addWidget(self.schedule_label)
         layout.addWidget(self.notification_theme_label)
         layout.addWidget(self.auto_start_label)
         layout.addWidget(self.next_schedule_label)
+        layout.addWidget(self.last_detection_label)
 
         group.setLayout(layout)
         self.update_settings_display()  # Set initial values
@@ -198,7 +209,10 @@ class DashboardWidget(QWidget):
     def update_settings_display(self):
         # Update the settings labels with the new settings
         # print(f"Updating settings display with: {self.selected_schedule}, {self.selected_notification}, {self.selected_popup_size}")
-        self.schedule_label.setText(f"⏱️ Interval Time: {self.selected_schedule}")
+        schedule_text = self.selected_schedule
+        if self.selected_active_hours and self.selected_active_hours != 'Always':
+            schedule_text = f"{schedule_text} ({self.selected_active_hours.lower()})"
+        self.schedule_label.setText(f"⏱️ Interval Time: {schedule_text}")
         self.notification_theme_label.setText(f"🔔 Notification Theme: {self.selected_notification_theme}")
         self.auto_start_label.setText(f"🖥️ Auto Start: {self.selected_auto_start}")
         if self.scheduler and hasattr(self.scheduler, 'get_next_trigger_time'):
@@ -206,6 +220,7 @@ class DashboardWidget(QWidget):
             self.next_schedule_label.setText(f"📷 Next Detection: {next_trigger}")
         else:
             self.next_schedule_label.setText("📷 Next Detection: Not scheduled yet")
+        self.update_last_detection()
 
         # Force the UI to update
         self.repaint()
@@ -241,9 +256,9 @@ class DashboardWidget(QWidget):
             self.next_trigger_timer.stop()
             self.next_schedule_label.setText("📷 Next Detection: Not scheduled yet")
 
-    def stop_scheduler(self):
+    def stop_scheduler(self, wait=False):
         if self.scheduler:
-            self.scheduler.stop()  # Properly stop the EmotionScheduler
+            self.scheduler.stop(wait=wait)  # Properly stop the EmotionScheduler
             print(f"[{datetime.now().strftime('%H:%M:%S')}] Scheduler stopped by user.")
 
     def update_status_card(self):
@@ -287,6 +302,37 @@ class DashboardWidget(QWidget):
             self.next_schedule_label.setText(f"📷 Next Detection: {next_trigger}")
         else:
             self.next_schedule_label.setText("📷 Next Detection: Not scheduled yet")
+        self.update_last_detection()
+
+    def update_last_detection(self):
+        # Opening the store can rebuild its rollups, so it's never touched on the UI thread
+        if self.history_thread is not None and self.history_thread.is_alive():
+            return
+        self.history_thread = threading.Thread(target=self.load_last_detection, name="VibeSyncDashboardHistory",
+                                               daemon=True)
+        self.history_thread.start()
+
+    def load_last_detection(self):
+        # One indexed row from the history store rather than parsing the whole log
+        try:
+            if self.history is None:
+                self.history = HistoryStore()
+            latest = self.history.latest()
+            # Today's totals come from the daily rollup, a single row
+            today = self.history.rollup_summary("day", start=datetime.now().strftime("%Y-%m-%d"))
+        except Exception as e:
+            print(f"[Dashboard] History unavailable: {e}")
+            latest, today = None, []
+        if latest:
+            text = f"🙂 Last Detection: {latest['emotion'].capitalize()} at {latest['timestamp']}"
+        else:
+            text = "🙂 Last Detection: None yet"
+        if today and today[0]["detections"]:
+            text += f" · Today: {today[0]['detections']}, mostly {today[0]['dominant_emotion']}"
+        self.last_detection_loaded.emit(text)
+
+    def show_last_detection(self, text):
+        self.last_detection_label.setText(text)
 
     def fetch_last_displayed_quote(self):
         # Define the path to the JSON file
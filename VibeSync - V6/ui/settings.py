@@ -106,10 +106,45 @@ class SettingsWidget(QWidget):
         self.schedule_combo.setStyleSheet(combo_style)
 
         # Add items with display text and corresponding minute values
-        self.schedule_combo.addItems(["Every 30 seconds", "Every 1 minute", "Every 2 minutes", "Every 4 minutes", "Every 30 minutes", "Hourly", "Every 2 hours", "Every 3 hours"])
+        self.schedule_combo.addItems(["Every 30 seconds", "Every 1 minute", "Every 2 minutes", "Every 4 minutes", "Every 30 minutes", "Hourly", "Every 2 hours", "Every 3 hours", "Adaptive", "Custom (cron)"])
         self.schedule_combo.currentIndexChanged.connect(self.update_schedule)  # trigger on index change
         layout.addWidget(self.schedule_combo)
 
+        # Active Hours ComboBox
+        label = QLabel("Active Hours")
+        label.setContentsMargins(0, 0, 0, 0)
+        label.setIndent(0)
+        label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        label.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Preferred)
+        layout.addWidget(label)
+        self.active_hours_combo = QComboBox()
+        self.active_hours_combo.setStyleSheet(combo_style)
+        self.active_hours_combo.addItems(["Always", "Work hours"])
+        layout.addWidget(self.active_hours_combo)
+
+        hours_tip = QLabel(
+            "Note: Work hours, quiet periods and the cron expression are edited in settings.json."
+        )
+        hours_tip.setStyleSheet("font-size: 12px; color: gray; font-style: italic;")
+        layout.addWidget(hours_tip)
+
+        # Emotion Model ComboBox
+        label = QLabel("Emotion Model")
+        label.setContentsMargins(0, 0, 0, 0)
+        label.setIndent(0)
+        label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        label.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Preferred)
+        layout.addWidget(label)
+        self.backend_combo = QComboBox()
+        self.backend_combo.setStyleSheet(combo_style)
+        self.backend_combo.addItems(["DeepFace", "OpenCV DNN"])
+        layout.addWidget(self.backend_combo)
+
+        backend_tip = QLabel(
+            "Note: OpenCV DNN is lighter and faster but needs models/emotion-ferplus-8.onnx."
+        )
+        backend_tip.setStyleSheet("font-size: 12px; color: gray; font-style: italic;")
+        layout.addWidget(backend_tip)
 
         # Notification Theme ComboBox
         label = QLabel("Notification Theme")
@@ -217,6 +252,8 @@ class SettingsWidget(QWidget):
         # Store current user selections
         settings = {
             "monitoring_schedule": self.schedule_combo.currentText(),
+            "active_hours": self.active_hours_combo.currentText(),
+            "emotion_backend": self.backend_combo.currentText(),
             "notification_theme": self.notify_combo.currentText(),
             "auto_start": self.auto_start_combo.currentText(),
         }
@@ -226,6 +263,7 @@ class SettingsWidget(QWidget):
 
         # Save these settings to a JSON file
         try:
+            settings = self.merge_with_saved(settings)
             with open(SETTINGS_FILE, "w") as f:
                 json.dump(settings, f, indent=4)
             # Trigger a confirmation message after saving
@@ -244,6 +282,8 @@ class SettingsWidget(QWidget):
                 with open(SETTINGS_FILE, "r") as f:
                     saved_settings = json.load(f)
                     self.schedule_combo.setCurrentText(saved_settings.get("monitoring_schedule"))
+                    self.active_hours_combo.setCurrentText(saved_settings.get("active_hours", "Always"))
+                    self.backend_combo.setCurrentText(saved_settings.get("emotion_backend", "DeepFace"))
                     self.notify_combo.setCurrentText(saved_settings.get("notification_theme"))
                     self.auto_start_combo.setCurrentText(saved_settings.get("auto_start"))
             except Exception as e:
@@ -253,19 +293,23 @@ class SettingsWidget(QWidget):
         # Define default settings
         default_settings = {
             "monitoring_schedule": "Every 1 minute",
+            "active_hours": "Always",
+            "emotion_backend": "DeepFace",
             "notification_theme": "Light",
             "auto_start": "Disable"
         }
 
         # Reset UI elements
         self.schedule_combo.setCurrentText(default_settings["monitoring_schedule"])
+        self.active_hours_combo.setCurrentText(default_settings["active_hours"])
+        self.backend_combo.setCurrentText(default_settings["emotion_backend"])
         self.notify_combo.setCurrentText(default_settings["notification_theme"])
         self.auto_start_combo.setCurrentText(default_settings["auto_start"])
 
         # Save default settings to file
         try:
             with open(SETTINGS_FILE, "w") as f:
-                json.dump(default_settings, f, indent=4)
+                json.dump(self.merge_with_saved(default_settings), f, indent=4)
             self.show_message("Settings Reset", "All settings have been reset to default values.")
             print("✅ Settings reset to defaults.")
         except Exception as e:
@@ -274,6 +318,18 @@ class SettingsWidget(QWidget):
         if self.dashboard_instance:
             self.dashboard_instance.refresh_dashboard()
 
+    def merge_with_saved(self, settings):
+        # Keep keys that have no control on this page (e.g. camera_source)
+        saved_settings = {}
+        if os.path.exists(SETTINGS_FILE):
+            try:
+                with open(SETTINGS_FILE, "r") as f:
+                    saved_settings = json.load(f)
+            except Exception as e:
+                print("Error reading existing settings:", e)
+        saved_settings.update(settings)
+        return saved_settings
+
     def show_message(self, title, message):
         msg = QMessageBox(self)
         msg.setWindowTitle(title)